@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from contract_generator import ContractGenerator
+from mock_server import MockServer, MockServerConfig
+from rate_limit import AdaptiveConcurrency, RateLimiter
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else None
+    }
+
+
+def make_job(index: int) -> Dict[str, Any]:
+    # Unique details per job so the response cache never short-circuits a call
+    return {
+        "contract_type": "tenancy_agreement",
+        "form_data": {
+            "landlord_name": "Benchmark Properties LLC",
+            "tenant_name": f"Tenant {index}",
+            "property_address": f"Unit {index}, 1 Benchmark Way, Springfield",
+            "rent_amount": "$1,500 per month",
+            "term": "12 months",
+            "additional_terms": "No pets"
+        }
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_level(
+    base_url: str,
+    concurrency: int,
+    requests: int,
+    mode: str,
+    submit: bool
+) -> Dict[str, Any]:
+    """Drive one generator at a fixed concurrency and measure it."""
+    generator = ContractGenerator(
+        # The mock has no quota, so only the concurrency limit applies
+        rate_limiter=RateLimiter(),
+        concurrency=AdaptiveConcurrency(initial_limit=concurrency, max_limit=max(concurrency, 64)),
+        api_key="benchmark-key",
+        api_base_url=f"{base_url}/v1"
+    )
+    backend_url = f"{base_url}/contracts"
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    first_chunks: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def run_one(index: int) -> None:
+        job = make_job(index)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if mode == "stream":
+                    result = None
+                    first_chunk = True
+                    async for event in generator.stream_contract(job["contract_type"], job["form_data"], use_cache=False):
+                        if event["type"] == "chunk" and first_chunk:
+                            first_chunks.append(time.perf_counter() - started)
+                            first_chunk = False
+                        elif event["type"] == "done":
+                            result = event
+                else:
+                    result = await generator.generate_contract(job["contract_type"], job["form_data"], use_cache=False)
+                if submit:
+                    await generator.send_contract_draft(result, backend_url)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                key = str(e)[:120]
+                errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    await generator.aclose()
+
+    level = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "succeeded": len(latencies),
+        "failed": requests - len(latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "contracts_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "latency": summarize(latencies),
+        "retries": sum(
+            entry["value"] for entry in generator.metrics.snapshot()["counters"] if entry["counter"] == "retries"
+        )
+    }
+    if mode == "stream":
+        level["first_chunk"] = summarize(first_chunks)
+    return level
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = await MockServer(MockServerConfig(
+            latency_ms=args.latency_ms,
+            latency_sigma=args.latency_sigma,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+            output_words=args.output_words
+        )).start()
+        base_url = server.base_url
+
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            if args.tracemalloc:
+                tracemalloc.reset_peak()
+            level = await run_level(base_url, concurrency, args.requests, args.mode, args.submit)
+            level["memory"] = {
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "heap_peak_bytes": tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+            }
+            levels.append(level)
+            print_level(level)
+    finally:
+        if server is not None:
+            await server.aclose()
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "mode": args.mode,
+            "submit": args.submit,
+            "requests": args.requests,
+            "base_url": args.base_url or "in-process mock",
+            "latency_ms": args.latency_ms,
+            "latency_sigma": args.latency_sigma,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "output_words": args.output_words
+        },
+        "levels": levels
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value * 1000:8.1f}" if value is not None else "       -"
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    latency = level["latency"]
+    print(
+        f"concurrency={level['concurrency']:<4} "
+        f"ok={level['succeeded']:<5} failed={level['failed']:<4} "
+        f"{level['contracts_per_second']:8.2f} contracts/sec  "
+        f"p50={_ms(latency['p50'])}ms p95={_ms(latency['p95'])}ms p99={_ms(latency['p99'])}ms"
+        + (f"  first chunk p50={_ms(level['first_chunk']['p50'])}ms" if "first_chunk" in level else "")
+    )
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print throughput and p95 changes per concurrency level against an earlier run."""
+    before = {level["concurrency"]: level for level in previous["levels"]}
+    print(f"\nComparison with {previous.get('commit') or 'previous run'} ({previous.get('timestamp')}):")
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if old is None:
+            continue
+        throughput_change = (
+            (level["contracts_per_second"] - old["contracts_per_second"]) / old["contracts_per_second"] * 100
+            if old["contracts_per_second"] else 0.0
+        )
+        old_p95, new_p95 = old["latency"]["p95"], level["latency"]["p95"]
+        p95_change = (new_p95 - old_p95) / old_p95 * 100 if old_p95 and new_p95 else 0.0
+        print(
+            f"concurrency={level['concurrency']:<4} "
+            f"throughput {throughput_change:+6.1f}%  p95 latency {p95_change:+6.1f}%"
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for ContractGenerator")
+    parser.add_argument("--concurrency", type=lambda value: [int(part) for part in value.split(",")],
+                        default=[1, 8, 32], help="Comma-separated concurrency levels (default: 1,8,32)")
+    parser.add_argument("--requests", type=int, default=200, help="Contracts per concurrency level")
+    parser.add_argument("--mode", choices=["generate", "stream"], default="generate")
+    parser.add_argument("--submit", action="store_true", help="Also send each contract to the mock backend")
+    parser.add_argument("--base-url", help="Use an already running mock_server.py instead of an in-process one")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.35)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    parser.add_argument("--output-words", type=int, default=1200)
+    parser.add_argument("--tracemalloc", action="store_true", help="Track the Python heap peak (slower)")
+    parser.add_argument("--output", default="bench_results.json", help="Where to save the JSON results")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
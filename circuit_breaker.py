@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Deque, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an endpoint whose circuit is open.
+
+    Args:
+        name: Circuit that rejected the call
+        retry_after: Seconds until the circuit lets trial calls through
+    """
+
+    def __init__(self, name: str, retry_after: float, message: Optional[str] = None):
+        super().__init__(message or f"Circuit '{name}' is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker over a rolling window of calls.
+
+    While closed, the outcome of the last `window_size` calls is kept. Once at
+    least `min_calls` are recorded, the circuit opens when the share of failed
+    calls reaches `failure_rate_threshold` or the share of calls slower than
+    `slow_call_seconds` reaches `slow_call_rate_threshold`. While open, calls
+    fail fast with CircuitOpenError. After `open_seconds` the circuit is
+    half-open and lets `half_open_calls` trial calls through: it closes if
+    they all succeed and opens again on the first failure.
+
+    Args:
+        name: Name used in errors, metrics and state reports
+        failure_rate_threshold: Failed share of the window (0-1) that opens the circuit
+        slow_call_rate_threshold: Slow share of the window (0-1) that opens the circuit
+        slow_call_seconds: Calls taking longer than this count as slow
+        window_size: Number of recent calls evaluated
+        min_calls: Calls needed in the window before the circuit can open
+        open_seconds: How long the circuit stays open before trial calls
+        half_open_calls: Trial calls let through while half-open
+        on_state_change: Called with (name, old_state, new_state) on every transition
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_rate_threshold: float = 1.0,
+        slow_call_seconds: float = 60.0,
+        window_size: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 3,
+        on_state_change: Optional[Callable[[str, str, str], None]] = None
+    ):
+        if not 0 < failure_rate_threshold <= 1 or not 0 < slow_call_rate_threshold <= 1:
+            raise ValueError("rate thresholds must be between 0 and 1")
+        if window_size < 1 or not 1 <= min_calls <= window_size or half_open_calls < 1:
+            raise ValueError("window_size, min_calls and half_open_calls must be at least 1, min_calls at most window_size")
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.on_state_change = on_state_change
+        self._state = CLOSED
+        # (failed, slow) per recent call while closed
+        self._window: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_succeeded = 0
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        old, self._state = self._state, state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state in (OPEN, HALF_OPEN):
+            self._trials_started = self._trials_succeeded = 0
+        if state == CLOSED:
+            self._window.clear()
+        if self.on_state_change is not None and old != state:
+            self.on_state_change(self.name, old, state)
+
+    def _open_remaining(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._open_remaining() == 0:
+                self._transition(HALF_OPEN)
+            return self._state
+
+    def acquire(self) -> None:
+        """
+        Ask to make a call; every successful acquire must be followed by record().
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with all trial calls taken
+        """
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._open_remaining()
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._trials_started >= self.half_open_calls:
+                    raise CircuitOpenError(self.name, 0.0, f"Circuit '{self.name}' is half-open and waiting on trial calls")
+                self._trials_started += 1
+
+    def record(self, failed: bool, seconds: float) -> None:
+        """Report the outcome of a call made after acquire()."""
+        slow = seconds > self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed or slow:
+                    self._transition(OPEN)
+                else:
+                    self._trials_succeeded += 1
+                    if self._trials_succeeded >= self.half_open_calls:
+                        self._transition(CLOSED)
+                return
+            if self._state == OPEN:
+                # A call that started before the circuit opened
+                return
+            self._window.append((failed, slow))
+            calls = len(self._window)
+            if calls < self.min_calls:
+                return
+            failure_rate = sum(1 for failed_call, _ in self._window if failed_call) / calls
+            slow_rate = sum(1 for _, slow_call in self._window if slow_call) / calls
+            if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a permit whose call was cancelled before it had an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials_started > self._trials_succeeded:
+                self._trials_started -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            calls = len(self._window)
+            return {
+                "state": state,
+                "calls": calls,
+                "failure_rate": sum(1 for failed, _ in self._window if failed) / calls if calls else 0.0,
+                "slow_call_rate": sum(1 for _, slow in self._window if slow) / calls if calls else 0.0,
+                "retry_after": self._open_remaining() if state == OPEN else 0.0
+            }
+
+
+class CircuitBreakers:
+    """
+    One CircuitBreaker per endpoint, created on first use with shared settings.
+
+    Args:
+        on_state_change: Called with (name, old_state, new_state) on every transition
+        **settings: CircuitBreaker arguments applied to every circuit
+    """
+
+    def __init__(self, on_state_change: Optional[Callable[[str, str, str], None]] = None, **settings: Any):
+        self.on_state_change = on_state_change
+        self.settings = settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(
+                    name, on_state_change=self._state_changed, **self.settings
+                )
+            return breaker
+
+    def _state_changed(self, name: str, old: str, new: str) -> None:
+        if self.on_state_change is not None:
+            self.on_state_change(name, old, new)
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        """State and window statistics of every circuit used so far."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.stats() for breaker in breakers}
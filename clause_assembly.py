@@ -0,0 +1,143 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from response_cache import make_cache_key
+from template_registry import CompiledTemplate
+from token_budget import build_request
+
+# "Include standard legal clauses for:" followed by one "- clause" line per clause
+_CLAUSE_BLOCK = re.compile(r"^Include standard legal clauses for:[ \t]*\n((?:-[ \t]+.+(?:\n|$))+)", re.MULTILINE)
+_DOCUMENT = re.compile(r"^Generate an? professional (.+?) with the following details", re.MULTILINE)
+# Detail lines for names ("Landlord: {landlord_name} (use this exact name ...)") give the defined terms
+_NAMED_PARTY = re.compile(r"^([A-Z][\w ]*?)(?: Name)?: \{\w+\} \(use this exact name", re.MULTILINE)
+_SIGNATURES = re.compile(r"^\W*(IN WITNESS WHEREOF|SIGNATURES?\b|EXECUTED\b)", re.IGNORECASE)
+
+
+class ClauseAssembler:
+    """
+    Builds contracts from cached standard clauses plus party-specific text.
+
+    The clauses a template lists under "Include standard legal clauses for:"
+    are boilerplate, the same in every contract of that type. In assembly mode
+    each of them is generated once per contract type, model and `version`,
+    kept in the response cache and reused for every contract. The model is
+    only asked for the party-specific sections, with a marker line where the
+    standard clauses go, and the clauses are stitched in locally.
+
+    Bump `version` to regenerate every clause, e.g. after a legal review.
+
+    Args:
+        version: Clause library version, part of every clause cache key
+        contract_types: Contract types to assemble (default: every template that lists standard clauses)
+        max_clause_tokens: Output token budget for one clause
+        max_clauses: Clause texts kept in memory, least recently used dropped first
+            (dropped clauses are read back from the response cache)
+    """
+
+    MARKER = "[[STANDARD CLAUSES]]"
+
+    def __init__(
+        self,
+        version: str = "1",
+        contract_types: Optional[Iterable[str]] = None,
+        max_clause_tokens: int = 1024,
+        max_clauses: int = 256
+    ):
+        self.version = version
+        self.contract_types = set(contract_types) if contract_types is not None else None
+        self.max_clause_tokens = max_clause_tokens
+        self.max_clauses = max_clauses
+        # Derived templates per source template, and clause text per clause cache key
+        self._variable_templates: Dict[Tuple[str, str], CompiledTemplate] = {}
+        self._clauses: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def standard_clauses(template: CompiledTemplate) -> List[str]:
+        """Clause names listed in the template, in order."""
+        match = _CLAUSE_BLOCK.search(template.source)
+        if match is None:
+            return []
+        return [line.lstrip("-").strip() for line in match.group(1).splitlines() if line.strip()]
+
+    def applies_to(self, contract_type: str, template: Optional[CompiledTemplate]) -> bool:
+        if template is None or (self.contract_types is not None and contract_type not in self.contract_types):
+            return False
+        return bool(self.standard_clauses(template))
+
+    def variable_template(self, template: CompiledTemplate) -> CompiledTemplate:
+        """The template with its standard clause list replaced by party-specific-only instructions."""
+        key = (template.name, template.source)
+        with self._lock:
+            variable = self._variable_templates.get(key)
+        if variable is not None:
+            return variable
+
+        clauses = "".join(f"- {clause}\n" for clause in self.standard_clauses(template))
+        instructions = (
+            "Write only the party-specific parts of the agreement: the title, the parties, "
+            "the details above, any additional terms and the signature block.\n"
+            "Do not write the following standard clauses; they are added separately:\n"
+            f"{clauses}"
+            f"Put a line containing only {self.MARKER} where those clauses belong, before the signature block.\n"
+        )
+        source = _CLAUSE_BLOCK.sub(lambda _: instructions.replace("{", "{{").replace("}", "}}"), template.source, count=1)
+        variable = CompiledTemplate(template.name, source, template.optional_fields)
+        with self._lock:
+            self._variable_templates[key] = variable
+        return variable
+
+    def clause_request(self, template: CompiledTemplate, clause: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Gemini request body for one standard clause.
+
+        Returns:
+            Tuple of the request body and its token report
+        """
+        match = _DOCUMENT.search(template.source)
+        document = match.group(1) if match else template.name.replace("_", " ")
+        terms = [f'"{name}"' for name in _NAMED_PARTY.findall(template.source)]
+        prompt = (
+            f'Write the "{clause}" clause of a professional {document}.\n'
+            + (f"Refer to the parties only by these defined terms: {', '.join(terms)}.\n" if terms else "")
+            + "Do not include names, addresses, dates, amounts or bracketed placeholders.\n"
+            "Output only the clause, as a heading followed by its text, formatted as one section of a legal document."
+        )
+        return build_request(prompt, self.max_clause_tokens)
+
+    def clause_key(self, api_url: str, data: Dict[str, Any]) -> str:
+        return make_cache_key(api_url, {"clause_version": self.version, "request": data})
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._clauses.get(key)
+            if text is not None:
+                self._clauses.move_to_end(key)
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._clauses[key] = text
+            self._clauses.move_to_end(key)
+            while len(self._clauses) > self.max_clauses:
+                self._clauses.popitem(last=False)
+
+    def assemble(self, text: str, clauses: List[str]) -> str:
+        """
+        Insert the clauses at the marker line.
+
+        Without a marker they go before the signature block, or at the end if
+        there is none either.
+        """
+        block = "\n\n".join(clause.strip() for clause in clauses)
+        lines = text.splitlines()
+        for index, line in enumerate(lines):
+            if self.MARKER in line:
+                lines[index] = block
+                return "\n".join(lines)
+        for index, line in enumerate(lines):
+            if _SIGNATURES.match(line):
+                return "\n".join(lines[:index] + [block, ""] + lines[index:])
+        return text.rstrip() + "\n\n" + block
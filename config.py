@@ -0,0 +1,110 @@
+import os
+from typing import Optional
+
+DEFAULT_API_BASE_URL = "https://generativelanguage.googleapis.com/v1"
+DEFAULT_MODEL = "gemini-1.5-flash"
+# Pay-as-you-go quota of gemini-1.5-flash; lower them for the free tier or a shared key
+DEFAULT_REQUESTS_PER_MINUTE = 2000
+DEFAULT_TOKENS_PER_MINUTE = 4_000_000
+
+
+def _env_number(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+class Settings:
+    """
+    Connection settings for the Gemini API.
+
+    Args:
+        api_key: Google API key
+        model: Gemini model name
+        api_base_url: Base URL of the Generative Language API, including the version
+        requests_per_minute: Client-side request quota for model calls (0 or None disables it)
+        tokens_per_minute: Client-side token quota for model calls (0 or None disables it)
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        api_base_url: str = DEFAULT_API_BASE_URL,
+        requests_per_minute: Optional[float] = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: Optional[float] = DEFAULT_TOKENS_PER_MINUTE
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.api_base_url = api_base_url.rstrip("/")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    def model_url(self, method: str, model: Optional[str] = None) -> str:
+        """URL of a model method, e.g. model_url("generateContent")."""
+        return f"{self.api_base_url}/models/{model or self.model}:{method}"
+
+    @classmethod
+    def from_env(cls, load_env_file: bool = True) -> "Settings":
+        """
+        Read settings from GOOGLE_API_KEY, GEMINI_MODEL, GEMINI_API_BASE_URL,
+        GEMINI_REQUESTS_PER_MINUTE and GEMINI_TOKENS_PER_MINUTE.
+
+        Args:
+            load_env_file: Load a .env file first (variables already set take precedence)
+        """
+        if load_env_file:
+            # python-dotenv is only imported when a .env file is actually read
+            from dotenv import load_dotenv
+            load_dotenv()
+        return cls(
+            api_key=os.getenv("GOOGLE_API_KEY"),
+            model=os.getenv("GEMINI_MODEL") or DEFAULT_MODEL,
+            api_base_url=os.getenv("GEMINI_API_BASE_URL") or DEFAULT_API_BASE_URL,
+            requests_per_minute=_env_number("GEMINI_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE),
+            tokens_per_minute=_env_number("GEMINI_TOKENS_PER_MINUTE", DEFAULT_TOKENS_PER_MINUTE)
+        )
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Process-wide settings, read from the environment (and .env) on first use only."""
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env()
+    return _settings
+
+
+def configure(
+    api_key: Optional[str] = None,
+    model: str = DEFAULT_MODEL,
+    api_base_url: str = DEFAULT_API_BASE_URL,
+    requests_per_minute: Optional[float] = DEFAULT_REQUESTS_PER_MINUTE,
+    tokens_per_minute: Optional[float] = DEFAULT_TOKENS_PER_MINUTE
+) -> Settings:
+    """
+    Set the process-wide settings explicitly, without reading the environment.
+
+    Useful at serverless cold start when the key comes from a secrets manager.
+    """
+    global _settings
+    _settings = Settings(
+        api_key=api_key,
+        model=model,
+        api_base_url=api_base_url,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute
+    )
+    return _settings
+
+
+def reset_settings() -> None:
+    """Forget the process-wide settings so the next get_settings() reads the environment again."""
+    global _settings
+    _settings = None
@@ -1,10 +1,15 @@
+import argparse
 import asyncio
+import csv
+import json
+import re
+import time
+from config import get_settings
 from contract_generator import ContractGenerator
 import os
-from dotenv import load_dotenv
 import sys
 import traceback
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set
 
 class ContractCLI:
     def __init__(self):
@@ -153,11 +158,8 @@ class ContractCLI:
         
     async def run(self):
         try:
-            # Load environment variables
-            load_dotenv()
-            
-            # Check if API key is set
-            api_key = os.getenv("GOOGLE_API_KEY")
+            # Check if API key is set (settings are read from the environment once per process)
+            api_key = get_settings().api_key
             if not api_key:
                 print("Error: GOOGLE_API_KEY not found in .env file")
                 sys.exit(1)
@@ -185,9 +187,252 @@ class ContractCLI:
                     
         except Exception as e:
             print(f"\nError: {str(e)}")
+            report_circuits(self.generator.circuit_states(), sys.stdout)
             print(traceback.format_exc())
             sys.exit(1)
 
+
+def report_circuits(circuits: Dict[str, Dict[str, Any]], stream) -> None:
+    """Print every circuit breaker that is not closed (a model or the backend failing fast)."""
+    for name, circuit in circuits.items():
+        if circuit["state"] != "closed":
+            stream.write(
+                f"Circuit {name} is {circuit['state']}: {circuit['failure_rate']:.0%} of recent calls failed"
+                + (f", retrying in {circuit['retry_after']:.0f}s" if circuit["retry_after"] else "")
+                + "\n"
+            )
+
+
+class ProgressBar:
+    """Single-line progress bar with throughput and ETA, drawn on stderr."""
+    
+    def __init__(self, total: Optional[int], enabled: bool = True, width: int = 30):
+        self.total = total
+        self.enabled = enabled
+        self.width = width
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self._last_draw = 0.0
+        
+    def update(self, success: bool) -> None:
+        self.done += 1
+        if not success:
+            self.failed += 1
+        now = time.perf_counter()
+        # Redraw at most 10 times per second
+        if now - self._last_draw >= 0.1 or self.done == self.total:
+            self._last_draw = now
+            self.draw()
+            
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        if self.total:
+            filled = int(self.width * self.done / self.total)
+            remaining = (self.total - self.done) / rate if rate > 0 else None
+            eta = f"{int(remaining // 60)}m{int(remaining % 60):02d}s" if remaining is not None else "?"
+            return (
+                f"[{'#' * filled}{'.' * (self.width - filled)}] {self.done}/{self.total} "
+                f"{self.done / self.total:4.0%} {rate:.2f}/s ETA {eta} failed {self.failed}"
+            )
+        return f"{self.done} done {rate:.2f}/s failed {self.failed}"
+        
+    def draw(self) -> None:
+        if self.enabled:
+            sys.stderr.write("\r" + self.line())
+            sys.stderr.flush()
+            
+    def close(self) -> None:
+        if self.enabled:
+            self.draw()
+            sys.stderr.write("\n")
+        else:
+            sys.stderr.write(self.line() + "\n")
+        sys.stderr.flush()
+
+
+def read_jobs(path: str, input_format: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Read batch jobs from a JSONL or CSV file, or from stdin when path is "-".
+    
+    JSONL lines are {"id": ..., "contract_type": ..., "form_data": {...}}.
+    CSV files have a contract_type column, an optional id column, and one
+    column per form field; empty cells are left out so one file can mix
+    contract types. Jobs without an id are numbered by their line or row.
+    
+    Returns:
+        List of jobs, each with "id" and either "contract_type"/"form_data" or a parse "error"
+    """
+    if input_format is None:
+        input_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    handle = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    jobs = []
+    try:
+        if input_format == "csv":
+            for number, row in enumerate(csv.DictReader(handle), start=1):
+                job_id = (row.pop("id", None) or "").strip() or str(number)
+                contract_type = (row.pop("contract_type", None) or "").strip()
+                form_data = {field: value for field, value in row.items() if field and value not in (None, "")}
+                jobs.append({"id": job_id, "contract_type": contract_type, "form_data": form_data})
+        else:
+            for number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    job = json.loads(line)
+                    jobs.append({
+                        "id": str(job.get("id", number)),
+                        "contract_type": job["contract_type"],
+                        "form_data": job["form_data"]
+                    })
+                except (ValueError, KeyError, AttributeError) as e:
+                    jobs.append({"id": str(number), "error": f"Invalid job on line {number}: {str(e)}"})
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    return jobs
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Ids of jobs completed by an earlier run."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+class ResultWriter:
+    """Appends each finished job to a JSONL file, or to <id>.json files in a directory."""
+    
+    def __init__(self, output: str, output_dir: bool, append: bool):
+        self.output_dir = output_dir
+        self._file = None
+        if output_dir:
+            os.makedirs(output, exist_ok=True)
+            self.path = output
+        elif output == "-":
+            self._file = sys.stdout
+        else:
+            self._file = open(output, "a" if append else "w", encoding="utf-8")
+            
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.output_dir:
+            # Keep the id usable as a file name
+            name = re.sub(r"[^A-Za-z0-9._-]", "_", record["id"])
+            with open(os.path.join(self.path, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            
+    def close(self) -> None:
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+
+
+async def run_batch(args: argparse.Namespace) -> int:
+    """
+    Generate every job in the input file and stream the results to the output.
+    
+    Completed job ids are appended to the checkpoint file as they finish, so
+    an interrupted run can be resumed with --resume and only the remaining (or
+    failed) jobs are generated again.
+    
+    Returns:
+        Process exit code: 0 if every job succeeded, 1 otherwise
+    """
+    jobs = read_jobs(args.input, args.format)
+    checkpoint_path = args.checkpoint or (
+        os.path.join(args.output, ".checkpoint") if args.output_dir else f"{args.output}.checkpoint"
+    )
+    if args.output == "-" and not args.checkpoint:
+        checkpoint_path = None
+    completed = load_checkpoint(checkpoint_path) if args.resume and checkpoint_path else set()
+    pending = [job for job in jobs if job["id"] not in completed]
+    
+    writer = ResultWriter(args.output, args.output_dir, append=args.resume)
+    checkpoint = open(checkpoint_path, "a" if args.resume else "w", encoding="utf-8") if checkpoint_path else None
+    progress = ProgressBar(len(pending), enabled=not args.no_progress and sys.stderr.isatty())
+    if completed:
+        sys.stderr.write(f"Resuming: {len(jobs) - len(pending)} of {len(jobs)} jobs already done\n")
+    
+    def finish(record: Dict[str, Any]) -> None:
+        writer.write(record)
+        if record["success"] and checkpoint is not None:
+            checkpoint.write(record["id"] + "\n")
+            checkpoint.flush()
+        progress.update(record["success"])
+    
+    circuits: Dict[str, Dict[str, Any]] = {}
+    try:
+        # Unreadable input lines are reported without calling the model
+        runnable = []
+        for job in pending:
+            if "error" in job:
+                finish({"id": job["id"], "success": False, "contract": None, "metadata": None,
+                        "error": job["error"], "elapsed": 0.0})
+            else:
+                runnable.append(job)
+        
+        async with ContractGenerator() as generator:
+            async for outcome in generator.iter_generate_many(
+                runnable, concurrency=args.concurrency, use_cache=not args.no_cache, timeout=args.timeout
+            ):
+                job = runnable[outcome["index"]]
+                result = outcome["result"] or {}
+                finish({
+                    "id": job["id"],
+                    "contract_type": job["contract_type"],
+                    "success": outcome["success"],
+                    "contract": result.get("contract"),
+                    "metadata": result.get("metadata"),
+                    "error": outcome["error"],
+                    "elapsed": outcome["elapsed"]
+                })
+            circuits = generator.circuit_states()
+    finally:
+        progress.close()
+        writer.close()
+        if checkpoint is not None:
+            checkpoint.close()
+    
+    report_circuits(circuits, sys.stderr)
+    return 1 if progress.failed else 0
+
+
+def positive_int(value: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate legal contracts with Gemini")
+    subcommands = parser.add_subparsers(dest="command")
+    subcommands.add_parser("interactive", help="Prompt for one contract at a time (default)")
+    batch = subcommands.add_parser("batch", help="Generate contracts from a JSONL or CSV file without prompts")
+    batch.add_argument("input", help="JSONL or CSV file of jobs, or - for stdin")
+    batch.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the file extension)")
+    batch.add_argument("-o", "--output", default="contracts.jsonl", help="Output JSONL file, - for stdout, or a directory with --output-dir")
+    batch.add_argument("--output-dir", action="store_true", help="Write one <id>.json file per job into --output")
+    batch.add_argument("-c", "--concurrency", type=positive_int, default=8, help="Contracts generated at once (default: 8)")
+    batch.add_argument("--resume", action="store_true", help="Skip jobs recorded in the checkpoint and append to the output")
+    batch.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    batch.add_argument("--no-cache", action="store_true", help="Do not serve identical requests from the response cache")
+    batch.add_argument("--timeout", type=float, help="Seconds allowed per contract, retries included (default: 300)")
+    batch.add_argument("--no-progress", action="store_true", help="Only print a summary line when done")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "batch":
+        sys.exit(asyncio.run(run_batch(args)))
     cli = ContractCLI()
-    asyncio.run(cli.run()) 
\ No newline at end of file
+    asyncio.run(cli.run())
@@ -1,229 +1,1673 @@
-import os
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
-import requests
+import asyncio
+import time
+from typing import Dict, Any, Optional, List, Iterable, AsyncIterator, Union, Tuple
 from datetime import datetime
 import json
+import gzip
+import hashlib
+from contextlib import AsyncExitStack
+from urllib.parse import urlsplit
+
+from circuit_breaker import CircuitBreaker, CircuitBreakers, CircuitOpenError
+from clause_assembly import ClauseAssembler
+from config import Settings, get_settings
+from deadline import Deadline, DeadlineExceeded, deadline_scope, run_with_deadline
+from metrics import MetricsHook, InProcessMetrics
+from model_router import ModelRouter
+from form_validation import FormValidation, get_default_validation
+from rate_limit import RateLimiter, AdaptiveConcurrency
+from response_cache import ResponseCache, MemoryCache, make_cache_key
+from retry import RetryPolicy, RetryableResponse
+from revision import detail_fields, patch_value, plan_revision, section_diff, section_request, split_sections
+from single_flight import SingleFlight
+from template_registry import CompiledTemplate, TemplateRegistry, get_default_registry
+from token_budget import TokenBudget, build_request, estimate_tokens, usage_from_response
+from transport import AsyncTransport, HttpxTransport, PoolConfig, ResponseError, TimeoutConfig, TransportError, TransportResponse, TransportTimeout
+from verification import PRESENT, fix_altered, repair_request, repair_section, verify_fields
 
 class ContractGenerator:
-    def __init__(self):
-        load_dotenv()
-        self.api_key = os.getenv("GOOGLE_API_KEY")
+    # Bulk endpoint responses meaning the backend does not support bulk submission
+    _BULK_UNSUPPORTED_STATUSES = (404, 405, 501)
+
+    def __init__(
+        self,
+        transport: Optional[AsyncTransport] = None,
+        pool_config: Optional[PoolConfig] = None,
+        timeouts: Optional[TimeoutConfig] = None,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        templates: Optional[TemplateRegistry] = None,
+        validation: Optional[FormValidation] = None,
+        token_budget: Optional[TokenBudget] = None,
+        metrics: Optional[MetricsHook] = None,
+        single_flight: Optional[SingleFlight] = None,
+        settings: Optional[Settings] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        api_base_url: Optional[str] = None,
+        router: Optional[ModelRouter] = None,
+        assembler: Optional[ClauseAssembler] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        verify: Optional[str] = None
+    ):
+        # Key, model and endpoint default to the process-wide settings, read from
+        # the environment once per process rather than once per generator
+        settings = settings or get_settings()
+        self.api_key = api_key or settings.api_key
         if not self.api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
         
         # Google API endpoint and configuration
-        self.api_url = "https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent"
-        self.model = "gemini-1.5-flash"
-        
-        # Define prompt templates for different contract types
-        self.prompt_templates = {
-            "nda": """
-            Generate a professional non-disclosure agreement with the following details:
-            Disclosing Party: {disclosing_party} (use this exact name as provided)
-            Receiving Party: {receiving_party} (use this exact name as provided)
-            Purpose: {purpose} (use this exact text as provided)
-            Term: {term} (use this exact text as provided)
-            Additional Terms: {additional_terms} (use this exact text as provided)
-            
-            Include standard legal clauses for:
-            - Definition of confidential information
-            - Obligations of receiving party
-            - Exclusions from confidentiality
-            - Term and termination
-            - Remedies for breach
-            
-            Format the output as a professional legal document with proper sections and formatting.
-            IMPORTANT: Use all provided information exactly as entered without any modifications or corrections.
-            """,
-            
-            "tenancy_agreement": """
-            Generate a professional tenancy agreement with the following details:
-            Landlord: {landlord_name} (use this exact name as provided)
-            Tenant: {tenant_name} (use this exact name as provided)
-            Property Address: {property_address} (use this exact address as provided)
-            Rent Amount: {rent_amount} (use this exact amount as provided)
-            Term: {term} (use this exact text as provided)
-            Additional Terms: {additional_terms} (use this exact text as provided)
-            
-            Include standard legal clauses for:
-            - Rent payment terms
-            - Security deposit
-            - Maintenance responsibilities
-            - Termination conditions
-            - Property use restrictions
-            
-            Format the output as a professional legal document with proper sections and formatting.
-            IMPORTANT: Use all provided information exactly as entered without any modifications or corrections.
-            """,
-            
-            "employment_contract": """
-            Generate a professional employment contract with the following details:
-            Employer: {employer_name} (use this exact name as provided)
-            Employee: {employee_name} (use this exact name as provided)
-            Position: {position} (use this exact title as provided)
-            Salary: {salary} (use this exact amount as provided)
-            Benefits: {benefits} (use this exact text as provided)
-            Term: {term} (use this exact text as provided)
-            Additional Terms: {additional_terms} (use this exact text as provided)
-            
-            Include standard legal clauses for:
-            - Job responsibilities
-            - Compensation and benefits
-            - Confidentiality
-            - Intellectual property
-            - Termination conditions
-            
-            Format the output as a professional legal document with proper sections and formatting.
-            IMPORTANT: Use all provided information exactly as entered without any modifications or corrections.
-            """
-        }
+        self.api_base_url = (api_base_url or settings.api_base_url).rstrip("/")
+        
+        # Model choice per request, failover and hedging; a single fixed model by default
+        self.router = router or ModelRouter(default_model=model or settings.model)
+        self.model = self.router.default_model
+        
+        # Per-phase timeouts for every HTTP request and the default deadline of each call
+        self.timeouts = timeouts or TimeoutConfig()
+        
+        # Non-blocking, pooled HTTP client shared by all outbound calls
+        self.transport = transport or HttpxTransport(pool_config=pool_config, timeouts=self.timeouts)
+        
+        # Generations are deterministic (temperature 0.0), so identical requests
+        # can be answered from cache
+        self.cache = cache if cache is not None else MemoryCache()
+        
+        # Client-side quota (the Gemini tier limits from the settings) and AIMD
+        # concurrency limit shared by every model call
+        self.rate_limiter = rate_limiter or RateLimiter(settings.requests_per_minute, settings.tokens_per_minute)
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        
+        # Transient failures (5xx, 429, connection resets) are retried for both endpoints
+        self.retry_policy = retry_policy or RetryPolicy()
+        
+        # Compiled prompt templates, shared by every generator in the process
+        self.templates = templates or get_default_registry()
+        
+        # Compiled form validators, also shared process-wide by default
+        self.validation = validation or get_default_validation()
+        
+        # Per-contract-type output budgets and pre-flight prompt size checks
+        self.token_budget = token_budget or TokenBudget()
+        
+        # Per-stage latency and counters; export with metrics.PrometheusExporter
+        self.metrics = metrics or InProcessMetrics()
+        
+        # Concurrent identical generations share one in-flight model call
+        self.single_flight = single_flight or SingleFlight()
+        
+        # Optional assembly mode: standard clauses generated once and reused (None = off)
+        self.assembler = assembler
+        
+        # Check generated contracts for the form values verbatim: None, "report" or "repair"
+        if verify not in (None, "report", "repair"):
+            raise ValueError("verify must be None, 'report' or 'repair'")
+        self.verify = verify
+        
+        # Circuit breakers per Gemini model and backend host: fail fast while an endpoint is sick
+        self.breakers = breakers or CircuitBreakers()
+        if self.breakers.on_state_change is None:
+            self.breakers.on_state_change = self._record_circuit_change
+        
+        # What each backend bulk URL was found to support (bulk endpoint, gzip bodies)
+        self._bulk_support: Dict[str, bool] = {}
+        self._bulk_gzip: Dict[str, bool] = {}
+
+    def _model_url(self, model: str, method: str) -> str:
+        base_url = self.router.endpoints.get(model, self.api_base_url)
+        return f"{base_url}/models/{model}:{method}"
+
+    @property
+    def api_url(self) -> str:
+        """generateContent URL of the default model."""
+        return self._model_url(self.model, "generateContent")
+
+    @property
+    def stream_url(self) -> str:
+        """streamGenerateContent URL of the default model."""
+        return self._model_url(self.model, "streamGenerateContent")
+
+    @property
+    def prompt_templates(self) -> Dict[str, str]:
+        """Template source text per contract type."""
+        return {name: template.source for name, template in self.templates.templates.items()}
+
+    @property
+    def required_fields(self) -> Dict[str, List[str]]:
+        """Required form fields per contract type, derived from the template placeholders."""
+        return {name: template.required_fields for name, template in self.templates.templates.items()}
+
+    async def aclose(self) -> None:
+        """Close pooled connections held by the transport and the cache."""
+        await self.transport.aclose()
+        await self.cache.aclose()
+
+    async def __aenter__(self) -> "ContractGenerator":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    def validate_form_data(self, contract_type: str, form_data: Dict[str, str]) -> Dict[str, str]:
+        """
+        Validate form data against the contract type's schema before any network I/O.
+        
+        Args:
+            contract_type: Type of contract to generate
+            form_data: Dictionary containing the form data
+            
+        Returns:
+            The normalized form data (whitespace stripped, optional fields filled in)
+            
+        Raises:
+            ValueError: If the contract type is unknown, the form data is invalid or,
+                with oversize_policy="reject", a field is over its token cap
+        """
+        template = self.templates.get(contract_type)
+        if not template:
+            raise ValueError(f"Invalid contract type: {contract_type}")
+        form_data = self.validation.validate(template, form_data)
+        if self.token_budget.oversize_policy == "reject":
+            self.token_budget.fit_fields(form_data)
+        return form_data
+
+    def validate_many(
+        self,
+        jobs: Iterable[Union[Dict[str, Any], Tuple[str, Dict[str, str]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Validate a batch of jobs without generating anything.
+        
+        Args:
+            jobs: Iterable of {"contract_type": ..., "form_data": ...} dicts or (contract_type, form_data) pairs
+            
+        Returns:
+            One dictionary per job with its index, a valid flag, the normalized form data and any error
+        """
+        results = []
+        for index, job in enumerate(jobs):
+            try:
+                contract_type, form_data = self._unpack_job(job)
+                results.append({
+                    "index": index,
+                    "valid": True,
+                    "form_data": self.validate_form_data(contract_type, form_data),
+                    "error": None
+                })
+            except KeyError as e:
+                results.append({"index": index, "valid": False, "form_data": None, "error": f"Job is missing {e}"})
+            except (ValueError, TypeError) as e:
+                results.append({"index": index, "valid": False, "form_data": None, "error": str(e)})
+        return results
+
+    def _build_request(
+        self,
+        contract_type: str,
+        form_data: Dict[str, str],
+        assemble: bool = False
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Validate the form data and build the Gemini request body.
+        
+        With `assemble`, the prompt asks only for the party-specific sections.
+        
+        Returns:
+            Tuple of the request body and the pre-flight token report
+        """
+        # Validate and normalize form data
+        with self.metrics.timer("validate", contract_type=contract_type):
+            form_data = self.validate_form_data(contract_type, form_data)
+        
+        # Fill the precompiled template, keeping the prompt within the token budget
+        with self.metrics.timer("render", contract_type=contract_type):
+            template = self.templates.get(contract_type)
+            if assemble:
+                template = self.assembler.variable_template(template)
+            prompt, token_report = self.token_budget.prepare(contract_type, template, form_data)
+        # Listed in metadata["token_usage"]["truncated_fields"] as well
+        for field in token_report["truncated_fields"]:
+            self.metrics.increment("truncated_fields", contract_type=contract_type, field=field)
+        
+        return build_request(prompt, token_report["max_output_tokens"], token_report["truncated_fields"],
+                             token_report["estimated_prompt_tokens"])
+
+    def _record_response(self, endpoint: str, response: TransportResponse) -> None:
+        """Report status code and transport timings of one HTTP response."""
+        self.metrics.increment("http_responses", endpoint=endpoint, status=response.status_code)
+        for stage, seconds in response.timings.items():
+            self.metrics.observe(stage, seconds, endpoint=endpoint)
+
+    def _record_generation(self, contract_type: str, metadata: Dict[str, Any]) -> None:
+        """Report retries and token usage of a completed generation."""
+        if metadata["retries"]:
+            self.metrics.increment("retries", metadata["retries"], endpoint="gemini")
+        token_usage = metadata["token_usage"]
+        for kind, key in (("estimated_prompt", "estimated_prompt_tokens"), ("prompt", "prompt_tokens"), ("output", "output_tokens")):
+            if token_usage.get(key):
+                self.metrics.increment("tokens", token_usage[key], contract_type=contract_type, kind=kind)
+
+    def _record_circuit_change(self, circuit: str, old_state: str, new_state: str) -> None:
+        self.metrics.increment("circuit_transitions", circuit=circuit, state=new_state)
+
+    def _acquire_circuit(self, circuit: str) -> CircuitBreaker:
+        """Breaker for `circuit` with a call permit taken; raises CircuitOpenError while it is open."""
+        breaker = self.breakers.get(circuit)
+        try:
+            breaker.acquire()
+        except CircuitOpenError:
+            self.metrics.increment("circuit_rejections", circuit=circuit)
+            raise
+        return breaker
+
+    def _public_error(self, error: Exception, endpoint: str, action: str, **labels: str) -> Exception:
+        """
+        Record a failed call and map it to the error raised to callers.
+
+        Timeouts become DeadlineExceeded and open circuits CircuitOpenError, so
+        callers can tell them apart; anything else becomes a plain Exception.
+
+        Args:
+            error: Exception raised while calling the endpoint
+            endpoint: "gemini" or "backend", for the error metric
+            action: What was being done, e.g. "generating contract"
+            **labels: Further metric labels, e.g. contract_type
+
+        Returns:
+            Exception to raise in place of `error`
+        """
+        if isinstance(error, (DeadlineExceeded, TransportTimeout)):
+            self.metrics.increment("errors", endpoint=endpoint, error="timeout", **labels)
+            return DeadlineExceeded(f"Timed out {action}: {str(error)}")
+        if isinstance(error, CircuitOpenError):
+            self.metrics.increment("errors", endpoint=endpoint, error="circuit_open", **labels)
+            return CircuitOpenError(error.name, error.retry_after, f"Error {action}: {str(error)}")
+        if isinstance(error, TransportError):
+            self.metrics.increment("errors", endpoint=endpoint, error="transport", **labels)
+            failure = "Failed to send contract to backend" if endpoint == "backend" else "API request failed"
+            return Exception(f"{failure}: {str(error)}")
+        self.metrics.increment("errors", endpoint=endpoint, error=self._failure_kind(error), **labels)
+        return Exception(f"Error {action}: {str(error)}")
+
+    @staticmethod
+    def _failure_kind(error: Exception) -> str:
+        """
+        Label of the errors metric for a failure other than a timeout, open circuit or transport error.
+
+        Error statuses are grouped by class (http_4xx, http_5xx) so the label set stays small.
+        """
+        if isinstance(error, RetryableResponse):
+            return f"http_{error.response.status_code // 100}xx"
+        if isinstance(error, ResponseError):
+            return f"http_{error.status_code // 100}xx" if error.status_code is not None else "empty_response"
+        if isinstance(error, (json.JSONDecodeError, KeyError)):
+            return "malformed_response"
+        if isinstance(error, (ValueError, TypeError)):
+            return "invalid_request"
+        return "internal"
+
+    @staticmethod
+    def _is_endpoint_failure(status_code: int) -> bool:
+        """Statuses that count against an endpoint's circuit (429 is quota, handled by the rate limiter)."""
+        return status_code >= 500 or status_code == 408
+
+    def circuit_states(self) -> Dict[str, Dict[str, Any]]:
+        """
+        State of every circuit used so far, keyed by "gemini:<model>" or "backend:<host>".
         
-        # Define required fields for each contract type
-        self.required_fields = {
-            "nda": ["disclosing_party", "receiving_party", "purpose", "term"],
-            "tenancy_agreement": ["landlord_name", "tenant_name", "property_address", "rent_amount", "term"],
-            "employment_contract": ["employer_name", "employee_name", "position", "salary", "term"]
+        Returns:
+            Dictionary per circuit with its state (closed, open or half_open), the
+            calls in its window, failure and slow call rates, and retry_after seconds
+        """
+        return self.breakers.states()
+
+    async def _cache_lookup(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        with self.metrics.timer("cache_lookup"):
+            cached = await self.cache.get(cache_key)
+        self.metrics.increment("cache", result="hit" if cached is not None else "miss")
+        return cached
+
+    @staticmethod
+    def _quota_tokens(token_report: Dict[str, Any]) -> int:
+        """Tokens charged against the tokens-per-minute budget: estimated input plus the output budget."""
+        return token_report["estimated_prompt_tokens"] + token_report["max_output_tokens"]
+
+    def _build_metadata(
+        self,
+        contract_type: str,
+        cache_hit: bool,
+        retries: int = 0,
+        token_report: Optional[Dict[str, Any]] = None,
+        usage: Optional[Dict[str, Optional[int]]] = None,
+        coalesced: bool = False,
+        model: Optional[str] = None,
+        failover: bool = False,
+        hedged: bool = False,
+        assembly: Optional[Dict[str, Any]] = None,
+        revision: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        token_usage = dict(token_report or {})
+        token_usage.update(usage or {"prompt_tokens": None, "output_tokens": None, "total_tokens": None})
+        return {
+            "contract_type": contract_type,
+            "generated_at": datetime.now().isoformat(),
+            "model": model or self.model,
+            "cache_hit": cache_hit,
+            "coalesced": coalesced,
+            "failover": failover,
+            "hedged": hedged,
+            "assembly": assembly,
+            "revision": revision,
+            "verification": None,
+            "retries": retries,
+            "token_usage": token_usage
         }
 
-    def validate_form_data(self, contract_type: str, form_data: Dict[str, str]) -> None:
-        """Validate that all required fields are present in the form data."""
-        required_fields = self.required_fields.get(contract_type, [])
-        missing_fields = [field for field in required_fields if field not in form_data]
-        if missing_fields:
-            raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+    @staticmethod
+    def _first_revision(form_data: Dict[str, str]) -> Dict[str, Any]:
+        """Revision metadata of a freshly generated contract; revise_contract reads the form data back."""
+        return {"number": 0, "form_data": dict(form_data)}
+
+    async def _call_with_retries(self, attempt_fn) -> Tuple[Any, int]:
+        """
+        Run `attempt_fn` under the retry policy.
+        
+        `attempt_fn` raises RetryableResponse for retryable status codes. When
+        the retries are exhausted that exception propagates so the caller can
+        report the last response as usual.
+        
+        Returns:
+            Tuple of the attempt's result and the number of retries it took
+        """
+        retries = 0
+        try:
+            async for attempt in self.retry_policy.retrying():
+                with attempt:
+                    retries = attempt.retry_state.attempt_number - 1
+                    result = await attempt_fn()
+        except RetryableResponse as e:
+            e.retries = retries
+            raise
+        return result, retries
+
+    @staticmethod
+    def _check_model_response(response: TransportResponse) -> None:
+        """Raise a descriptive error for non-200 Gemini responses."""
+        status = response.status_code
+        if status == 400:
+            error_msg = response.error_message()
+            raise ResponseError(f"Bad request: {error_msg}", status)
+        elif status == 401:
+            raise ResponseError("Unauthorized. Please check your API key.", status)
+        elif status == 403:
+            raise ResponseError("Forbidden. Please check your API permissions.", status)
+        elif status == 404:
+            error_msg = response.error_message()
+            raise ResponseError(f"Model not found: {error_msg}", status)
+        elif status == 429:
+            raise ResponseError("Rate limit exceeded. Please try again later.", status)
+        elif status != 200:
+            error_msg = response.error_message()
+            raise ResponseError(f"API request failed: {error_msg}", status)
+
+    @staticmethod
+    def _extract_text(result: Dict[str, Any]) -> str:
+        """Pull the generated text out of a Gemini response (or stream chunk)."""
+        if "candidates" not in result or not result["candidates"]:
+            raise ResponseError("No response from the model")
+        parts = result["candidates"][0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    def _deadline(self, timeout: Optional[float]) -> Deadline:
+        return Deadline(self.timeouts.total if timeout is None else timeout)
 
-    async def generate_contract(self, contract_type: str, form_data: Dict[str, str]) -> Dict[str, Any]:
+    async def generate_contract(
+        self,
+        contract_type: str,
+        form_data: Dict[str, str],
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Generate a contract using the specified template and form data.
         
         Args:
             contract_type: Type of contract to generate
             form_data: Dictionary containing the form data
+            use_cache: Serve identical requests from the response cache
+            timeout: Deadline in seconds for the whole call, retries included (default: timeouts.total)
             
         Returns:
             Dictionary containing the generated contract and metadata
+            
+        Raises:
+            DeadlineExceeded: If the deadline passed or the model call kept timing out
+            CircuitOpenError: If the circuit of every routed model is open
+        """
+        outcome = "error"
+        with self.metrics.timer("generate", contract_type=contract_type) as labels:
+            try:
+                # Cancelling on the deadline closes the in-flight request and frees its connection
+                result = await run_with_deadline(
+                    self._generate_verified(contract_type, form_data, use_cache),
+                    self._deadline(timeout),
+                    "Contract generation"
+                )
+                metadata = result["metadata"]
+                outcome = "cache_hit" if metadata["cache_hit"] else "coalesced" if metadata["coalesced"] else "success"
+                return result
+            except DeadlineExceeded:
+                outcome = "timeout"
+                raise
+            except CircuitOpenError:
+                outcome = "circuit_open"
+                raise
+            finally:
+                labels["outcome"] = outcome
+                self.metrics.increment("generations", contract_type=contract_type, outcome=outcome)
+
+    async def _generate_verified(self, contract_type: str, form_data: Dict[str, str], use_cache: bool) -> Dict[str, Any]:
+        return await self._checked(contract_type, form_data, await self._generate(contract_type, form_data, use_cache), use_cache)
+
+    async def _checked(
+        self,
+        contract_type: str,
+        form_data: Dict[str, str],
+        result: Dict[str, Any],
+        use_cache: bool
+    ) -> Dict[str, Any]:
+        """Verify (and in repair mode, repair) a finished contract as configured by `verify`."""
+        if self.verify is None:
+            return result
+        return await self._verify(contract_type, form_data, result, self.verify == "repair", use_cache)
+
+    def _assembles(self, contract_type: str) -> bool:
+        return self.assembler is not None and self.assembler.applies_to(contract_type, self.templates.get(contract_type))
+
+    async def _post_model(self, model: str, data: Dict[str, Any], token_report: Dict[str, Any]) -> TransportResponse:
+        """One generateContent call to `model` (no retries), within the quota, concurrency and circuit limits."""
+        # Fail fast while the model's circuit is open, before waiting on quota
+        breaker = self._acquire_circuit(f"gemini:{model}")
+        try:
+            # Respect the client-side quota and the adaptive concurrency limit
+            await self.rate_limiter.acquire(self._quota_tokens(token_report))
+            
+            # Make the API request
+            async with self.concurrency.slot() as slot:
+                started = time.perf_counter()
+                try:
+                    response = await self.transport.post(
+                        f"{self._model_url(model, 'generateContent')}?key={self.api_key}",
+                        headers={"Content-Type": "application/json"},
+                        json_body=data
+                    )
+                except TransportError:
+                    breaker.record(True, time.perf_counter() - started)
+                    raise
+                slot.status_code = response.status_code
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(self._is_endpoint_failure(response.status_code), time.perf_counter() - started)
+        self._record_response("gemini", response)
+        if response.status_code == 200:
+            self.router.observe(model, time.perf_counter() - started)
+        if self.retry_policy.is_retryable_status(response.status_code):
+            raise RetryableResponse(response)
+        return response
+
+    async def _call_model(self, model: str, data: Dict[str, Any], token_report: Dict[str, Any]) -> Tuple[TransportResponse, int]:
+        """generateContent under the retry policy; returns the last response and the retry count."""
+        try:
+            return await self._call_with_retries(lambda: self._post_model(model, data, token_report))
+        except RetryableResponse as e:
+            # Out of retries: report the last response
+            return e.response, e.retries
+
+    async def _call_model_hedged(
+        self,
+        model: str,
+        data: Dict[str, Any],
+        token_report: Dict[str, Any]
+    ) -> Tuple[TransportResponse, int, str, bool]:
+        """
+        Call `model`, sending a backup call if it is slower than the router's hedge delay.
+        
+        Returns:
+            Tuple of the response, its retry count, the model that produced it and
+            whether a backup call was sent
         """
+        delay = self.router.hedge_delay(model)
+        if delay is None:
+            response, retries = await self._call_model(model, data, token_report)
+            return response, retries, model, False
+        
+        calls = {asyncio.ensure_future(self._call_model(model, data, token_report)): model}
         try:
-            # Validate form data
-            self.validate_form_data(contract_type, form_data)
+            done, _ = await asyncio.wait(set(calls), timeout=delay)
+            if done:
+                response, retries = next(iter(done)).result()
+                return response, retries, model, False
+            
+            backup_model = self.router.hedge_target(model)
+            self.metrics.increment("hedges", model=model)
+            calls[asyncio.ensure_future(self._call_model(backup_model, data, token_report))] = backup_model
+            
+            # First successful response wins; if both fail, report the primary call's outcome
+            pending = set(calls)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    if call.exception() is None and call.result()[0].status_code == 200:
+                        response, retries = call.result()
+                        return response, retries, calls[call], True
+            primary = next(iter(calls))
+            response, retries = primary.result()
+            return response, retries, model, True
+        finally:
+            for call in calls:
+                if call.done() and not call.cancelled():
+                    call.exception()  # Mark a losing call's error as retrieved
+                call.cancel()
+
+    async def _call_routed(
+        self,
+        models: List[str],
+        data: Dict[str, Any],
+        token_report: Dict[str, Any]
+    ) -> Tuple[TransportResponse, int, Dict[str, Any]]:
+        """
+        Try each routed model in turn until one answers without a failover status.
+        
+        Returns:
+            Tuple of the last response, its retry count and the routing metadata (model, failover, hedged)
+        """
+        for position, model in enumerate(models):
+            last = position == len(models) - 1
+            try:
+                response, retries, served_by, hedged = await self._call_model_hedged(model, data, token_report)
+            except (TransportError, CircuitOpenError) as e:
+                if last:
+                    raise
+                reason = "circuit_open" if isinstance(e, CircuitOpenError) else "transport"
+                self.metrics.increment("failovers", model=model, reason=reason)
+                continue
+            if last or not self.router.should_fail_over(response.status_code):
+                break
+            self.metrics.increment("failovers", model=model, reason=response.status_code)
+        return response, retries, {"model": served_by, "failover": position > 0, "hedged": hedged}
+
+    async def _standard_clause(
+        self,
+        contract_type: str,
+        template: CompiledTemplate,
+        clause: str,
+        model: str,
+        use_cache: bool
+    ) -> Tuple[str, bool]:
+        """
+        Text of one standard clause, generated only if no cached copy exists (or with `use_cache` off).
+        
+        Returns:
+            Tuple of the clause text and whether this call generated it
+        """
+        data, token_report = self.assembler.clause_request(template, clause)
+        key = self.assembler.clause_key(self._model_url(model, "generateContent"), data)
+        if use_cache:
+            text = self.assembler.get(key)
+            if text is None:
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    text = cached["contract"]
+                    self.assembler.put(key, text)
+            if text is not None:
+                self.metrics.increment("clauses", contract_type=contract_type, result="hit")
+                return text, False
+        
+        async def generate_clause() -> str:
+            response, _ = await self._call_model(model, data, token_report)
+            self._check_model_response(response)
+            result = response.json()
+            text = self._extract_text(result)
+            if use_cache:
+                await self.cache.set(key, {"contract": text, "model": model})
+            output_tokens = usage_from_response(result)["output_tokens"]
+            if output_tokens:
+                self.metrics.increment("tokens", output_tokens, contract_type=contract_type, kind="clause_output")
+            return text
+        
+        # Clauses requested by concurrent contracts are generated once
+        text, shared = await self.single_flight.do(key, generate_clause)
+        if use_cache:
+            self.assembler.put(key, text)
+        self.metrics.increment("clauses", contract_type=contract_type, result="shared" if shared else "generated")
+        return text, not shared
+
+    async def _standard_clauses(self, contract_type: str, model: str, use_cache: bool) -> Tuple[List[str], int]:
+        """All standard clauses of a contract type, in template order, and how many were generated."""
+        template = self.templates.get(contract_type)
+        outcomes = await asyncio.gather(*(
+            self._standard_clause(contract_type, template, clause, model, use_cache)
+            for clause in self.assembler.standard_clauses(template)
+        ))
+        return [text for text, _ in outcomes], sum(1 for _, generated in outcomes if generated)
+
+    async def _assembled(self, result: Dict[str, Any], clauses: Optional[asyncio.Future]) -> Dict[str, Any]:
+        """Stitch the standard clauses into a party-specific result (no-op outside assembly mode)."""
+        if clauses is None:
+            return result
+        texts, generated = await clauses
+        with self.metrics.timer("assemble", contract_type=result["metadata"]["contract_type"]):
+            result["contract"] = self.assembler.assemble(result["contract"], texts)
+        result["metadata"]["assembly"] = {
+            "version": self.assembler.version,
+            "clauses": len(texts),
+            "generated": generated
+        }
+        return result
+
+    async def _generate(self, contract_type: str, form_data: Dict[str, str], use_cache: bool) -> Dict[str, Any]:
+        clauses = None
+        try:
+            assemble = self._assembles(contract_type)
+            data, token_report = self._build_request(contract_type, form_data, assemble)
+            models = self.router.route(contract_type, token_report["estimated_prompt_tokens"])
+            
+            # Standard clauses are fetched (or generated, the first time) alongside the party-specific call
+            if assemble:
+                clauses = asyncio.ensure_future(self._standard_clauses(contract_type, models[0], use_cache))
+            
+            # Identical request bodies for the same model produce identical contracts
+            cache_key = make_cache_key(self._model_url(models[0], "generateContent"), data)
+            if use_cache:
+                cached = await self._cache_lookup(cache_key)
+                if cached is not None:
+                    return await self._assembled({
+                        "contract": cached["contract"],
+                        "metadata": self._build_metadata(
+                            contract_type,
+                            cache_hit=True,
+                            token_report=token_report,
+                            model=cached.get("model", models[0]),
+                            revision=self._first_revision(form_data)
+                        )
+                    }, clauses)
+            
+            async def call_model() -> Tuple[str, Dict[str, Any], int, Dict[str, Any]]:
+                response, retries, routing = await self._call_routed(models, data, token_report)
+                
+                # Check for specific error responses
+                self._check_model_response(response)
+                
+                # Extract the generated contract
+                with self.metrics.timer("parse", contract_type=contract_type):
+                    result = response.json()
+                    contract = self._extract_text(result)
+                if use_cache:
+                    await self.cache.set(cache_key, {"contract": contract, "model": routing["model"]})
+                return contract, result, retries, routing
+            
+            # Callers with the same request in flight share its model call and outcome
+            (contract, result, retries, routing), coalesced = await self.single_flight.do(cache_key, call_model)
+            
+            metadata = self._build_metadata(
+                contract_type,
+                cache_hit=False,
+                retries=retries,
+                token_report=token_report,
+                usage=usage_from_response(result),
+                coalesced=coalesced,
+                revision=self._first_revision(form_data),
+                **routing
+            )
+            if coalesced:
+                self.metrics.increment("coalesced", contract_type=contract_type)
+            else:
+                self._record_generation(contract_type, metadata)
+            
+            # Return the contract with metadata
+            return await self._assembled({
+                "contract": contract,
+                "metadata": metadata
+            }, clauses)
+            
+        except Exception as e:
+            raise self._public_error(e, "gemini", "generating contract", contract_type=contract_type) from e
+        finally:
+            if clauses is not None:
+                if clauses.done() and not clauses.cancelled():
+                    clauses.exception()  # Mark a clause error as retrieved when the main call failed first
+                clauses.cancel()
+
+    async def stream_contract(
+        self,
+        contract_type: str,
+        form_data: Dict[str, str],
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a contract, yielding text as the model produces it.
+        
+        Uses the streamGenerateContent (server-sent events) endpoint. With
+        `verify="report"` the streamed text is checked before the done event.
+        Repaired contracts (`verify="repair"`) and contract types built in
+        assembly mode are only final once the whole contract is in, so they are
+        generated as by generate_contract and yielded as a single chunk.
+        
+        Args:
+            contract_type: Type of contract to generate
+            form_data: Dictionary containing the form data
+            use_cache: Serve identical requests from the response cache
+            timeout: Deadline in seconds for the whole stream (default: timeouts.total)
             
-            # Get the appropriate prompt template
-            prompt_template = self.prompt_templates.get(contract_type)
-            if not prompt_template:
-                raise ValueError(f"Invalid contract type: {contract_type}")
+        Yields:
+            {"type": "chunk", "text": ...} events, followed by one
+            {"type": "done", "contract": ..., "metadata": ...} event with the full
+            contract and the same metadata generate_contract returns, including
+            metadata["verification"] when `verify` is set
             
-            # Format the prompt with the form data
-            prompt = prompt_template.format(**form_data)
+        Raises:
+            DeadlineExceeded: If the deadline passed or the stream stalled past the read timeout
+            CircuitOpenError: If the circuit of every routed model is open
+        """
+        if self.verify == "repair" or self._assembles(contract_type):
+            result = await self.generate_contract(contract_type, form_data, use_cache=use_cache, timeout=timeout)
+            yield {"type": "chunk", "text": result["contract"]}
+            yield {"type": "done", "contract": result["contract"], "metadata": result["metadata"]}
+            return
+        
+        started = time.perf_counter()
+        deadline = self._deadline(timeout)
+        try:
+            data, token_report = self._build_request(contract_type, form_data)
+            models = self.router.route(contract_type, token_report["estimated_prompt_tokens"])
+            
+            # Streaming and non-streaming calls produce the same contract, so they share cache entries
+            cache_key = make_cache_key(self._model_url(models[0], "generateContent"), data)
+            if use_cache:
+                cached = await self._cache_lookup(cache_key)
+                if cached is not None:
+                    yield {"type": "chunk", "text": cached["contract"]}
+                    result = await self._checked(contract_type, form_data, {
+                        "contract": cached["contract"],
+                        "metadata": self._build_metadata(
+                            contract_type,
+                            cache_hit=True,
+                            token_report=token_report,
+                            model=cached.get("model", models[0]),
+                            revision=self._first_revision(form_data)
+                        )
+                    }, use_cache)
+                    yield {"type": "done", "contract": result["contract"], "metadata": result["metadata"]}
+                    return
             
-            # Prepare the request headers and data
             headers = {
-                "Content-Type": "application/json"
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
             }
             
-            data = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.0,
-                    "maxOutputTokens": 2000
-                }
-            }
+            async def open_stream(model: str) -> Tuple[Any, Optional[AsyncExitStack]]:
+                # Fail fast while the model's circuit is open, before waiting on quota
+                breaker = self._acquire_circuit(f"gemini:{model}")
+                recorded = False
+                stack = AsyncExitStack()
+                try:
+                    # Respect the client-side quota and the adaptive concurrency limit
+                    try:
+                        await asyncio.wait_for(self.rate_limiter.acquire(self._quota_tokens(token_report)), deadline.remaining())
+                    except asyncio.TimeoutError:
+                        raise DeadlineExceeded(f"Deadline of {deadline.timeout:g}s exceeded waiting for quota")
+                    
+                    # The slot and the connection stay open until the stream is consumed
+                    slot = await stack.enter_async_context(self.concurrency.slot())
+                    started = time.perf_counter()
+                    try:
+                        response = await stack.enter_async_context(self.transport.stream_post(
+                            f"{self._model_url(model, 'streamGenerateContent')}?alt=sse&key={self.api_key}",
+                            headers=headers,
+                            json_body=data
+                        ))
+                    except TransportError:
+                        recorded = True
+                        breaker.record(True, time.perf_counter() - started)
+                        raise
+                    # The circuit sees the time to the response headers
+                    recorded = True
+                    breaker.record(self._is_endpoint_failure(response.status_code), time.perf_counter() - started)
+                    slot.status_code = response.status_code
+                    self.metrics.increment("http_responses", endpoint="gemini_stream", status=response.status_code)
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        if self.retry_policy.is_retryable_status(body.status_code):
+                            raise RetryableResponse(body)
+                        # Error response: no stream to hand back
+                        await stack.aclose()
+                        return body, None
+                except BaseException:
+                    if not recorded:
+                        breaker.release()
+                    await stack.aclose()
+                    raise
+                return response, stack
             
-            # Make the API request
-            response = requests.post(
-                f"{self.api_url}?key={self.api_key}",
-                headers=headers,
-                json=data
+            # Only establishing the stream is retried (and failed over to other models);
+            # once text has been yielded it cannot be taken back
+            for position, model in enumerate(models):
+                last = position == len(models) - 1
+                try:
+                    # Retries and per-request timeouts stop at the deadline
+                    with deadline_scope(deadline):
+                        (response, stack), retries = await self._call_with_retries(lambda: open_stream(model))
+                except RetryableResponse as e:
+                    (response, stack), retries = (e.response, None), e.retries
+                except (TransportError, CircuitOpenError) as e:
+                    if last:
+                        raise
+                    reason = "circuit_open" if isinstance(e, CircuitOpenError) else "transport"
+                    self.metrics.increment("failovers", model=model, reason=reason)
+                    continue
+                if stack is not None:
+                    break
+                if last or not self.router.should_fail_over(response.status_code):
+                    self._check_model_response(response)
+                self.metrics.increment("failovers", model=model, reason=response.status_code)
+            
+            chunks: List[str] = []
+            usage = None
+            async with stack:
+                # Each SSE event is a "data: {...}" line holding a partial GenerateContentResponse
+                async for line in response.aiter_lines():
+                    # Each chunk wait is bounded by the read timeout; this bounds the whole stream
+                    deadline.check("the stream finished")
+                    if not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[len("data:"):])
+                    if "usageMetadata" in event:
+                        usage = usage_from_response(event)
+                    text = self._extract_text(event)
+                    if text:
+                        if not chunks:
+                            self.metrics.observe("first_chunk", time.perf_counter() - started, contract_type=contract_type)
+                        chunks.append(text)
+                        yield {"type": "chunk", "text": text}
+            
+            contract = "".join(chunks)
+            if not contract:
+                raise ResponseError("No response from the model")
+            if use_cache:
+                await self.cache.set(cache_key, {"contract": contract, "model": model})
+            
+            metadata = self._build_metadata(
+                contract_type,
+                cache_hit=False,
+                retries=retries,
+                token_report=token_report,
+                usage=usage,
+                model=model,
+                failover=position > 0,
+                revision=self._first_revision(form_data)
             )
+            self._record_generation(contract_type, metadata)
+            self.metrics.observe("stream", time.perf_counter() - started, contract_type=contract_type)
+            self.metrics.increment("generations", contract_type=contract_type, outcome="stream")
             
-            # Check for specific error responses
-            if response.status_code == 400:
-                error_msg = response.json().get("error", {}).get("message", "Unknown error")
-                raise Exception(f"Bad request: {error_msg}")
-            elif response.status_code == 401:
-                raise Exception("Unauthorized. Please check your API key.")
-            elif response.status_code == 403:
-                raise Exception("Forbidden. Please check your API permissions.")
-            elif response.status_code == 404:
-                error_msg = response.json().get("error", {}).get("message", "Unknown error")
-                raise Exception(f"Model not found: {error_msg}")
-            elif response.status_code == 429:
-                raise Exception("Rate limit exceeded. Please try again later.")
-            elif response.status_code != 200:
-                error_msg = response.json().get("error", {}).get("message", "Unknown error")
-                raise Exception(f"API request failed: {error_msg}")
-            
-            # Extract the generated contract
-            result = response.json()
-            if "candidates" not in result or not result["candidates"]:
-                raise Exception("No response from the model")
-                
-            contract = result["candidates"][0]["content"]["parts"][0]["text"]
+            # Checked after the last chunk, so a streamed contract is reported on, never repaired
+            result = await self._checked(contract_type, form_data, {"contract": contract, "metadata": metadata}, use_cache)
+            yield {
+                "type": "done",
+                "contract": result["contract"],
+                "metadata": result["metadata"]
+            }
             
-            # Return the contract with metadata
+        except Exception as e:
+            error = self._public_error(e, "gemini", "streaming contract", contract_type=contract_type)
+            if isinstance(error, DeadlineExceeded):
+                self.metrics.increment("generations", contract_type=contract_type, outcome="timeout")
+            raise error from e
+
+    async def revise_contract(
+        self,
+        previous: Dict[str, Any],
+        form_data: Dict[str, str],
+        previous_form_data: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Bring a generated contract up to date with changed form data.
+        
+        Only the sections that contain a changed field's previous value are
+        touched: names, addresses and titles are replaced in place and sections
+        depending on other fields (amounts, terms, free text) are regenerated
+        one by one. The whole contract is regenerated when a field was added or
+        cleared, or its previous value cannot be found in the text.
+        
+        Args:
+            previous: Result of generate_contract or of an earlier revise_contract
+            form_data: The complete new form data
+            previous_form_data: Form data of `previous` (default: read from its revision metadata)
+            use_cache: Serve identical section or contract requests from the response cache
+            timeout: Deadline in seconds for the whole call, retries included (default: timeouts.total)
+            
+        Returns:
+            Dictionary containing the revised contract and metadata. metadata["revision"]
+            holds the revision number, the mode ("unchanged", "sections" or "full"),
+            the changed fields, how each was applied and the section-level diff
+            
+        Raises:
+            ValueError: If the form data is invalid or the previous form data is unknown
+            DeadlineExceeded: If the deadline passed or a model call kept timing out
+            CircuitOpenError: If the circuit of every routed model is open
+        """
+        contract_type = previous["metadata"]["contract_type"]
+        if previous_form_data is None:
+            previous_form_data = (previous["metadata"].get("revision") or {}).get("form_data")
+            if previous_form_data is None:
+                raise ValueError("previous_form_data is required for a result without revision metadata")
+        
+        outcome = "error"
+        with self.metrics.timer("revise", contract_type=contract_type) as labels:
+            try:
+                result = await run_with_deadline(
+                    self._revise(contract_type, previous, previous_form_data, form_data, use_cache),
+                    self._deadline(timeout),
+                    "Contract revision"
+                )
+                outcome = result["metadata"]["revision"]["mode"]
+                return result
+            except DeadlineExceeded:
+                outcome = "timeout"
+                raise
+            except CircuitOpenError:
+                outcome = "circuit_open"
+                raise
+            finally:
+                labels["outcome"] = outcome
+                self.metrics.increment("revisions", contract_type=contract_type, outcome=outcome)
+
+    async def _revise(
+        self,
+        contract_type: str,
+        previous: Dict[str, Any],
+        previous_form_data: Dict[str, str],
+        form_data: Dict[str, str],
+        use_cache: bool
+    ) -> Dict[str, Any]:
+        # Compare the values as they went into the prompt: normalized and within the field token caps
+        old_values, _ = self.token_budget.fit_fields(self.validate_form_data(contract_type, previous_form_data))
+        new_values, _ = self.token_budget.fit_fields(self.validate_form_data(contract_type, form_data))
+        template = self.templates.get(contract_type)
+        sections = split_sections(previous["contract"])
+        plan = plan_revision(template, sections, old_values, new_values)
+        
+        number = (previous["metadata"].get("revision") or {}).get("number", 0)
+        revision = {
+            "number": number if plan["mode"] == "unchanged" else number + 1,
+            "form_data": dict(form_data),
+            "mode": plan["mode"],
+            "changed_fields": plan["changed_fields"],
+            "fields": plan["fields"]
+        }
+        if plan["mode"] == "unchanged":
+            revision["diff"] = []
+            return {"contract": previous["contract"], "metadata": dict(previous["metadata"], revision=revision)}
+        
+        if plan["mode"] == "full":
+            result = await self._generate(contract_type, form_data, use_cache)
+        else:
+            result = await self._revise_sections(contract_type, template, previous, sections, plan, old_values, new_values, use_cache)
+        # A revised contract is verified (and repaired) like a newly generated one
+        result = await self._checked(contract_type, form_data, result, use_cache)
+        revision["diff"] = section_diff(sections, split_sections(result["contract"]))
+        result["metadata"]["revision"] = revision
+        return result
+
+    async def _revise_sections(
+        self,
+        contract_type: str,
+        template: CompiledTemplate,
+        previous: Dict[str, Any],
+        sections: List[Dict[str, str]],
+        plan: Dict[str, Any],
+        old_values: Dict[str, str],
+        new_values: Dict[str, str],
+        use_cache: bool
+    ) -> Dict[str, Any]:
+        """Patch and regenerate the sections named in a "sections" plan; returns the result without revision metadata."""
+        try:
+            texts = [section["text"] for section in sections]
+            for field in plan["patch"]:
+                texts = [patch_value(text, old_values[field], new_values[field]) for text in texts]
+            
+            labels = detail_fields(template)
+            calls = await asyncio.gather(*(
+                self._rewrite_section(contract_type, texts[index], *section_request(template, texts[index], [
+                    (labels.get(field, (field, None))[0], old_values[field], new_values[field]) for field in fields
+                ], self._section_budget(contract_type, texts[index])), use_cache, "revision_output")
+                for index, fields in plan["regenerate"].items()
+            ))
+            for index, (text, _) in zip(plan["regenerate"], calls):
+                texts[index] = text
+            
+            # Section calls add up to the cost of the revision; a patch-only revision costs nothing
             return {
-                "contract": contract,
-                "metadata": {
-                    "contract_type": contract_type,
-                    "generated_at": datetime.now().isoformat(),
-                    "model": self.model
-                }
+                "contract": "".join(texts),
+                "metadata": self._section_metadata(contract_type, [report for _, report in calls], previous["metadata"])
             }
+        except Exception as e:
+            raise self._public_error(e, "gemini", "revising contract", contract_type=contract_type) from e
+
+    async def verify_contract(
+        self,
+        result: Dict[str, Any],
+        form_data: Optional[Dict[str, str]] = None,
+        repair: bool = False,
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Check that a generated contract contains every form value exactly as provided.
+        
+        All values are found in one scan of the contract, ignoring whitespace
+        differences. With `repair`, values that appear with different case or
+        punctuation are corrected in place, and each section that should hold a
+        missing value is regenerated on its own, instead of the whole contract.
+        
+        Args:
+            result: Result of generate_contract or revise_contract
+            form_data: Form data of the contract (default: read from its revision metadata)
+            repair: Fix altered and missing values
+            use_cache: Serve identical section requests from the response cache
+            timeout: Deadline in seconds for the repair calls (default: timeouts.total)
+            
+        Returns:
+            The result, repaired if requested, with metadata["verification"]: an ok
+            flag, the missing and altered fields, a report per field and, after a
+            repair, the fields it fixed and its cost ("repair": sections rewritten,
+            cache hits, retries and token usage). The rest of the metadata still
+            describes the generation
             
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed: {str(e)}")
+        Raises:
+            ValueError: If the form data is invalid or unknown
+            DeadlineExceeded: If the deadline passed or a repair call kept timing out
+            CircuitOpenError: If the circuit of every routed model is open
+        """
+        contract_type = result["metadata"]["contract_type"]
+        if form_data is None:
+            form_data = (result["metadata"].get("revision") or {}).get("form_data")
+            if form_data is None:
+                raise ValueError("form_data is required for a result without revision metadata")
+        return await run_with_deadline(
+            self._verify(contract_type, form_data, result, repair, use_cache),
+            self._deadline(timeout),
+            "Contract verification"
+        )
+
+    async def _verify(
+        self,
+        contract_type: str,
+        form_data: Dict[str, str],
+        result: Dict[str, Any],
+        repair: bool,
+        use_cache: bool
+    ) -> Dict[str, Any]:
+        # The values as they went into the prompt: normalized and within the field token caps
+        values, _ = self.token_budget.fit_fields(self.validate_form_data(contract_type, form_data))
+        with self.metrics.timer("verify", contract_type=contract_type):
+            report = verify_fields(values, result["contract"])
+        for status in ("missing", "altered"):
+            if report[status]:
+                self.metrics.increment("verification_fields", len(report[status]), contract_type=contract_type, status=status)
+        
+        if report["ok"] or not repair:
+            self.metrics.increment("verifications", contract_type=contract_type, outcome="ok" if report["ok"] else "failed")
+            return {"contract": result["contract"], "metadata": dict(result["metadata"], verification=report)}
+        
+        contract, cost = await self._repair(contract_type, values, result["contract"], report, use_cache)
+        after = verify_fields(values, contract)
+        after["repaired"] = [
+            field for field in report["missing"] + report["altered"] if after["fields"][field]["status"] == PRESENT
+        ]
+        after["repair"] = cost
+        self.metrics.increment("verifications", contract_type=contract_type, outcome="repaired" if after["ok"] else "failed")
+        # The metadata still describes the generation; the repair calls are reported separately
+        return {"contract": contract, "metadata": dict(result["metadata"], verification=after)}
+
+    async def _repair(
+        self,
+        contract_type: str,
+        values: Dict[str, str],
+        contract: str,
+        report: Dict[str, Any],
+        use_cache: bool
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Correct altered values in place and regenerate the sections that should hold missing ones.
+        
+        Returns:
+            Tuple of the repaired contract and the cost of the repair: sections
+            rewritten, cache hits, retries and token usage of those calls
+        """
+        try:
+            sections = split_sections(fix_altered(contract, values, report))
+            texts = [section["text"] for section in sections]
+            template = self.templates.get(contract_type)
+            labels = detail_fields(template)
+            # Missing values go to the section whose heading matches their label, one call per section
+            targets: Dict[int, List[Tuple[str, str]]] = {}
+            for field in report["missing"]:
+                label = labels.get(field, (field.replace("_", " ").title(), None))[0]
+                targets.setdefault(repair_section(sections, label), []).append((label, values[field]))
+            calls = await asyncio.gather(*(
+                self._rewrite_section(contract_type, texts[index], *repair_request(
+                    template, texts[index], details, self._section_budget(contract_type, texts[index])
+                ), use_cache, "repair_output")
+                for index, details in targets.items()
+            ))
+            for index, (text, _) in zip(targets, calls):
+                texts[index] = text
+            reports = [call_report for _, call_report in calls]
+            token_report, usage = self._section_call_usage(reports)
+            token_usage = dict(token_report, **usage)
+            del token_usage["truncated_fields"]
+            return "".join(texts), {
+                "sections": len(reports),
+                "cache_hits": sum(1 for call_report in reports if call_report["cache_hit"]),
+                "retries": sum(call_report["retries"] for call_report in reports),
+                "token_usage": token_usage
+            }
         except Exception as e:
-            raise Exception(f"Error generating contract: {str(e)}")
+            raise self._public_error(e, "gemini", "repairing contract", contract_type=contract_type) from e
+
+    def _section_budget(self, contract_type: str, section: str) -> int:
+        # A rewritten section is about as long as the original
+        return min(self.token_budget.output_budget(contract_type), 2 * estimate_tokens(section) + 256)
+
+    async def _rewrite_section(
+        self,
+        contract_type: str,
+        section: str,
+        data: Dict[str, Any],
+        token_report: Dict[str, Any],
+        use_cache: bool,
+        kind: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Replace one section with the model's answer to a section request.
+        
+        Args:
+            kind: Token metric kind of the output, e.g. "revision_output"
+        
+        Returns:
+            Tuple of the new section text and a report of the call (cache hit,
+            retries, token report and usage, routing)
+        """
+        models = self.router.route(contract_type, token_report["estimated_prompt_tokens"])
+        cache_key = make_cache_key(self._model_url(models[0], "generateContent"), data)
+        # The section keeps the blank lines around it
+        leading = section[:len(section) - len(section.lstrip())]
+        trailing = section[len(section.rstrip()):]
+        
+        if use_cache:
+            cached = await self._cache_lookup(cache_key)
+            if cached is not None:
+                return leading + cached["contract"].strip() + trailing, {
+                    "cache_hit": True, "retries": 0, "token_report": token_report,
+                    "usage": {"prompt_tokens": None, "output_tokens": None, "total_tokens": None},
+                    "model": cached.get("model", models[0]), "failover": False, "hedged": False
+                }
+        
+        response, retries, routing = await self._call_routed(models, data, token_report)
+        self._check_model_response(response)
+        result = response.json()
+        text = self._extract_text(result).strip()
+        if not text:
+            raise ResponseError("No response from the model")
+        if use_cache:
+            await self.cache.set(cache_key, {"contract": text, "model": routing["model"]})
+        usage = usage_from_response(result)
+        if retries:
+            self.metrics.increment("retries", retries, endpoint="gemini")
+        if usage["output_tokens"]:
+            self.metrics.increment("tokens", usage["output_tokens"], contract_type=contract_type, kind=kind)
+        return leading + text + trailing, {
+            "cache_hit": False, "retries": retries, "token_report": token_report, "usage": usage, **routing
+        }
+
+    @staticmethod
+    def _section_call_usage(reports: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """Summed token report and usage of the section calls in `reports`."""
+        token_report = {
+            "estimated_prompt_tokens": sum(report["token_report"]["estimated_prompt_tokens"] for report in reports),
+            "max_output_tokens": sum(report["token_report"]["max_output_tokens"] for report in reports),
+            "truncated_fields": []
+        }
+        usage = {
+            key: sum(report["usage"][key] or 0 for report in reports)
+            for key in ("prompt_tokens", "output_tokens", "total_tokens")
+        }
+        return token_report, usage
+
+    def _section_metadata(
+        self,
+        contract_type: str,
+        reports: List[Dict[str, Any]],
+        previous_metadata: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Metadata of a contract whose sections were rewritten by the calls in `reports` (none for local edits only)."""
+        token_report, usage = self._section_call_usage(reports)
+        return self._build_metadata(
+            contract_type,
+            cache_hit=bool(reports) and all(report["cache_hit"] for report in reports),
+            retries=sum(report["retries"] for report in reports),
+            token_report=token_report,
+            usage=usage,
+            model=reports[0]["model"] if reports else previous_metadata.get("model"),
+            failover=any(report["failover"] for report in reports),
+            hedged=any(report["hedged"] for report in reports),
+            assembly=previous_metadata.get("assembly")
+        )
+
+    @staticmethod
+    def _unpack_job(job: Union[Dict[str, Any], Tuple[str, Dict[str, str]]]) -> Tuple[str, Dict[str, str]]:
+        """Accept either {"contract_type": ..., "form_data": ...} or a (contract_type, form_data) pair."""
+        if isinstance(job, dict):
+            return job["contract_type"], job["form_data"]
+        contract_type, form_data = job
+        return contract_type, form_data
 
-    async def send_contract_draft(self, contract_data: Dict[str, Any], backend_url: str) -> Dict[str, Any]:
+    async def iter_generate_many(
+        self,
+        jobs: Iterable[Union[Dict[str, Any], Tuple[str, Dict[str, str]]]],
+        concurrency: int = 8,
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate many contracts concurrently, yielding each outcome as it completes.
+        
+        Args:
+            jobs: Iterable of {"contract_type": ..., "form_data": ...} dicts or (contract_type, form_data) pairs
+            concurrency: Maximum number of generations in flight at once
+            use_cache: Serve identical requests from the response cache
+            timeout: Deadline in seconds per job, counted from when it starts (default: timeouts.total)
+            
+        Yields:
+            Dictionary per job with its input index, success flag, result or error, and elapsed seconds
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_job(index: int, job: Any) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    contract_type, form_data = self._unpack_job(job)
+                    result = await self.generate_contract(contract_type, form_data, use_cache=use_cache, timeout=timeout)
+                    return {
+                        "index": index,
+                        "success": True,
+                        "result": result,
+                        "error": None,
+                        "elapsed": time.perf_counter() - started
+                    }
+                except Exception as e:
+                    # A failed job is reported, not allowed to abort the batch
+                    return {
+                        "index": index,
+                        "success": False,
+                        "result": None,
+                        "error": str(e),
+                        "elapsed": time.perf_counter() - started
+                    }
+        
+        tasks = [asyncio.create_task(run_job(index, job)) for index, job in enumerate(jobs)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding work if the consumer abandons the iterator
+            for task in tasks:
+                task.cancel()
+
+    async def generate_many(
+        self,
+        jobs: Iterable[Union[Dict[str, Any], Tuple[str, Dict[str, str]]]],
+        concurrency: int = 8,
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate many contracts concurrently and return the outcomes in input order.
+        
+        Args:
+            jobs: Iterable of {"contract_type": ..., "form_data": ...} dicts or (contract_type, form_data) pairs
+            concurrency: Maximum number of generations in flight at once
+            use_cache: Serve identical requests from the response cache
+            timeout: Deadline in seconds per job, counted from when it starts (default: timeouts.total)
+            
+        Returns:
+            Dictionary with the per-job "results" (see iter_generate_many) and an aggregate "summary"
+        """
+        jobs = list(jobs)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        started = time.perf_counter()
+        async for outcome in self.iter_generate_many(jobs, concurrency=concurrency, use_cache=use_cache, timeout=timeout):
+            results[outcome["index"]] = outcome
+        elapsed = time.perf_counter() - started
+        
+        latencies = [outcome["elapsed"] for outcome in results]
+        succeeded = sum(1 for outcome in results if outcome["success"])
+        return {
+            "results": results,
+            "summary": {
+                "total": len(jobs),
+                "succeeded": succeeded,
+                "failed": len(jobs) - succeeded,
+                "concurrency": concurrency,
+                "elapsed": elapsed,
+                "contracts_per_second": succeeded / elapsed if elapsed > 0 else 0.0,
+                "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "max_latency": max(latencies) if latencies else 0.0
+            }
+        }
+
+    @staticmethod
+    def _draft_payload(contract_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Backend request body for a generated contract."""
+        return {
+            "contract": contract_data["contract"],
+            "metadata": contract_data["metadata"],
+            "status": "draft",
+            "version": "1.0"
+        }
+
+    @staticmethod
+    def idempotency_key(payload: Dict[str, Any]) -> str:
+        """
+        Stable key for a draft payload.
+
+        The same draft always gets the same key, so a retried or replayed
+        submission is recognized by the backend (409 Conflict) instead of
+        being stored twice.
+        """
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def _post_to_backend(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        json_body: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None
+    ) -> Tuple[TransportResponse, int]:
+        """POST to the backend under the retry policy, returning the last response and the retry count."""
+        circuit = f"backend:{urlsplit(url).netloc}"
+        
+        async def send_request() -> TransportResponse:
+            breaker = self._acquire_circuit(circuit)
+            started = time.perf_counter()
+            try:
+                response = await self.transport.post(url, headers=headers, json_body=json_body, content=content)
+            except TransportError:
+                breaker.record(True, time.perf_counter() - started)
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+            breaker.record(self._is_endpoint_failure(response.status_code), time.perf_counter() - started)
+            self._record_response("backend", response)
+            if self.retry_policy.is_retryable_status(response.status_code):
+                raise RetryableResponse(response)
+            return response
+        
+        try:
+            response, retries = await self._call_with_retries(send_request)
+        except RetryableResponse as e:
+            # Out of retries: report the last response
+            response, retries = e.response, e.retries
+        if retries:
+            self.metrics.increment("retries", retries, endpoint="backend")
+        return response, retries
+
+    async def send_contract_draft(
+        self,
+        contract_data: Dict[str, Any],
+        backend_url: str,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Send the generated contract draft to the backend for storage and processing.
         
+        The request carries an Idempotency-Key header, and a 409 Conflict is
+        reported as success with "duplicate": True since it means the draft is
+        already stored (e.g. by an earlier attempt whose response was lost).
+        
         Args:
             contract_data: Dictionary containing the contract and metadata
             backend_url: URL of the backend API endpoint
+            timeout: Deadline in seconds for the submission, retries included (default: timeouts.total)
             
         Returns:
             Dictionary containing the backend response
+            
+        Raises:
+            DeadlineExceeded: If the deadline passed or the backend kept timing out
+            CircuitOpenError: If the backend's circuit is open
         """
         try:
+            # Prepare the request payload
+            payload = self._draft_payload(contract_data)
+            
             # Prepare the request headers
             headers = {
                 "Content-Type": "application/json",
-                "Accept": "application/json"
+                "Accept": "application/json",
+                "Idempotency-Key": self.idempotency_key(payload)
             }
             
-            # Prepare the request payload
-            payload = {
-                "contract": contract_data["contract"],
-                "metadata": contract_data["metadata"],
-                "status": "draft",
-                "version": "1.0"
-            }
-            
-            # Make the request to the backend
-            response = requests.post(
-                backend_url,
-                headers=headers,
-                json=payload
-            )
+            with self.metrics.timer("backend_submit"):
+                response, retries = await run_with_deadline(
+                    self._post_to_backend(backend_url, headers, json_body=payload),
+                    self._deadline(timeout),
+                    "Backend submission"
+                )
             
             # Check for successful response
             if response.status_code == 201:
                 return {
                     "success": True,
                     "message": "Contract draft successfully sent to backend",
-                    "data": response.json()
+                    "data": response.json(),
+                    "duplicate": False,
+                    "retries": retries
+                }
+            elif response.status_code == 409:
+                return {
+                    "success": True,
+                    "message": "Contract draft already exists on backend",
+                    "data": None,
+                    "duplicate": True,
+                    "retries": retries
                 }
             else:
-                error_msg = response.json().get("error", {}).get("message", "Unknown error")
-                raise Exception(f"Backend request failed: {error_msg}")
+                error_msg = response.error_message()
+                raise ResponseError(f"Backend request failed: {error_msg}", response.status_code)
                 
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to send contract to backend: {str(e)}")
         except Exception as e:
-            raise Exception(f"Error sending contract draft: {str(e)}") 
\ No newline at end of file
+            raise self._public_error(e, "backend", "sending contract draft") from e
+
+    @staticmethod
+    def _submission_result(
+        index: int,
+        success: bool,
+        data: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        duplicate: bool = False
+    ) -> Dict[str, Any]:
+        return {"index": index, "success": success, "data": data, "error": error, "duplicate": duplicate}
+
+    async def _send_bulk_chunk(
+        self,
+        bulk_url: str,
+        payloads: List[Dict[str, Any]],
+        indices: List[int],
+        results: List[Optional[Dict[str, Any]]],
+        compress: bool
+    ) -> bool:
+        """
+        Post one array of drafts to the bulk endpoint and fill in their results.
+        
+        Returns:
+            False if the backend has no bulk endpoint, True otherwise
+        """
+        items = []
+        for index in indices:
+            item = dict(payloads[index])
+            item["idempotency_key"] = self.idempotency_key(payloads[index])
+            items.append(item)
+        body = json.dumps({"contracts": items}, ensure_ascii=False).encode("utf-8")
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Idempotency-Key": hashlib.sha256("".join(item["idempotency_key"] for item in items).encode("ascii")).hexdigest()
+        }
+        
+        try:
+            if compress and self._bulk_gzip.get(bulk_url, True):
+                response, _ = await self._post_to_backend(
+                    bulk_url, dict(headers, **{"Content-Encoding": "gzip"}), content=gzip.compress(body, compresslevel=6)
+                )
+                if response.status_code == 415:
+                    # Backend does not accept compressed bodies: resend uncompressed from now on
+                    self._bulk_gzip[bulk_url] = False
+                    response, _ = await self._post_to_backend(bulk_url, headers, content=body)
+            else:
+                response, _ = await self._post_to_backend(bulk_url, headers, content=body)
+        except TransportError as e:
+            self.metrics.increment("errors", endpoint="backend", error="transport")
+            for index in indices:
+                results[index] = self._submission_result(index, False, error=f"Failed to send contracts to backend: {str(e)}")
+            return True
+        except CircuitOpenError as e:
+            self.metrics.increment("errors", endpoint="backend", error="circuit_open")
+            for index in indices:
+                results[index] = self._submission_result(index, False, error=f"Error sending contract drafts: {str(e)}")
+            return True
+        
+        if response.status_code in self._BULK_UNSUPPORTED_STATUSES:
+            self._bulk_support[bulk_url] = False
+            return False
+        self._bulk_support[bulk_url] = True
+        
+        if response.status_code not in (200, 207):
+            error_msg = f"Backend bulk request failed: {response.error_message()}"
+            for index in indices:
+                results[index] = self._submission_result(index, False, error=error_msg)
+            return True
+        
+        try:
+            item_results = {item.get("index"): item for item in response.json().get("results", [])}
+        except (ValueError, AttributeError):
+            item_results = {}
+        for position, index in enumerate(indices):
+            item = item_results.get(position)
+            status = item.get("status") if item else None
+            if status in (200, 201):
+                results[index] = self._submission_result(index, True, data=item)
+            elif status == 409:
+                results[index] = self._submission_result(index, True, duplicate=True)
+            elif item is None:
+                results[index] = self._submission_result(index, False, error="Missing from bulk response")
+            else:
+                error = item.get("error")
+                message = error.get("message") if isinstance(error, dict) else error
+                results[index] = self._submission_result(index, False, error=f"Backend rejected contract ({status}): {message}")
+        return True
+
+    async def send_contract_drafts(
+        self,
+        contracts: List[Dict[str, Any]],
+        backend_url: str,
+        bulk_url: Optional[str] = None,
+        compress: bool = True,
+        chunk_size: int = 100,
+        concurrency: int = 8,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Send many contract drafts, using the backend's bulk endpoint when it has one.
+        
+        Drafts are posted in arrays of up to `chunk_size`, gzip-compressed, each
+        with its idempotency key so a retried request cannot store a draft twice.
+        The backend reports a status per draft, so one bad draft does not fail
+        the others. If the bulk endpoint answers 404, 405 or 501, the drafts are
+        sent one by one with send_contract_draft instead and the bulk endpoint is
+        not tried again by this generator.
+        
+        Args:
+            contracts: Dictionaries containing the contract and metadata
+            backend_url: URL of the backend contracts endpoint
+            bulk_url: URL of the bulk endpoint (default: backend_url + "/bulk")
+            compress: Gzip the bulk request body
+            chunk_size: Maximum number of drafts per bulk request
+            concurrency: Maximum number of single POSTs in flight when falling back
+            timeout: Deadline in seconds for the whole call (default: timeouts.total); drafts
+                not sent by then are reported as failed
+            
+        Returns:
+            Dictionary with per-draft "results" in input order (index, success, data,
+            error, duplicate) and a "summary" (total, succeeded, failed, mode)
+        """
+        if chunk_size < 1 or concurrency < 1:
+            raise ValueError("chunk_size and concurrency must be at least 1")
+        bulk_url = bulk_url or f"{backend_url.rstrip('/')}/bulk"
+        try:
+            payloads = [self._draft_payload(contract_data) for contract_data in contracts]
+        except KeyError as e:
+            raise Exception(f"Error sending contract drafts: contract data is missing {e}")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(payloads)
+        
+        # Requests, retries and the fallback POSTs below all stop at the deadline
+        with deadline_scope(self._deadline(timeout)) as deadline:
+            with self.metrics.timer("backend_submit", mode="bulk"):
+                if self._bulk_support.get(bulk_url, True):
+                    for start in range(0, len(payloads), chunk_size):
+                        indices = list(range(start, min(start + chunk_size, len(payloads))))
+                        if deadline.expired():
+                            for index in indices:
+                                results[index] = self._submission_result(index, False, error="Deadline exceeded before sending")
+                            continue
+                        if not await self._send_bulk_chunk(bulk_url, payloads, indices, results, compress):
+                            break
+            
+            # Fallback: one POST per draft not handled by the bulk endpoint
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def send_one(index: int) -> None:
+                async with semaphore:
+                    try:
+                        response = await self.send_contract_draft(contracts[index], backend_url)
+                        results[index] = self._submission_result(
+                            index, True, data=response["data"], duplicate=response["duplicate"]
+                        )
+                    except Exception as e:
+                        results[index] = self._submission_result(index, False, error=str(e))
+            
+            fallback = [index for index, result in enumerate(results) if result is None]
+            await asyncio.gather(*(send_one(index) for index in fallback))
+        
+        succeeded = sum(1 for result in results if result["success"])
+        return {
+            "results": results,
+            "summary": {
+                "total": len(results),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "mode": "single" if fallback else "bulk"
+            }
+        }
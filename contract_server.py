@@ -0,0 +1,478 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+from contextlib import aclosing
+from typing import Dict, Any, Optional, Tuple
+
+from circuit_breaker import CLOSED, OPEN, CircuitOpenError
+from contract_generator import ContractGenerator
+from deadline import DeadlineExceeded
+from http_server import HTTPError, HTTPServer, Request, Response
+from job_store import DONE, JobQueue, JobStore
+from metrics import InProcessMetrics, PrometheusExporter
+
+
+class ContractService(HTTPServer):
+    """
+    Async HTTP API over one shared ContractGenerator.
+
+    All requests share the generator, and with it the connection pool, cache,
+    rate limits and metrics. At most `workers` generations run at once and up
+    to `max_queue` more may wait for a worker; requests beyond that are
+    rejected at once with 503 and a Retry-After header instead of piling up.
+
+    Endpoints:
+        POST /generate          {"contract_type", "form_data", "use_cache", "timeout"} -> {"contract", "metadata"}
+        POST /generate/batch    {"jobs": [...], "use_cache", "timeout"} -> {"results", "summary"}
+        POST /revise            {"previous", "form_data", "previous_form_data", "use_cache", "timeout"} -> {"contract", "metadata"}
+        GET  /generate/stream   ?contract_type=...&timeout=...&<field>=... (or form_data=<JSON>), server-sent events
+        POST /generate/stream   Same body as /generate, server-sent events
+        POST /jobs              Same body as /generate -> 202 {"id", "status"} (503 while the job queue is full)
+        GET  /jobs/{id}         Job status, attempts, error and timestamps
+        GET  /jobs/{id}/result  {"contract", "metadata"} of a done job
+        GET  /metrics           Prometheus text format
+        GET  /healthz           Load, limits and circuit breaker states (503 with Retry-After while a circuit is open)
+
+    Args:
+        generator: Shared generator (default: a new ContractGenerator with in-process metrics, closed with the service)
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        workers: Maximum number of generations running at once
+        max_queue: Maximum number of generations waiting for a worker
+        retry_after: Seconds sent in Retry-After when a request is rejected
+        max_batch: Maximum number of jobs in one batch request
+        jobs: Job queue behind the /jobs endpoints, started and stopped with the service (None disables them)
+    """
+
+    def __init__(
+        self,
+        generator: Optional[ContractGenerator] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: int = 16,
+        max_queue: int = 64,
+        retry_after: float = 1.0,
+        max_batch: int = 100,
+        jobs: Optional[JobQueue] = None
+    ):
+        super().__init__(host, port)
+        if workers < 1 or max_queue < 0 or max_batch < 1:
+            raise ValueError("workers and max_batch must be at least 1 and max_queue at least 0")
+        self._owns_generator = generator is None
+        self.generator = generator or ContractGenerator(metrics=InProcessMetrics())
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.max_batch = max_batch
+        self.jobs = jobs
+        self._worker_slots = asyncio.Semaphore(workers)
+        # Generations admitted (running or waiting) and currently running
+        self._pending = 0
+        self._running = 0
+        self._routes = {
+            ("POST", "/generate"): self._generate,
+            ("POST", "/generate/batch"): self._generate_batch,
+            ("POST", "/revise"): self._revise,
+            ("GET", "/generate/stream"): self._generate_stream,
+            ("POST", "/generate/stream"): self._generate_stream,
+            ("GET", "/metrics"): self._metrics,
+            ("GET", "/healthz"): self._healthz
+        }
+        if jobs is not None:
+            self._routes.update({
+                ("POST", "/jobs"): self._submit_job,
+                ("GET", "/jobs/{id}"): self._job_status,
+                ("GET", "/jobs/{id}/result"): self._job_result
+            })
+
+    async def start(self) -> "ContractService":
+        if self.jobs is not None:
+            await self.jobs.start()
+        return await super().start()
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        if self.jobs is not None:
+            await self.jobs.aclose()
+        if self._owns_generator:
+            await self.generator.aclose()
+
+    # Admission control
+
+    def _admit(self, units: int) -> bool:
+        """Reserve room for `units` generations, or refuse if the queue is full."""
+        # A batch bigger than the whole queue is still taken when the service is idle
+        if self._pending and self._pending + units > self.workers + self.max_queue:
+            return False
+        self._pending += units
+        return True
+
+    async def _run(self, coroutine_fn, *args) -> Any:
+        """Run one admitted generation on a worker slot."""
+        try:
+            async with self._worker_slots:
+                self._running += 1
+                try:
+                    return await coroutine_fn(*args)
+                finally:
+                    self._running -= 1
+        finally:
+            self._pending -= 1
+
+    async def _reject(self, response: Response) -> None:
+        self.generator.metrics.increment("service_rejected")
+        await response.send_json(
+            503,
+            {"error": {"code": 503, "message": "Server is busy, retry later"}},
+            {"Retry-After": f"{self.retry_after:g}"}
+        )
+
+    @staticmethod
+    async def _error(response: Response, status: int, message: str) -> None:
+        await response.send_json(status, {"error": {"code": status, "message": message}})
+
+    @staticmethod
+    async def _circuit_open(response: Response, error: CircuitOpenError) -> None:
+        await response.send_json(
+            503,
+            {"error": {"code": 503, "message": str(error)}},
+            {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+        )
+
+    # Request parsing
+
+    @staticmethod
+    def _job_from_body(body: Any) -> Tuple[str, Dict[str, Any], bool]:
+        if not isinstance(body, dict) or "contract_type" not in body or "form_data" not in body:
+            raise HTTPError(400, "Expected a JSON object with contract_type and form_data")
+        return body["contract_type"], body["form_data"], bool(body.get("use_cache", True))
+
+    @staticmethod
+    def _timeout(body: Any) -> Optional[float]:
+        timeout = body.get("timeout") if isinstance(body, dict) else None
+        if timeout is None:
+            return None
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise HTTPError(400, "timeout must be a positive number of seconds")
+        return float(timeout)
+
+    @staticmethod
+    def _query_timeout(query: Dict[str, str]) -> Optional[float]:
+        if "timeout" not in query:
+            return None
+        try:
+            timeout = float(query["timeout"])
+        except ValueError:
+            timeout = 0.0
+        if not math.isfinite(timeout) or timeout <= 0:
+            raise HTTPError(400, "timeout must be a positive number of seconds")
+        return timeout
+
+    @staticmethod
+    def _job_from_query(query: Dict[str, str]) -> Tuple[str, Dict[str, Any], bool]:
+        query = dict(query)
+        contract_type = query.pop("contract_type", None)
+        if not contract_type:
+            raise HTTPError(400, "Missing contract_type query parameter")
+        use_cache = query.pop("use_cache", "true").lower() not in ("0", "false", "no")
+        query.pop("timeout", None)
+        if "form_data" in query:
+            try:
+                form_data = json.loads(query["form_data"])
+            except ValueError:
+                raise HTTPError(400, "form_data is not valid JSON")
+        else:
+            form_data = query
+        return contract_type, form_data, use_cache
+
+    # Routing
+
+    @staticmethod
+    def _route_path(path: str) -> str:
+        """Route template of a request path, e.g. /jobs/{id}/result for /jobs/ab12/result."""
+        parts = (path.rstrip("/") or "/").split("/")
+        if len(parts) in (3, 4) and parts[1] == "jobs" and parts[2]:
+            parts[2] = "{id}"
+        return "/".join(parts)
+
+    async def handle(self, request: Request, response: Response) -> None:
+        route_path = self._route_path(request.path)
+        route = self._routes.get((request.method, route_path))
+        started = time.perf_counter()
+        try:
+            if route is None:
+                if any(path == route_path for _, path in self._routes):
+                    await self._error(response, 405, f"Method {request.method} not allowed")
+                else:
+                    await self._error(response, 404, f"No route for {request.path}")
+                return
+            await route(request, response)
+        finally:
+            path = route_path if route is not None else "unmatched"
+            self.generator.metrics.observe("service_request", time.perf_counter() - started, route=path)
+            self.generator.metrics.increment("service_requests", route=path, status=response.status)
+
+    # Endpoints
+
+    async def _generate(self, request: Request, response: Response) -> None:
+        body = request.json()
+        contract_type, form_data, use_cache = self._job_from_body(body)
+        timeout = self._timeout(body)
+        try:
+            self.generator.validate_form_data(contract_type, form_data)
+        except (ValueError, TypeError) as e:
+            await self._error(response, 400, str(e))
+            return
+        if not self._admit(1):
+            await self._reject(response)
+            return
+        try:
+            result = await self._run(self.generator.generate_contract, contract_type, form_data, use_cache, timeout)
+        except DeadlineExceeded as e:
+            await self._error(response, 504, str(e))
+            return
+        except CircuitOpenError as e:
+            await self._circuit_open(response, e)
+            return
+        except Exception as e:
+            await self._error(response, 502, str(e))
+            return
+        await response.send_json(200, result)
+
+    async def _revise(self, request: Request, response: Response) -> None:
+        body = request.json()
+        previous = body.get("previous") if isinstance(body, dict) else None
+        if (not isinstance(previous, dict) or not isinstance(previous.get("contract"), str)
+                or not isinstance(previous.get("metadata"), dict) or "contract_type" not in previous["metadata"]
+                or "form_data" not in body):
+            raise HTTPError(400, "Expected a JSON object with previous (a generated result) and form_data")
+        timeout = self._timeout(body)
+        if not self._admit(1):
+            await self._reject(response)
+            return
+        try:
+            result = await self._run(
+                self.generator.revise_contract, previous, body["form_data"], body.get("previous_form_data"),
+                bool(body.get("use_cache", True)), timeout
+            )
+        except (ValueError, TypeError) as e:
+            await self._error(response, 400, str(e))
+            return
+        except DeadlineExceeded as e:
+            await self._error(response, 504, str(e))
+            return
+        except CircuitOpenError as e:
+            await self._circuit_open(response, e)
+            return
+        except Exception as e:
+            await self._error(response, 502, str(e))
+            return
+        await response.send_json(200, result)
+
+    async def _generate_batch(self, request: Request, response: Response) -> None:
+        body = request.json()
+        jobs = body.get("jobs") if isinstance(body, dict) else None
+        if not isinstance(jobs, list):
+            raise HTTPError(400, "Expected a JSON object with a jobs list")
+        if len(jobs) > self.max_batch:
+            await self._error(response, 413, f"At most {self.max_batch} jobs per batch")
+            return
+        use_cache = bool(body.get("use_cache", True))
+        timeout = self._timeout(body)
+
+        # Invalid jobs are reported per item and do not take a worker
+        validations = self.generator.validate_many(jobs)
+        valid = [check["index"] for check in validations if check["valid"]]
+        if not self._admit(len(valid)):
+            await self._reject(response)
+            return
+
+        async def run_job(index: int) -> Dict[str, Any]:
+            started = time.perf_counter()
+            contract_type, form_data = self.generator._unpack_job(jobs[index])
+            try:
+                result = await self._run(self.generator.generate_contract, contract_type, form_data, use_cache, timeout)
+                return {"index": index, "success": True, "result": result, "error": None,
+                        "elapsed": time.perf_counter() - started}
+            except Exception as e:
+                return {"index": index, "success": False, "result": None, "error": str(e),
+                        "elapsed": time.perf_counter() - started}
+
+        started = time.perf_counter()
+        results = [
+            {"index": check["index"], "success": False, "result": None, "error": check["error"], "elapsed": 0.0}
+            for check in validations
+        ]
+        for outcome in await asyncio.gather(*(run_job(index) for index in valid)):
+            results[outcome["index"]] = outcome
+        succeeded = sum(1 for outcome in results if outcome["success"])
+        await response.send_json(200, {
+            "results": results,
+            "summary": {
+                "total": len(results),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "elapsed": time.perf_counter() - started
+            }
+        })
+
+    async def _generate_stream(self, request: Request, response: Response) -> None:
+        if request.method == "GET":
+            contract_type, form_data, use_cache = self._job_from_query(request.query)
+            timeout = self._query_timeout(request.query)
+        else:
+            body = request.json()
+            contract_type, form_data, use_cache = self._job_from_body(body)
+            timeout = self._timeout(body)
+        try:
+            self.generator.validate_form_data(contract_type, form_data)
+        except (ValueError, TypeError) as e:
+            await self._error(response, 400, str(e))
+            return
+        if not self._admit(1):
+            await self._reject(response)
+            return
+
+        async def stream() -> None:
+            await response.start_stream(200, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+            try:
+                async with aclosing(self.generator.stream_contract(contract_type, form_data, use_cache, timeout=timeout)) as events:
+                    async for event in events:
+                        payload = {key: value for key, value in event.items() if key != "type"}
+                        await response.write_chunk(_sse(event["type"], payload))
+            except ConnectionError:
+                raise
+            except Exception as e:
+                # Headers are already sent, so the failure is reported as an event
+                await response.write_chunk(_sse("error", {"message": str(e)}))
+            await response.end_stream()
+
+        await self._run(stream)
+
+    async def _submit_job(self, request: Request, response: Response) -> None:
+        body = request.json()
+        contract_type, form_data, use_cache = self._job_from_body(body)
+        timeout = self._timeout(body)
+        try:
+            job_id = await self.jobs.submit(contract_type, form_data, use_cache, timeout)
+        except (ValueError, TypeError) as e:
+            await self._error(response, 400, str(e))
+            return
+        except asyncio.QueueFull:
+            await self._reject(response)
+            return
+        await response.send_json(202, {"id": job_id, "status": "queued"}, {"Location": f"/jobs/{job_id}"})
+
+    async def _job_status(self, request: Request, response: Response) -> None:
+        job_id = request.path.rstrip("/").split("/")[2]
+        status = await self.jobs.status(job_id)
+        if status is None:
+            await self._error(response, 404, f"No job {job_id}")
+            return
+        await response.send_json(200, status)
+
+    async def _job_result(self, request: Request, response: Response) -> None:
+        job_id = request.path.rstrip("/").split("/")[2]
+        result = await self.jobs.result(job_id)
+        if result is not None:
+            await response.send_json(200, result)
+            return
+        status = await self.jobs.status(job_id)
+        # A done job without a result was purged between the two reads
+        if status is None or status["status"] == DONE:
+            await self._error(response, 404, f"No job {job_id}")
+        else:
+            message = f"Job {job_id} is {status['status']}"
+            if status["error"]:
+                message += f": {status['error']}"
+            await self._error(response, 409, message)
+
+    async def _metrics(self, request: Request, response: Response) -> None:
+        if not isinstance(self.generator.metrics, InProcessMetrics):
+            await self._error(response, 404, "Metrics are not collected in process")
+            return
+        exporter = PrometheusExporter(self.generator.metrics)
+        await response.send(200, exporter.render().encode("utf-8"), {"Content-Type": exporter.content_type})
+
+    async def _healthz(self, request: Request, response: Response) -> None:
+        circuits = self.generator.circuit_states()
+        # Any circuit not closed (a model with fallbacks, the backend) only degrades the service.
+        # It is unavailable when every routable model fails fast, so load balancers hold off
+        # until the first of those circuits may close.
+        models = [circuits.get(f"gemini:{model}") for model in self.generator.router.models()]
+        status, headers = 200, None
+        if all(circuit is not None and circuit["state"] == OPEN for circuit in models):
+            retry_after = min(circuit["retry_after"] for circuit in models)
+            status, headers = 503, {"Retry-After": str(max(1, math.ceil(retry_after)))}
+        await response.send_json(status, {
+            "status": "unavailable" if status == 503 else "ok" if all(
+                circuit["state"] == CLOSED for circuit in circuits.values()
+            ) else "degraded",
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queued": self._pending - self._running,
+            "concurrency": self.generator.concurrency.stats(),
+            "cache": self.generator.cache.stats(),
+            "circuits": circuits,
+            "jobs": await self.jobs.stats() if self.jobs is not None else None
+        }, headers)
+
+
+def _sse(event: str, payload: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve contract generation over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=16, help="Generations running at once")
+    parser.add_argument("--max-queue", type=int, default=64, help="Generations waiting before 503s are returned")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 503")
+    parser.add_argument("--max-batch", type=int, default=100, help="Maximum jobs per batch request")
+    parser.add_argument("--verify", choices=["report", "repair"], help="Check contracts for the form values verbatim")
+    parser.add_argument("--job-store", default="contract_jobs.sqlite3", help="SQLite file of the /jobs API")
+    parser.add_argument("--job-workers", type=int, default=4, help="Jobs running at once (0 disables /jobs)")
+    parser.add_argument("--max-queued-jobs", type=int, default=1000, help="Jobs waiting before POST /jobs returns 503")
+    parser.add_argument("--job-retention", type=float, default=7 * 24 * 3600,
+                        help="Seconds finished jobs are kept before they are purged")
+    return parser.parse_args()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    generator = ContractGenerator(metrics=InProcessMetrics(), verify=args.verify)
+    store = JobStore(args.job_store) if args.job_workers > 0 else None
+    service = ContractService(
+        generator,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        retry_after=args.retry_after,
+        max_batch=args.max_batch,
+        jobs=JobQueue(
+            generator,
+            store,
+            workers=args.job_workers,
+            max_queued=args.max_queued_jobs,
+            retention=args.job_retention
+        ) if store is not None else None
+    )
+    try:
+        async with service:
+            print(f"Contract service listening on {service.base_url}")
+            await asyncio.Event().wait()
+    finally:
+        if store is not None:
+            await store.aclose()
+        await generator.aclose()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Any, Awaitable, Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a call runs out of time.
+
+    Covers both the overall deadline of a call and a connect/read timeout that
+    persisted through retries. It subclasses TimeoutError so callers can
+    tell it apart from other failures and shed load instead of retrying.
+    """
+
+
+class Deadline:
+    """
+    Point in time by which a call (including its retries) must finish.
+
+    Args:
+        timeout: Seconds from now, or None for no deadline
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive")
+        self.timeout = timeout
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the deadline passed before `stage`."""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {self.timeout:g}s exceeded before {stage}")
+
+    def cap(self, seconds: Optional[float]) -> Optional[float]:
+        """The smaller of `seconds` and the time left (None means unbounded)."""
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        if seconds is None:
+            return remaining
+        return min(seconds, remaining)
+
+    def earliest(self, other: Optional["Deadline"]) -> "Deadline":
+        if other is None or other.expires_at is None:
+            return self
+        if self.expires_at is None or other.expires_at < self.expires_at:
+            return other
+        return self
+
+
+# Deadline of the call running in the current task; asyncio tasks inherit it
+# from the code that created them, so it also bounds hedged calls. Work shared
+# by several callers runs in a context from detached_context() instead
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def detached_context() -> Context:
+    """Copy of the current context without a deadline, for tasks whose result several callers share."""
+    context = copy_context()
+    context.run(_current.set, None)
+    return context
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[Deadline]:
+    """Make `deadline` (or an earlier enclosing one) the current deadline for the block."""
+    active = deadline.earliest(_current.get())
+    token = _current.set(active)
+    try:
+        yield active
+    finally:
+        _current.reset(token)
+
+
+async def run_with_deadline(awaitable: Awaitable[Any], deadline: Deadline, what: str) -> Any:
+    """
+    Await `awaitable` under `deadline`.
+
+    When time runs out the awaitable is cancelled, which closes any
+    connection it holds, and DeadlineExceeded is raised.
+    """
+    with deadline_scope(deadline) as active:
+        try:
+            return await asyncio.wait_for(awaitable, active.remaining())
+        except DeadlineExceeded:
+            raise
+        except asyncio.TimeoutError:
+            if not active.expired():
+                raise
+            raise DeadlineExceeded(f"{what} timed out after {active.timeout:g}s")
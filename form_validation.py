@@ -0,0 +1,119 @@
+import threading
+from typing import Dict, Any, Optional, Type, Annotated, TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+from template_registry import CompiledTemplate
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel, ValidationError
+
+DEFAULT_MAX_FIELD_LENGTH = 500
+DEFAULT_FIELD_LIMITS = {"additional_terms": 4000}
+
+
+def _number_to_str(value: Any) -> Any:
+    # Accept numbers for amounts/terms (e.g. from JSON input) but not bools, lists, etc.
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+class FormValidation:
+    """
+    Compiled per-contract-type validators for form data.
+
+    A pydantic model is built once per template and cached. Validation strips
+    surrounding whitespace, rejects non-string values and unknown keys, requires
+    non-empty required fields and enforces per-field length caps, all before
+    any network I/O. pydantic itself is imported when the first model is built.
+
+    Args:
+        max_field_length: Default maximum length of a field value
+        field_limits: Per-field overrides of the maximum length
+    """
+
+    def __init__(self, max_field_length: int = DEFAULT_MAX_FIELD_LENGTH, field_limits: Optional[Dict[str, int]] = None):
+        self.max_field_length = max_field_length
+        self.field_limits = dict(DEFAULT_FIELD_LIMITS if field_limits is None else field_limits)
+        self._models: "WeakKeyDictionary[CompiledTemplate, Type[BaseModel]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def max_length(self, field: str) -> int:
+        return self.field_limits.get(field, self.max_field_length)
+
+    def _compile(self, template: CompiledTemplate) -> Type["BaseModel"]:
+        from pydantic import BeforeValidator, ConfigDict, Field, create_model
+        
+        fields: Dict[str, Any] = {}
+        for field in template.fields:
+            optional = field in template.optional_fields
+            value_type = Annotated[
+                str,
+                BeforeValidator(_number_to_str),
+                Field(strict=True, min_length=0 if optional else 1, max_length=self.max_length(field))
+            ]
+            fields[field] = (value_type, "" if optional else ...)
+        return create_model(
+            f"{template.name}_form",
+            __config__=ConfigDict(extra="forbid", str_strip_whitespace=True),
+            **fields
+        )
+
+    def model_for(self, template: CompiledTemplate) -> Type["BaseModel"]:
+        model = self._models.get(template)
+        if model is None:
+            with self._lock:
+                model = self._models.get(template)
+                if model is None:
+                    model = self._compile(template)
+                    self._models[template] = model
+        return model
+
+    def validate(self, template: CompiledTemplate, form_data: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Validate and normalize form data for a template.
+
+        Returns:
+            The normalized form data, with optional fields filled in
+
+        Raises:
+            ValueError: If fields are missing, unknown, of the wrong type or too long
+        """
+        if not isinstance(form_data, dict):
+            raise ValueError("Form data must be a dictionary")
+        model = self.model_for(template)
+        from pydantic import ValidationError
+        
+        try:
+            return model.model_validate(form_data).model_dump()
+        except ValidationError as e:
+            raise ValueError(_describe_errors(e)) from None
+
+
+def _describe_errors(error: "ValidationError") -> str:
+    missing = [str(err["loc"][0]) for err in error.errors() if err["type"] == "missing"]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    problems = []
+    for err in error.errors():
+        field = str(err["loc"][0]) if err["loc"] else "form_data"
+        if err["type"] == "extra_forbidden":
+            problems.append(f"{field}: unknown field")
+        elif err["type"] in ("too_short", "string_too_short"):
+            problems.append(f"{field}: must not be empty")
+        elif err["type"] in ("too_long", "string_too_long"):
+            problems.append(f"{field}: longer than {err['ctx']['max_length']} characters")
+        else:
+            problems.append(f"{field}: {err['msg']}")
+    return f"Invalid form data: {'; '.join(problems)}"
+
+
+_default_validation: Optional[FormValidation] = None
+
+
+def get_default_validation() -> FormValidation:
+    """Process-wide validators with the default limits."""
+    global _default_validation
+    if _default_validation is None:
+        _default_validation = FormValidation()
+    return _default_validation
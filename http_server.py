@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Any, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    207: "Multi-Status",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    409: "Conflict",
+    413: "Payload Too Large",
+    414: "URI Too Long",
+    415: "Unsupported Media Type",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout"
+}
+
+
+class HTTPError(Exception):
+    """Raised while reading a request that cannot be served; answered with `status`."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    """Parsed HTTP request."""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON")
+
+
+class Response:
+    """Writes one response to the connection, either whole or as a chunked stream."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.status: Optional[int] = None
+
+    def _head(self, status: int, headers: Dict[str, str]) -> bytes:
+        self.status = status
+        head = f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        return (head + "\r\n").encode("latin-1")
+
+    async def send(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        all_headers = {"Content-Length": str(len(body))}
+        all_headers.update(headers or {})
+        self.writer.write(self._head(status, all_headers) + body)
+        await self.writer.drain()
+
+    async def send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        all_headers = {"Content-Type": "application/json"}
+        all_headers.update(headers or {})
+        await self.send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), all_headers)
+
+    async def start_stream(self, status: int, headers: Optional[Dict[str, str]] = None) -> None:
+        all_headers = {"Transfer-Encoding": "chunked"}
+        all_headers.update(headers or {})
+        self.writer.write(self._head(status, all_headers))
+        await self.writer.drain()
+
+    async def write_chunk(self, data: bytes) -> None:
+        if data:
+            self.writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+            await self.writer.drain()
+
+    async def end_stream(self) -> None:
+        self.writer.write(b"0\r\n\r\n")
+        await self.writer.drain()
+
+
+class HTTPServer:
+    """
+    Minimal asyncio HTTP/1.1 server with keep-alive and chunked responses.
+
+    Subclasses implement `handle(request, response)`.
+
+    Slow or oversized requests are cut off: a connection that sends no request
+    line within `keepalive_timeout` is closed, headers that take longer than
+    `header_timeout` or a body slower than `body_timeout` get 408, and more than
+    `max_headers` header lines or `max_header_bytes` of them get 431.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        max_body_bytes: Largest request body accepted
+        max_headers: Most header lines accepted in one request
+        max_header_bytes: Largest request line plus headers accepted
+        keepalive_timeout: Seconds an idle connection may wait before its next request line
+        header_timeout: Seconds allowed for the headers once the request line has arrived
+        body_timeout: Seconds allowed for the request body
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_body_bytes: int = 10 * 1024 * 1024,
+        max_headers: int = 100,
+        max_header_bytes: int = 16 * 1024,
+        keepalive_timeout: float = 60.0,
+        header_timeout: float = 10.0,
+        body_timeout: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self.max_headers = max_headers
+        self.max_header_bytes = max_header_bytes
+        self.keepalive_timeout = keepalive_timeout
+        self.header_timeout = header_timeout
+        self.body_timeout = body_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "HTTPServer":
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "HTTPServer":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def handle(self, request: Request, response: Response) -> None:
+        raise NotImplementedError
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await Response(writer).send_json(e.status, {"error": {"code": e.status, "message": str(e)}})
+                    break
+                if request is None:
+                    break
+                response = Response(writer)
+                try:
+                    await self.handle(request, response)
+                except (ConnectionError, asyncio.CancelledError):
+                    raise
+                except HTTPError as e:
+                    if response.status is None:
+                        await response.send_json(e.status, {"error": {"code": e.status, "message": str(e)}})
+                    else:
+                        break
+                except Exception as e:
+                    logger.exception("Unhandled error serving %s %s", request.method, request.path)
+                    if response.status is None:
+                        await response.send_json(500, {"error": {"code": 500, "message": str(e)}})
+                    break
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutting down mid-request (e.g. the client gave up on a slow call)
+            pass
+        finally:
+            # Not awaiting wait_closed() so shutdown never waits on idle keep-alive peers
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+        except asyncio.TimeoutError:
+            # Idle keep-alive connection: close it without a response
+            return None
+        except ValueError:
+            raise HTTPError(414, "Request line too long")
+        if not request_line:
+            return None
+        if len(request_line) > self.max_header_bytes:
+            raise HTTPError(414, "Request line too long")
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        try:
+            headers = await asyncio.wait_for(self._read_headers(reader, len(request_line)), self.header_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Timed out reading the request headers")
+        try:
+            body = await asyncio.wait_for(self._read_body(reader, headers), self.body_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "Timed out reading the request body")
+        return Request(method, target, headers, body)
+
+    async def _read_headers(self, reader: asyncio.StreamReader, size: int) -> Dict[str, str]:
+        headers = {}
+        count = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # Longer than the stream buffer limit
+                raise HTTPError(431, "Request headers too large")
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            count += 1
+            size += len(line)
+            if count > self.max_headers:
+                raise HTTPError(431, f"More than {self.max_headers} request headers")
+            if size > self.max_header_bytes:
+                raise HTTPError(431, "Request headers too large")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        body = b""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            size = 0
+            while True:
+                try:
+                    chunk_size = int((await reader.readline()).split(b";", 1)[0].strip() or b"0", 16)
+                except ValueError:
+                    raise HTTPError(400, "Malformed chunked body")
+                if chunk_size == 0:
+                    await reader.readline()
+                    break
+                size += chunk_size
+                if size > self.max_body_bytes:
+                    raise HTTPError(413, "Request body too large")
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            try:
+                length = int(headers["content-length"])
+            except ValueError:
+                raise HTTPError(400, "Malformed Content-Length")
+            if length > self.max_body_bytes:
+                raise HTTPError(413, "Request body too large")
+            body = await reader.readexactly(length)
+        return body
@@ -0,0 +1,395 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_STATUS_COLUMNS = (
+    "id, contract_type, use_cache, timeout, status, attempts, error, created_at, started_at, finished_at"
+)
+
+
+class JobStore:
+    """
+    Durable store of generation jobs and their results.
+
+    Every job is written to a SQLite file when it is submitted and updated as it
+    moves from queued to running to done or failed, so jobs survive process
+    restarts and finished results can be read any number of times. Database
+    access runs in a worker thread. One process should use a store at a time.
+
+    Args:
+        path: Location of the SQLite database file
+    """
+
+    def __init__(self, path: str = "contract_jobs.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, "
+            "contract_type TEXT NOT NULL, "
+            "form_data TEXT NOT NULL, "
+            "use_cache INTEGER NOT NULL, "
+            "timeout REAL, "
+            "status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "result TEXT, "
+            "error TEXT, "
+            "created_at REAL NOT NULL, "
+            "started_at REAL, "
+            "finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _status_row(row: tuple) -> Dict[str, Any]:
+        job_id, contract_type, use_cache, timeout, status, attempts, error, created_at, started_at, finished_at = row
+        return {
+            "id": job_id,
+            "contract_type": contract_type,
+            "use_cache": bool(use_cache),
+            "timeout": timeout,
+            "status": status,
+            "attempts": attempts,
+            "error": error,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at
+        }
+
+    def _add_sync(
+        self,
+        contract_type: str,
+        form_data: Dict[str, Any],
+        use_cache: bool,
+        timeout: Optional[float]
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, contract_type, form_data, use_cache, timeout, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, contract_type, json.dumps(form_data, ensure_ascii=False), int(use_cache), timeout,
+                 QUEUED, time.time())
+            )
+            self._conn.commit()
+        return job_id
+
+    def _status_sync(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_STATUS_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._status_row(row) if row else None
+
+    def _result_sync(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _queued_sync(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _requeue_interrupted_sync(self, max_attempts: Optional[int]) -> int:
+        now = time.time()
+        with self._lock:
+            # A job that keeps taking the process down is failed instead of retried forever
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = 'Interrupted by a restart too many times', finished_at = ? "
+                "WHERE status = ? AND ? IS NOT NULL AND attempts >= ?",
+                (FAILED, now, RUNNING, max_attempts, max_attempts)
+            )
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _claim_sync(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), job_id, QUEUED)
+            )
+            self._conn.commit()
+            if cursor.rowcount == 0:
+                return None
+            row = self._conn.execute(
+                "SELECT contract_type, form_data, use_cache, timeout, created_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        contract_type, form_data, use_cache, timeout, created_at = row
+        return {
+            "id": job_id,
+            "contract_type": contract_type,
+            "form_data": json.loads(form_data),
+            "use_cache": bool(use_cache),
+            "timeout": timeout,
+            "created_at": created_at
+        }
+
+    def _finish_sync(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (DONE if error is None else FAILED,
+                 json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def _counts_sync(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def _purge_sync(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - older_than)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    async def add(
+        self,
+        contract_type: str,
+        form_data: Dict[str, Any],
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Persist a queued job and return its id."""
+        return await asyncio.to_thread(self._add_sync, contract_type, form_data, use_cache, timeout)
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status, attempts, error and timestamps of a job, or None if it is unknown."""
+        return await asyncio.to_thread(self._status_sync, job_id)
+
+    async def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Generated contract of a finished job, or None if the job is not done."""
+        return await asyncio.to_thread(self._result_sync, job_id)
+
+    async def queued(self) -> List[str]:
+        """Ids of queued jobs, oldest first."""
+        return await asyncio.to_thread(self._queued_sync)
+
+    async def requeue_interrupted(self, max_attempts: Optional[int] = None) -> int:
+        """
+        Queue again the jobs left running by a previous process; returns how many were requeued.
+
+        Jobs already started `max_attempts` times are marked failed instead.
+        """
+        return await asyncio.to_thread(self._requeue_interrupted_sync, max_attempts)
+
+    async def claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Mark a queued job as running and return its inputs, or None if it is no longer queued."""
+        return await asyncio.to_thread(self._claim_sync, job_id)
+
+    async def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Store the result of a job (done) or its error (failed)."""
+        await asyncio.to_thread(self._finish_sync, job_id, result, error)
+
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        return await asyncio.to_thread(self._counts_sync)
+
+    async def purge(self, older_than: float) -> int:
+        """Delete jobs that finished more than `older_than` seconds ago; returns how many were deleted."""
+        return await asyncio.to_thread(self._purge_sync, older_than)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    Submit/poll/fetch job API over ContractGenerator.generate_contract.
+
+    `submit` validates the form data, stores the job and returns its id without
+    waiting for the generation. Worker tasks run queued jobs oldest first and
+    store each result, so callers poll `status` and read `result` as often as
+    they like without regenerating. On `start`, jobs queued by an earlier run are
+    picked up again and jobs it left running are requeued.
+
+    Finished jobs are purged from the store once they are `retention` seconds
+    old, checked every `purge_interval` seconds while the queue runs.
+
+    Args:
+        generator: ContractGenerator used to run the jobs
+        store: Durable job store, defaults to JobStore() in the working directory
+        workers: Number of concurrent worker tasks
+        max_attempts: Starts of a job interrupted by restarts before it is failed, or None to retry forever
+        max_queued: Jobs waiting for a worker before `submit` refuses more, or None for no limit
+        retention: Seconds a done or failed job is kept, or None to keep every job
+        purge_interval: Seconds between purges of expired jobs
+    """
+
+    def __init__(
+        self,
+        generator: Any,
+        store: Optional[JobStore] = None,
+        workers: int = 4,
+        max_attempts: Optional[int] = 3,
+        max_queued: Optional[int] = 1000,
+        retention: Optional[float] = 7 * 24 * 3600,
+        purge_interval: float = 600.0
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if max_queued is not None and max_queued < 1:
+            raise ValueError("max_queued must be at least 1")
+        self.generator = generator
+        self.store = store if store is not None else JobStore()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.max_queued = max_queued
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+
+    async def start(self) -> "JobQueue":
+        """Requeue jobs from an earlier run and start the workers."""
+        if not self._tasks:
+            await self.store.requeue_interrupted(self.max_attempts)
+            for job_id in await self.store.queued():
+                self._queue.put_nowait(job_id)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            if self.retention is not None:
+                self._tasks.append(asyncio.create_task(self._purger()))
+        return self
+
+    async def __aenter__(self) -> "JobQueue":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def submit(
+        self,
+        contract_type: str,
+        form_data: Dict[str, Any],
+        use_cache: bool = True,
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        Queue a contract generation.
+
+        Args:
+            contract_type: Type of contract to generate
+            form_data: Dictionary containing the form data
+            use_cache: Serve identical requests from the response cache
+            timeout: Deadline in seconds for the generation once it starts (default: timeouts.total)
+
+        Returns:
+            Id of the job
+
+        Raises:
+            ValueError: If the contract type is unknown or required fields are missing
+            TypeError: If a form field has an unsupported type
+            asyncio.QueueFull: If `max_queued` jobs are already waiting
+        """
+        self.generator.validate_form_data(contract_type, form_data)
+        if self.max_queued is not None and self._queue.qsize() >= self.max_queued:
+            self.generator.metrics.increment("jobs", contract_type=contract_type, outcome="rejected")
+            raise asyncio.QueueFull(f"{self.max_queued} jobs are already queued")
+        job_id = await self.store.add(contract_type, form_data, use_cache, timeout)
+        self._queue.put_nowait(job_id)
+        self.generator.metrics.increment("jobs", contract_type=contract_type, outcome="submitted")
+        return job_id
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job (queued, running, done or failed), or None if it is unknown."""
+        return await self.store.status(job_id)
+
+    async def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Generated contract and metadata of a done job, or None if it is not done."""
+        return await self.store.result(job_id)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        self.generator.metrics.observe("job_queue_wait", time.time() - job["created_at"])
+        try:
+            result = await self.generator.generate_contract(
+                job["contract_type"], job["form_data"], job["use_cache"], job["timeout"]
+            )
+        except Exception as e:
+            await self.store.finish(job["id"], error=str(e))
+            self.generator.metrics.increment("jobs", contract_type=job["contract_type"], outcome=FAILED)
+            return
+        await self.store.finish(job["id"], result=result)
+        self.generator.metrics.increment("jobs", contract_type=job["contract_type"], outcome=DONE)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                # None when another worker already took a job that was queued twice
+                job = await self.store.claim(job_id)
+                if job is not None:
+                    self._running += 1
+                    try:
+                        await self._run(job)
+                    finally:
+                        self._running -= 1
+            finally:
+                self._queue.task_done()
+
+    async def _purger(self) -> None:
+        while True:
+            try:
+                purged = await self.store.purge(self.retention)
+            except Exception:
+                logger.exception("Purging finished jobs failed")
+            else:
+                if purged:
+                    self.generator.metrics.increment("jobs_purged", purged)
+            await asyncio.sleep(self.purge_interval)
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished."""
+        await self._queue.join()
+
+    async def aclose(self) -> None:
+        """
+        Stop the workers.
+
+        Jobs still queued stay in the store, and jobs cut off while running are
+        requeued, the next time a queue is started on the store.
+        """
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = await self.store.counts()
+        return {
+            "queued": counts[QUEUED],
+            "running": self._running,
+            "done": counts[DONE],
+            "failed": counts[FAILED],
+            "workers": self.workers
+        }
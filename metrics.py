@@ -0,0 +1,196 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsHook:
+    """
+    Interface for receiving ContractGenerator metrics and traces.
+
+    `observe` is called with the duration of each stage of a call (validate,
+    render, cache_lookup, connect, ttfb, download, parse, backend_submit,
+    generate, ...) and `increment` for counters (generations, http_responses,
+    retries, cache, tokens, errors). Subclass to forward them to another
+    metrics or tracing system. The base class discards everything.
+    """
+
+    def observe(self, stage: str, seconds: float, **labels: Any) -> None:
+        pass
+
+    def increment(self, counter: str, amount: float = 1, **labels: Any) -> None:
+        pass
+
+    @contextmanager
+    def timer(self, stage: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block and report it as `stage`.
+
+        The yielded dict can be updated inside the block to add labels known
+        only at the end (e.g. the status code).
+        """
+        extra: Dict[str, Any] = {}
+        started = time.perf_counter()
+        try:
+            yield extra
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels, **extra)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return self.buckets[-1]
+
+
+class InProcessMetrics(MetricsHook):
+    """
+    MetricsHook that aggregates histograms and counters in memory.
+
+    Args:
+        buckets: Upper bounds (seconds) of the latency histogram buckets
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, **labels: Any) -> None:
+        key = (stage, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, counter: str, amount: float = 1, **labels: Any) -> None:
+        key = (counter, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def collect(self) -> Tuple[List[Tuple[Tuple[str, LabelKey], Histogram]], List[Tuple[Tuple[str, LabelKey], float]]]:
+        """Consistent copy of the histograms and counters, sorted by name and labels."""
+        with self._lock:
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            counters = sorted(self.counters.items(), key=lambda item: item[0])
+        return histograms, counters
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain-dict view of every stage histogram (count, mean, p50/p95/p99) and counter."""
+        with self._lock:
+            stages = [
+                {
+                    "stage": stage,
+                    "labels": dict(labels),
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count if histogram.count else None,
+                    "p50": histogram.quantile(0.50),
+                    "p95": histogram.quantile(0.95),
+                    "p99": histogram.quantile(0.99)
+                }
+                for (stage, labels), histogram in self.histograms.items()
+            ]
+            counters = [
+                {"counter": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self.counters.items()
+            ]
+        return {"stages": stages, "counters": counters}
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class PrometheusExporter:
+    """
+    Renders an InProcessMetrics collector in the Prometheus text exposition format.
+
+    Args:
+        metrics: Collector to export
+        prefix: Prefix for every metric name
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, metrics: InProcessMetrics, prefix: str = "contract_generator"):
+        self.metrics = metrics
+        self.prefix = prefix
+
+    def render(self) -> str:
+        histograms, counters = self.metrics.collect()
+        lines = []
+
+        if histograms:
+            name = f"{self.prefix}_stage_seconds"
+            lines.append(f"# HELP {name} Latency of ContractGenerator call stages.")
+            lines.append(f"# TYPE {name} histogram")
+            for (stage, labels), histogram in histograms:
+                base = [("stage", stage)] + list(labels)
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(base + [('le', repr(bound))])} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(base + [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(base)} {_format_value(histogram.sum)}")
+                lines.append(f"{name}_count{_format_labels(base)} {histogram.count}")
+
+        current = None
+        for (counter, labels), value in counters:
+            name = f"{self.prefix}_{counter}_total"
+            if counter != current:
+                lines.append(f"# TYPE {name} counter")
+                current = counter
+            lines.append(f"{name}{_format_labels(list(labels))} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
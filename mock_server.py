@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import random
+import re
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from uuid import uuid4
+
+from http_server import HTTPServer, Request, Response
+
+_MODEL_PATH = re.compile(r"^/v1(?:beta)?/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$")
+
+_FILLER = (
+    "The parties agree that this clause shall be interpreted in accordance with the applicable law "
+    "and that any amendment must be made in writing and signed by both parties. "
+)
+
+
+class MockServerConfig:
+    """
+    Behaviour of the mock endpoints.
+
+    Model latency is drawn from a log-normal distribution with the given median
+    and shape, which reproduces the long tail of real model calls.
+
+    Args:
+        latency_ms: Median model latency in milliseconds
+        latency_sigma: Log-normal shape parameter (0 gives a fixed latency)
+        backend_latency_ms: Fixed latency of backend calls in milliseconds
+        error_rate: Fraction of model calls answered with 500
+        rate_limit_rate: Fraction of model calls answered with 429
+        retry_after: Retry-After seconds sent with injected 429s
+        output_words: Approximate length of generated contracts
+        stream_chunks: Number of SSE events a streamed contract is split into
+        bulk_endpoint: Serve POST .../contracts/bulk (otherwise it answers 404)
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.35,
+        backend_latency_ms: float = 20.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        output_words: int = 1200,
+        stream_chunks: int = 20,
+        bulk_endpoint: bool = True
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.backend_latency_ms = backend_latency_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.output_words = output_words
+        self.stream_chunks = stream_chunks
+        self.bulk_endpoint = bulk_endpoint
+
+    def sample_latency(self) -> float:
+        """Model latency in seconds."""
+        if self.latency_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.latency_ms / 1000.0), self.latency_sigma)
+
+
+class MockServer(HTTPServer):
+    """
+    HTTP server for the mock Gemini and backend endpoints.
+
+    Args:
+        config: Endpoint behaviour
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__(host, port)
+        self.config = config or MockServerConfig()
+        self.stats: Dict[str, int] = {}
+        # Idempotency key -> stored contract id, to answer replays with 409
+        self.contracts: Dict[str, str] = {}
+
+    def model_url(self, model: str = "gemini-1.5-flash", method: str = "generateContent") -> str:
+        return f"{self.base_url}/v1/models/{model}:{method}"
+
+    def _count(self, key: str) -> None:
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    async def handle(self, request: Request, response: Response) -> None:
+        method, path = request.method, request.path
+        if method == "GET" and path == "/stats":
+            await response.send_json(200, self.stats)
+            return
+        if method == "POST" and path.rstrip("/").endswith("/contracts"):
+            await self._handle_backend(response, request.headers, request.body)
+            return
+        if method == "POST" and path.rstrip("/").endswith("/contracts/bulk") and self.config.bulk_endpoint:
+            await self._handle_backend_bulk(response, request.headers, request.body)
+            return
+        match = _MODEL_PATH.match(path)
+        if method == "POST" and match:
+            await self._handle_model(response, match.group("method"), request.body)
+            return
+        self._count("not_found")
+        await response.send_json(404, {"error": {"code": 404, "message": f"No route for {method} {path}"}})
+
+    # Endpoints
+
+    async def _injected_error(self, response: Response) -> bool:
+        """Answer with an injected 429/500 according to the configured rates."""
+        roll = random.random()
+        if roll < self.config.rate_limit_rate:
+            self._count("model_429")
+            await response.send_json(
+                429,
+                {"error": {"code": 429, "message": "Resource has been exhausted (mock)"}},
+                {"Retry-After": f"{self.config.retry_after:g}"}
+            )
+            return True
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self._count("model_500")
+            await response.send_json(500, {"error": {"code": 500, "message": "Internal error (mock)"}})
+            return True
+        return False
+
+    def _contract_text(self, prompt: str) -> str:
+        # Echo the "Field: value" lines so the output contains the provided details
+        details = [line.split(" (use this exact", 1)[0] for line in prompt.splitlines() if ": " in line]
+        words_per_filler = len(_FILLER.split())
+        fillers = max(1, self.config.output_words // words_per_filler)
+        return "MOCK CONTRACT\n\n" + "\n".join(details) + "\n\n" + _FILLER * fillers
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> Dict[str, int]:
+        prompt_tokens = len(prompt) // 4
+        output_tokens = len(text) // 4
+        return {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": prompt_tokens + output_tokens
+        }
+
+    async def _handle_model(self, response: Response, method: str, body: bytes) -> None:
+        try:
+            request = json.loads(body)
+            prompt = "".join(part.get("text", "") for part in request["contents"][0]["parts"])
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._count("model_400")
+            await response.send_json(400, {"error": {"code": 400, "message": "Invalid request body (mock)"}})
+            return
+
+        latency = self.config.sample_latency()
+        if await self._injected_error(response):
+            return
+        text = self._contract_text(prompt)
+
+        if method == "generateContent":
+            await asyncio.sleep(latency)
+            self._count("model_200")
+            await response.send_json(200, {
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}],
+                "usageMetadata": self._usage(prompt, text)
+            })
+            return
+
+        # streamGenerateContent: chunked SSE response spread over the sampled latency
+        self._count("model_stream_200")
+        await response.start_stream(200, {"Content-Type": "text/event-stream"})
+        pieces = self.config.stream_chunks
+        step = max(1, math.ceil(len(text) / pieces))
+        for index, start in enumerate(range(0, len(text), step)):
+            await asyncio.sleep(latency / pieces)
+            event: Dict[str, Any] = {"candidates": [{"content": {"parts": [{"text": text[start:start + step]}], "role": "model"}}]}
+            if start + step >= len(text):
+                event["usageMetadata"] = self._usage(prompt, text)
+            await response.write_chunk(f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8"))
+        await response.end_stream()
+
+    def _store_contract(self, payload: Any, idempotency_key: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        """Validate and store one draft, returning the status code and response body."""
+        if not isinstance(payload, dict) or "contract" not in payload:
+            self._count("backend_400")
+            return 400, {"error": {"code": "bad_request", "message": "Missing contract (mock)"}}
+        if idempotency_key and idempotency_key in self.contracts:
+            self._count("backend_409")
+            return 409, {"error": {"code": "conflict", "message": "Contract already exists (mock)"}}
+        contract_id = f"contract-{uuid4().hex[:12]}"
+        if idempotency_key:
+            self.contracts[idempotency_key] = contract_id
+        self._count("backend_201")
+        return 201, {
+            "id": contract_id,
+            "status": payload.get("status", "draft"),
+            "created_at": datetime.now().isoformat(),
+            "url": f"{self.base_url}/contracts/{contract_id}"
+        }
+
+    async def _handle_backend(self, response: Response, headers: Dict[str, str], body: bytes) -> None:
+        await asyncio.sleep(self.config.backend_latency_ms / 1000.0)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._count("backend_400")
+            await response.send_json(400, {"error": {"code": "bad_request", "message": "Invalid JSON (mock)"}})
+            return
+        status, stored = self._store_contract(payload, headers.get("idempotency-key"))
+        await response.send_json(status, stored)
+
+    async def _handle_backend_bulk(self, response: Response, headers: Dict[str, str], body: bytes) -> None:
+        await asyncio.sleep(self.config.backend_latency_ms / 1000.0)
+        try:
+            if headers.get("content-encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            contracts = json.loads(body)["contracts"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self._count("backend_400")
+            await response.send_json(400, {"error": {"code": "bad_request", "message": "Invalid bulk body (mock)"}})
+            return
+        self._count("backend_bulk")
+        results = []
+        for index, payload in enumerate(contracts):
+            key = payload.get("idempotency_key") if isinstance(payload, dict) else None
+            status, stored = self._store_contract(payload, key)
+            results.append(dict(stored, index=index, status=status) if status == 201 else
+                           {"index": index, "status": status, "error": stored["error"]})
+        await response.send_json(207, {"results": results})
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local Gemini and contract backend stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median model latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.35, help="Log-normal latency shape")
+    parser.add_argument("--backend-latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of model calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of model calls failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--output-words", type=int, default=1200)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--no-bulk", action="store_true", help="Answer 404 on the bulk contracts endpoint")
+    return parser.parse_args()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    config = MockServerConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        backend_latency_ms=args.backend_latency_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        output_words=args.output_words,
+        stream_chunks=args.stream_chunks,
+        bulk_endpoint=not args.no_bulk
+    )
+    async with MockServer(config, args.host, args.port) as server:
+        print(f"Mock Gemini/backend server listening on {server.base_url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
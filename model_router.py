@@ -0,0 +1,104 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import DEFAULT_MODEL
+from metrics import Histogram
+
+
+class ModelRouter:
+    """
+    Chooses the Gemini model for each request, with failover and hedging.
+
+    The primary model is the one configured for the contract type, else the
+    model of the smallest size tier that fits the estimated prompt, else the
+    default. When a call to it still fails after retries with a failover status
+    (or a connection error), the request moves on to the `fallbacks` in order.
+
+    With hedging on, a call that has not answered after the model's observed
+    latency percentile gets a backup call, and the first good response wins.
+
+    Args:
+        default_model: Model used when no other rule matches
+        contract_models: Model per contract type
+        size_tiers: (max_prompt_tokens, model) pairs for contract types without their own model
+        fallbacks: Models tried in order after the primary model fails
+        endpoints: API base URL per model, for models served from another endpoint
+        failover_statuses: Final HTTP status codes that move the request to the next model
+        hedge_percentile: Latency percentile (e.g. 0.95) after which a backup call is sent
+        hedge_after: Hedge delay in seconds used until enough latencies are observed
+        hedge_min_samples: Successful calls per model needed before hedge_percentile is used
+        hedge_model: Model for the backup call (default: the same model)
+    """
+
+    def __init__(
+        self,
+        default_model: str = DEFAULT_MODEL,
+        contract_models: Optional[Dict[str, str]] = None,
+        size_tiers: Optional[Sequence[Tuple[int, str]]] = None,
+        fallbacks: Optional[Iterable[str]] = None,
+        endpoints: Optional[Dict[str, str]] = None,
+        failover_statuses: Iterable[int] = (404, 429, 500, 502, 503, 504),
+        hedge_percentile: Optional[float] = None,
+        hedge_after: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        hedge_model: Optional[str] = None
+    ):
+        if hedge_percentile is not None and not 0 < hedge_percentile < 1:
+            raise ValueError("hedge_percentile must be between 0 and 1")
+        self.default_model = default_model
+        self.contract_models = dict(contract_models or {})
+        self.size_tiers = sorted(size_tiers or [])
+        self.fallbacks = list(fallbacks or [])
+        self.endpoints = {model: url.rstrip("/") for model, url in (endpoints or {}).items()}
+        self.failover_statuses = set(failover_statuses)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_model = hedge_model
+        self._latency: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def primary_model(self, contract_type: str, prompt_tokens: int) -> str:
+        model = self.contract_models.get(contract_type)
+        if model is not None:
+            return model
+        for max_tokens, tier_model in self.size_tiers:
+            if prompt_tokens <= max_tokens:
+                return tier_model
+        return self.default_model
+
+    def route(self, contract_type: str, prompt_tokens: int) -> List[str]:
+        """Models to try for a request, primary first."""
+        models = [self.primary_model(contract_type, prompt_tokens)]
+        for model in self.fallbacks:
+            if model not in models:
+                models.append(model)
+        return models
+
+    def models(self) -> List[str]:
+        """Every model a request can be routed to: the possible primary models, then the fallbacks."""
+        models = [self.default_model, *self.contract_models.values(), *(model for _, model in self.size_tiers), *self.fallbacks]
+        return list(dict.fromkeys(models))
+
+    def should_fail_over(self, status_code: int) -> bool:
+        return status_code in self.failover_statuses
+
+    def observe(self, model: str, seconds: float) -> None:
+        """Record the latency of a successful call, used for the hedge threshold."""
+        with self._lock:
+            histogram = self._latency.get(model)
+            if histogram is None:
+                histogram = self._latency[model] = Histogram()
+            histogram.observe(seconds)
+
+    def hedge_delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before sending a backup call, or None to not hedge."""
+        if self.hedge_percentile is not None:
+            with self._lock:
+                histogram = self._latency.get(model)
+                if histogram is not None and histogram.count >= self.hedge_min_samples:
+                    return histogram.quantile(self.hedge_percentile)
+        return self.hedge_after
+
+    def hedge_target(self, model: str) -> str:
+        return self.hedge_model or model
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Iterable, AsyncIterator
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+
+    Waiters are served in arrival order so a large request cannot be starved by
+    a stream of small ones.
+
+    Args:
+        per_minute: Tokens added to the bucket every minute
+        capacity: Maximum burst size (defaults to one minute's worth)
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # A request larger than the bucket could never be admitted otherwise
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class RateLimiter:
+    """
+    Client-side quota for the Gemini API.
+
+    Each call takes one request from the requests-per-minute budget and its
+    estimated token count from the tokens-per-minute budget. Either budget can
+    be left unset to disable it.
+
+    Args:
+        requests_per_minute: Maximum model calls per minute
+        tokens_per_minute: Maximum (estimated) input + output tokens per minute
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, tokens: int = 0) -> None:
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None and tokens > 0:
+            await self.tokens.acquire(tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_available": self.requests.tokens if self.requests is not None else None,
+            "tokens_available": self.tokens.tokens if self.tokens is not None else None
+        }
+
+
+class ConcurrencySlot:
+    """Handle for one in-flight call; set `status_code` once the response arrives."""
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limit.
+
+    Every successful call raises the limit by `increase / limit` (about
+    `increase` per round of calls); an overload response (429/503 by default)
+    multiplies it by `decrease_factor`. Decreases are applied at most once per
+    `cooldown` seconds so one burst of rejections only backs off once.
+
+    Args:
+        initial_limit: Starting number of calls allowed in flight
+        min_limit: Lower bound for the limit
+        max_limit: Upper bound for the limit
+        increase: Additive step per round of successful calls
+        decrease_factor: Multiplier applied on overload
+        cooldown: Minimum seconds between two decreases
+        overload_statuses: HTTP status codes treated as overload signals
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+        overload_statuses: Iterable[int] = (429, 503)
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial_limit <= max_limit")
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.overload_statuses = set(overload_statuses)
+        self.in_flight = 0
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, status_code: Optional[int] = None) -> None:
+        """
+        Return a slot and adjust the limit from the call's outcome.
+
+        Args:
+            status_code: HTTP status of the call, or None when it never got a response
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if status_code in self.overload_statuses:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif status_code is not None and status_code < 500:
+                self.limit = min(float(self.max_limit), self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[ConcurrencySlot]:
+        """Hold a slot for the duration of the block, releasing it with the recorded status."""
+        await self.acquire()
+        slot = ConcurrencySlot()
+        try:
+            yield slot
+        finally:
+            await self.release(slot.status_code)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": int(self.limit), "in_flight": self.in_flight}
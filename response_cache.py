@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+def make_cache_key(api_url: str, request_body: Dict[str, Any]) -> str:
+    """
+    Build a content-addressed key for a model request.
+
+    The key is a SHA-256 of the endpoint (which names the model) and the
+    canonical JSON of the final request body, so any change to the prompt or
+    generation config produces a different key.
+    """
+    canonical = json.dumps(request_body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256()
+    digest.update(api_url.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Interface for caches of model responses.
+
+    Subclasses implement `_get` and `_set`; hit/miss accounting is handled here.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self._set(key, value)
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class MemoryCache(ResponseCache):
+    """
+    In-process LRU cache with a TTL and a total byte budget.
+
+    Entries are kept JSON-encoded and decoded on every hit, so callers that
+    change a returned response cannot change what later hits see.
+
+    Args:
+        max_entries: Maximum number of cached responses
+        max_bytes: Maximum total size of cached responses (JSON-encoded)
+        ttl: Seconds before an entry expires, or None to never expire
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = 3600.0):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        # key -> (expires_at, size, encoded value), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[Optional[float], int, str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, encoded = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return json.loads(encoded)
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires_at, size, encoded)
+        self.current_bytes += size
+
+        # Evict least recently used entries until both budgets are met
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({"entries": len(self._entries), "bytes": self.current_bytes})
+        return stats
+
+
+class SQLiteCache(ResponseCache):
+    """
+    On-disk cache stored in a single SQLite file.
+
+    Database access runs in a worker thread so it never blocks the event loop.
+
+    Args:
+        path: Location of the SQLite database file
+        ttl: Seconds before an entry expires, or None to never expire
+    """
+
+    def __init__(self, path: str = "contract_cache.sqlite3", ttl: Optional[float] = 7 * 24 * 3600.0):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def _get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= time.time():
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(value)
+
+    def _set_sync(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            self._conn.commit()
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set_sync, key, value)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache(ResponseCache):
+    """
+    Memory cache in front of an optional slower (e.g. on-disk) cache.
+
+    Hits in the second tier are promoted into memory.
+    """
+
+    def __init__(self, memory: Optional[MemoryCache] = None, disk: Optional[ResponseCache] = None):
+        super().__init__()
+        self.memory = memory if memory is not None else MemoryCache()
+        self.disk = disk
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await self.disk.get(key)
+            if value is not None:
+                await self.memory.set(key, value)
+        return value
+
+    async def _set(self, key: str, value: Dict[str, Any]) -> None:
+        await self.memory.set(key, value)
+        if self.disk is not None:
+            await self.disk.set(key, value)
+
+    async def aclose(self) -> None:
+        await self.memory.aclose()
+        if self.disk is not None:
+            await self.disk.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["memory"] = self.memory.stats()
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
@@ -0,0 +1,120 @@
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Iterable, TYPE_CHECKING
+
+from deadline import current_deadline
+from transport import TransportError, TransportResponse
+
+if TYPE_CHECKING:
+    from tenacity import AsyncRetrying, RetryCallState
+
+
+class RetryableResponse(Exception):
+    """Raised for a response whose status code the retry policy allows retrying."""
+
+    def __init__(self, response: TransportResponse):
+        super().__init__(f"Retryable status code {response.status_code}")
+        self.response = response
+        self.retries = 0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or an HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Retry policy for outbound calls.
+
+    Waits use exponential backoff with full jitter: a random delay between 0
+    and min(backoff_cap, backoff_base * 2 ** retry). A Retry-After header on
+    the failed response takes precedence. No attempt is started after the
+    overall deadline (or the deadline of the current call, if earlier) and
+    waits are shortened so they never run past it.
+
+    Args:
+        max_attempts: Total attempts including the first one (1 disables retries)
+        backoff_base: Backoff scale in seconds
+        backoff_cap: Maximum backoff in seconds
+        retry_statuses: HTTP status codes that are retried
+        retry_connection_errors: Retry connection-level failures (resets, DNS, ...)
+        respect_retry_after: Honor the Retry-After header when present
+        deadline: Seconds after the first attempt when retrying stops, or None
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 20.0,
+        retry_statuses: Iterable[int] = (408, 429, 500, 502, 503, 504),
+        retry_connection_errors: bool = True,
+        respect_retry_after: bool = True,
+        deadline: Optional[float] = 60.0
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_statuses = set(retry_statuses)
+        self.retry_connection_errors = retry_connection_errors
+        self.respect_retry_after = respect_retry_after
+        self.deadline = deadline
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def _is_retryable_error(self, error: BaseException) -> bool:
+        if isinstance(error, RetryableResponse):
+            return True
+        return self.retry_connection_errors and isinstance(error, TransportError)
+
+    def _remaining(self, retry_state: "RetryCallState") -> float:
+        remaining = float("inf")
+        if self.deadline is not None:
+            remaining = self.deadline - retry_state.seconds_since_start
+        call_deadline = current_deadline()
+        if call_deadline is not None and call_deadline.expires_at is not None:
+            remaining = min(remaining, call_deadline.remaining())
+        return remaining
+
+    def _wait(self, retry_state: "RetryCallState") -> float:
+        delay = None
+        error = retry_state.outcome.exception() if retry_state.outcome else None
+        if self.respect_retry_after and isinstance(error, RetryableResponse):
+            delay = parse_retry_after(error.response.header("Retry-After"))
+        if delay is None:
+            retry = retry_state.attempt_number - 1
+            delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** retry))
+        return max(0.0, min(delay, self._remaining(retry_state)))
+
+    def _stop(self, retry_state: "RetryCallState") -> bool:
+        return retry_state.attempt_number >= self.max_attempts or self._remaining(retry_state) <= 0
+
+    def retrying(self) -> "AsyncRetrying":
+        """Build a tenacity controller for one logical call."""
+        # Imported on first use to keep tenacity out of the import-time cost
+        from tenacity import AsyncRetrying, retry_if_exception
+        
+        return AsyncRetrying(
+            stop=self._stop,
+            wait=self._wait,
+            retry=retry_if_exception(self._is_retryable_error),
+            reraise=True
+        )
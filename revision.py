@@ -0,0 +1,182 @@
+import difflib
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+from template_registry import CompiledTemplate
+from token_budget import build_request
+
+# Markdown headings, bold lines, "ARTICLE 3 ...", "1. Rent Payment" and short upper-case lines
+_HEADING = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]+\S.*"
+    r"|\*\*[^*\n]+\*\*:?"
+    r"|(?:ARTICLE|Article|SECTION|Section)[ \t]+[\dIVXLC]+\b.*"
+    r"|\d+(?:\.\d+)*\.?[ \t]+[A-Z][^.\n]{0,80}"
+    r"|[A-Z][A-Z0-9 ,&'()/\-]{2,80}:?)[ \t]*$"
+)
+# Detail lines: "Rent Amount: {rent_amount} (use this exact amount as provided)"
+_DETAIL_LINE = re.compile(r"^([^:\n]+): \{(\w+)\}(?: \(use this exact (\w+))?", re.MULTILINE)
+# Values that only identify someone or something are replaced in place; amounts,
+# rates and free text can change what the surrounding clause says
+PATCH_KINDS = frozenset({"name", "address", "title"})
+
+
+def split_sections(text: str) -> List[Dict[str, str]]:
+    """
+    Split a contract into sections at heading lines.
+
+    Text before the first heading is a section with an empty heading. Joining
+    the `text` of every section gives back the contract unchanged.
+    """
+    sections: List[Dict[str, str]] = []
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        is_heading = bool(stripped) and _HEADING.match(stripped) is not None
+        if is_heading or not sections:
+            sections.append({"heading": stripped.strip("#* :").strip() if is_heading else "", "text": line})
+        else:
+            sections[-1]["text"] += line
+    return sections
+
+
+def section_diff(before: List[Dict[str, str]], after: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Sections that changed between two versions of a contract, matched by heading.
+
+    Returns:
+        One entry per modified, added or removed section with its heading, its
+        position in the new contract (None if removed) and the text before and after
+    """
+    matcher = difflib.SequenceMatcher(
+        None, [section["heading"].lower() for section in before], [section["heading"].lower() for section in after],
+        autojunk=False
+    )
+    changes: List[Dict[str, Any]] = []
+
+    def change(kind: str, old: Optional[int], new: Optional[int]) -> None:
+        section = after[new] if new is not None else before[old]
+        changes.append({
+            "change": kind,
+            "heading": section["heading"],
+            "index": new,
+            "before": before[old]["text"] if old is not None else None,
+            "after": after[new]["text"] if new is not None else None
+        })
+
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal" or (tag == "replace" and old_end - old_start == new_end - new_start):
+            for old, new in zip(range(old_start, old_end), range(new_start, new_end)):
+                if before[old]["text"].strip() != after[new]["text"].strip():
+                    change("modified", old, new)
+            continue
+        for old in range(old_start, old_end):
+            change("removed", old, None)
+        for new in range(new_start, new_end):
+            change("added", None, new)
+    return changes
+
+
+def detail_fields(template: CompiledTemplate) -> Dict[str, Tuple[str, Optional[str]]]:
+    """Label and kind ("name", "amount", "text", ...) of each field on the template's detail lines."""
+    return {field: (label.strip(), kind) for label, field, kind in _DETAIL_LINE.findall(template.source)}
+
+
+def value_pattern(value: str) -> "re.Pattern":
+    """Case-insensitive pattern for a field value, allowing any whitespace between its words."""
+    pattern = r"\s+".join(re.escape(word) for word in value.split())
+    # Whole words only, so "Ann" does not match inside "Annual"
+    if re.match(r"\w", value):
+        pattern = r"(?<!\w)" + pattern
+    if re.search(r"\w$", value):
+        pattern += r"(?!\w)"
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def patch_value(text: str, old: str, new: str) -> str:
+    """Replace every occurrence of `old` with `new`, keeping upper-case renderings upper case."""
+    def replacement(match: "re.Match") -> str:
+        found = match.group()
+        return new.upper() if found.isupper() and not old.isupper() else new
+
+    return value_pattern(old).sub(replacement, text)
+
+
+def plan_revision(
+    template: CompiledTemplate,
+    sections: List[Dict[str, str]],
+    previous: Dict[str, str],
+    current: Dict[str, str]
+) -> Dict[str, Any]:
+    """
+    Decide how to bring a contract from `previous` to `current` form data.
+
+    A section depends on a field when it contains the field's previous value.
+    Names, addresses and titles are patched in place. Sections that depend on
+    any other changed field are regenerated. The whole contract is regenerated
+    when a field is added or cleared, or when its previous value cannot be found.
+
+    Returns:
+        Dictionary with the mode ("unchanged", "sections" or "full"), the
+        changed fields, how each one is applied ("patched", "regenerated" or
+        "full"), the fields to patch and, per section index, the fields that
+        section is regenerated for
+    """
+    changed = [
+        field for field in template.fields
+        if str(previous.get(field) or "").strip() != str(current.get(field) or "").strip()
+    ]
+    plan: Dict[str, Any] = {"mode": "unchanged", "changed_fields": changed, "fields": {}, "patch": [], "regenerate": {}}
+    if not changed:
+        return plan
+
+    kinds = detail_fields(template)
+    for field in changed:
+        old = str(previous.get(field) or "").strip()
+        new = str(current.get(field) or "").strip()
+        dependent = [index for index, section in enumerate(sections) if old and value_pattern(old).search(section["text"])]
+        if not new or not dependent:
+            # An added or cleared field changes the structure; a value the model reworded cannot be located
+            plan.update(mode="full", fields={field: "full" for field in changed}, patch=[], regenerate={})
+            return plan
+        if kinds.get(field, ("", None))[1] in PATCH_KINDS:
+            plan["patch"].append(field)
+            plan["fields"][field] = "patched"
+        else:
+            for index in dependent:
+                plan["regenerate"].setdefault(index, []).append(field)
+            plan["fields"][field] = "regenerated"
+    plan["mode"] = "sections"
+    return plan
+
+
+def section_request(
+    template: CompiledTemplate,
+    section: str,
+    changes: List[Tuple[str, str, str]],
+    max_output_tokens: int
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Gemini request body that rewrites one section for changed details.
+
+    Args:
+        template: Template the contract was generated from
+        section: Current text of the section
+        changes: (label, previous value, new value) per changed detail
+        max_output_tokens: Output token budget for the section
+
+    Returns:
+        Tuple of the request body and its token report
+    """
+    document = template.name.replace("_", " ")
+    details = "".join(
+        f'- {label}: previously "{old}", now "{new}" (use the new value exactly as provided)\n'
+        for label, old, new in changes
+    )
+    prompt = (
+        f"Below is one section of a professional {document}. These details have changed:\n"
+        f"{details}"
+        "Rewrite the section so it reflects the new details. Keep its heading, numbering, defined terms "
+        "and formatting, and leave everything that does not depend on these details word for word.\n"
+        "Output only the revised section.\n\n"
+        f"{section.strip()}\n"
+    )
+    return build_request(prompt, max_output_tokens)
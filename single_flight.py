@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from deadline import current_deadline, detached_context, run_with_deadline
+
+
+class _Call:
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work in its own task; callers that
+    arrive while it is running wait on that task and receive the same result
+    or exception. Nothing is remembered once the call finishes, so this only
+    deduplicates requests that overlap in time. If every waiting caller is
+    cancelled, the shared call is cancelled too.
+
+    The shared call does not inherit the first caller's deadline; each caller's
+    own deadline bounds only how long that caller waits for it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # A call abandoned by its waiters can still fail on its way out; nobody awaits that error
+            call.task.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run `fn` unless a call with the same key is already in flight.
+
+        Args:
+            key: Identity of the request (e.g. its cache key)
+            fn: Coroutine function performing the work
+
+        Returns:
+            Tuple of the result and whether it was shared from another caller's call
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            # The task copies the context it is created in, here one without a deadline
+            call = _Call(detached_context().run(asyncio.ensure_future, fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        call.waiters += 1
+        try:
+            # Shielded so one caller's cancellation or deadline does not cancel the others' result
+            waiter = asyncio.shield(call.task)
+            deadline = current_deadline()
+            if deadline is None or deadline.expires_at is None:
+                return await waiter, shared
+            return await run_with_deadline(waiter, deadline, "Shared call"), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
@@ -0,0 +1,106 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Each stage runs in a fresh interpreter and prints its own duration in milliseconds
+_STAGES = {
+    "import": "import contract_generator",
+    "construct": (
+        "from config import configure\n"
+        "configure(api_key='startup-benchmark')\n"
+        "import contract_generator\n"
+        "contract_generator.ContractGenerator()"
+    ),
+    "first_validate": (
+        "from config import configure\n"
+        "configure(api_key='startup-benchmark')\n"
+        "import contract_generator\n"
+        "contract_generator.ContractGenerator().validate_form_data('nda', {\n"
+        "    'disclosing_party': 'A', 'receiving_party': 'B', 'purpose': 'P', 'term': '1 year'})"
+    )
+}
+
+_TIMED = "import time\n_started = time.perf_counter()\n{code}\nprint((time.perf_counter() - _started) * 1000)"
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def time_stage(code: str, runs: int) -> List[float]:
+    """Run `code` in `runs` fresh interpreters and return the durations in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _TIMED.format(code=code)],
+            capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return timings
+
+
+def slowest_imports(limit: int = 8) -> List[Tuple[str, float]]:
+    """Direct imports of contract_generator by cumulative import time (ms), from `python -X importtime`."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import contract_generator"],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stderr
+    # Children are listed before their parent, one indentation level deeper
+    imports: List[Tuple[str, float]] = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        depth = (len(match.group(3)) - 1) // 2
+        if depth == 0:
+            if match.group(4) == "contract_generator":
+                break
+            imports = []
+        elif depth == 1:
+            imports.append((match.group(4), int(match.group(2)) / 1000.0))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def run(stages: List[str], runs: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for stage in stages:
+        timings = time_stage(_STAGES[stage], runs)
+        results[stage] = {"median": statistics.median(timings), "min": min(timings), "max": max(timings)}
+        print(
+            f"{stage:<15} median={results[stage]['median']:7.1f}ms "
+            f"min={results[stage]['min']:7.1f}ms max={results[stage]['max']:7.1f}ms"
+        )
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for contract_generator")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per stage (default: 10)")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Fail if the median import + construct time exceeds this (default: 100)")
+    parser.add_argument("--imports", type=int, default=8, help="Number of slowest imports to list")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = run(list(_STAGES), args.runs)
+
+    print("\nSlowest imports of contract_generator (cumulative):")
+    for name, milliseconds in slowest_imports(args.imports):
+        print(f"  {name:<25} {milliseconds:7.1f}ms")
+
+    construct = results["construct"]["median"]
+    if construct > args.budget_ms:
+        print(f"\nFAIL: cold start {construct:.1f}ms is over the {args.budget_ms:.0f}ms budget")
+        return 1
+    print(f"\nOK: cold start {construct:.1f}ms is within the {args.budget_ms:.0f}ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,344 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionSpool:
+    """
+    Durable spool of contract drafts waiting to be sent to the backend.
+
+    Each draft is written to a SQLite file before it is queued and deleted only
+    once the backend has accepted it, so drafts survive backend outages and
+    process restarts. Database access runs in a worker thread.
+
+    Args:
+        path: Location of the SQLite database file
+    """
+
+    def __init__(self, path: str = "submission_spool.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps committed drafts across a process crash without an fsync per insert
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS submissions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "backend_url TEXT NOT NULL, "
+            "contract_data TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, "
+            "created_at REAL NOT NULL, "
+            "next_attempt_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _add_sync(self, backend_url: str, contract_data: Dict[str, Any]) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO submissions (backend_url, contract_data, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?)",
+                (backend_url, json.dumps(contract_data, ensure_ascii=False), now, now)
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def _due_sync(self, limit: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, backend_url, contract_data FROM submissions "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (time.time(), limit)
+            ).fetchall()
+        return [(row_id, backend_url, json.loads(data)) for row_id, backend_url, data in rows]
+
+    def _remove_sync(self, row_ids: List[int]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM submissions WHERE id = ?", [(row_id,) for row_id in row_ids])
+            self._conn.commit()
+
+    def _record_failure_sync(self, row_id: int, error: str, retry_in: float, max_attempts: Optional[int]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE submissions SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?, "
+                "status = CASE WHEN ? IS NOT NULL AND attempts + 1 >= ? THEN 'failed' ELSE 'pending' END "
+                "WHERE id = ?",
+                (error, time.time() + retry_in, max_attempts, max_attempts, row_id)
+            )
+            self._conn.commit()
+
+    def _counts_sync(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM submissions GROUP BY status").fetchall()
+        counts = {"pending": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def _failed_sync(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, backend_url, contract_data, attempts, last_error FROM submissions "
+                "WHERE status = 'failed' ORDER BY id"
+            ).fetchall()
+        return [
+            {"id": row_id, "backend_url": backend_url, "contract_data": json.loads(data),
+             "attempts": attempts, "last_error": last_error}
+            for row_id, backend_url, data, attempts, last_error in rows
+        ]
+
+    def _retry_failed_sync(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE submissions SET status = 'pending', attempts = 0, next_attempt_at = ? "
+                "WHERE status = 'failed'",
+                (time.time(),)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    async def add(self, backend_url: str, contract_data: Dict[str, Any]) -> int:
+        """Persist a draft and return its spool id."""
+        return await asyncio.to_thread(self._add_sync, backend_url, contract_data)
+
+    async def due(self, limit: int = 100) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Pending drafts whose next attempt is due, oldest first, as (id, backend_url, contract_data)."""
+        return await asyncio.to_thread(self._due_sync, limit)
+
+    async def remove(self, row_ids: List[int]) -> None:
+        await asyncio.to_thread(self._remove_sync, row_ids)
+
+    async def record_failure(
+        self,
+        row_id: int,
+        error: str,
+        retry_in: float,
+        max_attempts: Optional[int] = None
+    ) -> None:
+        """Schedule another attempt in `retry_in` seconds, or park the draft as failed after max_attempts."""
+        await asyncio.to_thread(self._record_failure_sync, row_id, error, retry_in, max_attempts)
+
+    async def counts(self) -> Dict[str, int]:
+        """Number of pending and failed drafts."""
+        return await asyncio.to_thread(self._counts_sync)
+
+    async def failed(self) -> List[Dict[str, Any]]:
+        """Drafts that ran out of attempts, with their last error."""
+        return await asyncio.to_thread(self._failed_sync)
+
+    async def retry_failed(self) -> int:
+        """Make failed drafts pending again; returns how many were reset."""
+        return await asyncio.to_thread(self._retry_failed_sync)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SubmissionQueue:
+    """
+    Write-behind queue that sends contract drafts to the backend in the background.
+
+    `submit` returns as soon as the draft is spooled, instead of waiting for the
+    backend. Worker tasks take up to `batch_size` drafts at a time and send them
+    with ContractGenerator.send_contract_drafts, as one bulk request when the
+    backend supports it or as single POSTs otherwise. A draft that cannot be sent
+    stays in the spool and is retried every `retry_interval` seconds; drafts left
+    over from a previous run are replayed on `start`.
+
+    Args:
+        generator: ContractGenerator whose transport, retries and metrics are used
+        backend_url: Default URL of the backend contracts endpoint
+        spool: Durable spool, defaults to SubmissionSpool() in the working directory
+        max_size: Maximum number of drafts queued in memory; further drafts wait in the spool for the replay loop
+        workers: Number of concurrent worker tasks
+        batch_size: Maximum number of drafts a worker sends at once
+        retry_interval: Seconds before a failed draft is attempted again
+        max_attempts: Attempts before a draft is parked as failed, or None to retry forever
+        bulk: Send batches through the bulk endpoint (False always posts drafts one by one)
+    """
+
+    def __init__(
+        self,
+        generator: Any,
+        backend_url: str,
+        spool: Optional[SubmissionSpool] = None,
+        max_size: int = 1000,
+        workers: int = 2,
+        batch_size: int = 10,
+        retry_interval: float = 5.0,
+        max_attempts: Optional[int] = 20,
+        bulk: bool = True
+    ):
+        if workers < 1 or batch_size < 1 or max_size < 1:
+            raise ValueError("workers, batch_size and max_size must be at least 1")
+        self.generator = generator
+        self.backend_url = backend_url
+        self.spool = spool if spool is not None else SubmissionSpool()
+        self.max_size = max_size
+        self.workers = workers
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.bulk = bulk
+        self._queue: "asyncio.Queue[Tuple[int, str, Dict[str, Any]]]" = asyncio.Queue(max_size)
+        # Spool ids currently queued or being sent, so the replay loop never enqueues one twice
+        self._claimed: Set[int] = set()
+        # Held from writing or scanning the spool until the drafts found are claimed
+        self._claim_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._sent = 0
+        self._failures = 0
+        self._spool_errors = 0
+
+    async def start(self) -> "SubmissionQueue":
+        """Replay spooled drafts and start the workers."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            self._tasks.append(asyncio.create_task(self._replay_loop()))
+        return self
+
+    async def __aenter__(self) -> "SubmissionQueue":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def submit(self, contract_data: Dict[str, Any], backend_url: Optional[str] = None) -> int:
+        """
+        Spool a generated contract for background submission.
+
+        Args:
+            contract_data: Dictionary containing the contract and metadata, as returned by generate_contract
+            backend_url: Override of the queue's backend URL
+
+        Returns:
+            Spool id of the draft
+        """
+        backend_url = backend_url or self.backend_url
+        async with self._claim_lock:
+            row_id = await self.spool.add(backend_url, contract_data)
+            try:
+                self._queue.put_nowait((row_id, backend_url, contract_data))
+            except asyncio.QueueFull:
+                # Already spooled; the replay loop queues it once there is room
+                return row_id
+            self._claimed.add(row_id)
+        return row_id
+
+    async def _replay_loop(self) -> None:
+        while True:
+            await self._enqueue_due()
+            await asyncio.sleep(self.retry_interval)
+
+    async def _enqueue_due(self) -> None:
+        async with self._claim_lock:
+            free = self.max_size - self._queue.qsize()
+            if free <= 0:
+                return
+            for item in await self.spool.due(limit=free + len(self._claimed)):
+                if item[0] in self._claimed:
+                    continue
+                if self._queue.full():
+                    break
+                self._claimed.add(item[0])
+                self._queue.put_nowait(item)
+
+    async def _next_batch(self) -> List[Tuple[int, str, Dict[str, Any]]]:
+        batch = [await self._queue.get()]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _send_one(self, item: Tuple[int, str, Dict[str, Any]]) -> Optional[str]:
+        row_id, backend_url, contract_data = item
+        try:
+            await self.generator.send_contract_draft(contract_data, backend_url)
+            return None
+        except Exception as e:
+            return str(e)
+
+    async def _send_batch(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> List[Optional[str]]:
+        """Send a batch, returning an error message (or None on success) per draft."""
+        if not self.bulk:
+            return list(await asyncio.gather(*(self._send_one(item) for item in batch)))
+        errors: List[Optional[str]] = [None] * len(batch)
+        by_url: Dict[str, List[int]] = {}
+        for position, (_, backend_url, _) in enumerate(batch):
+            by_url.setdefault(backend_url, []).append(position)
+        for backend_url, positions in by_url.items():
+            try:
+                outcome = await self.generator.send_contract_drafts(
+                    [batch[position][2] for position in positions], backend_url
+                )
+                for position, result in zip(positions, outcome["results"]):
+                    errors[position] = None if result["success"] else result["error"]
+            except Exception as e:
+                for position in positions:
+                    errors[position] = str(e)
+        return errors
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                errors = await self._send_batch(batch)
+                sent = [item[0] for item, error in zip(batch, errors) if error is None]
+                if sent:
+                    await self.spool.remove(sent)
+                    self._sent += len(sent)
+                for (row_id, _, _), error in zip(batch, errors):
+                    if error is not None:
+                        self._failures += 1
+                        await self.spool.record_failure(row_id, error, self.retry_interval, self.max_attempts)
+                if sent:
+                    self.generator.metrics.increment("submissions", len(sent), outcome="sent")
+                if len(sent) < len(batch):
+                    self.generator.metrics.increment("submissions", len(batch) - len(sent), outcome="deferred")
+            except Exception:
+                # The spool could not be updated (locked database, full disk); the drafts are still
+                # pending there, so the replay loop sends them again and this worker keeps going
+                self._spool_errors += 1
+                logger.exception("Could not update the submission spool for %d drafts", len(batch))
+                self.generator.metrics.increment("submissions", len(batch), outcome="spool_error")
+            finally:
+                for row_id, _, _ in batch:
+                    self._claimed.discard(row_id)
+                    self._queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every queued draft has been attempted once."""
+        await self._queue.join()
+
+    async def aclose(self) -> None:
+        """
+        Stop the workers after the queued drafts have been attempted.
+
+        Drafts that were not accepted by the backend stay in the spool for the next run.
+        """
+        if self._tasks:
+            await self._queue.join()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = await self.spool.counts()
+        return {
+            "queued": self._queue.qsize(),
+            "in_flight": len(self._claimed) - self._queue.qsize(),
+            "spooled": counts["pending"],
+            "failed": counts["failed"],
+            "sent": self._sent,
+            "send_failures": self._failures,
+            "spool_errors": self._spool_errors
+        }
@@ -0,0 +1,129 @@
+import os
+import threading
+from string import Formatter
+from typing import Dict, List, Optional, Iterable, Tuple
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+TEMPLATE_SUFFIX = ".txt"
+
+
+class CompiledTemplate:
+    """
+    A prompt template parsed once into literal text and placeholder segments.
+
+    Rendering joins the precomputed segments, so no format-string parsing
+    happens per call. Missing optional fields render as an empty string.
+
+    Args:
+        name: Contract type the template generates
+        source: Template text using `{field}` placeholders (`{{`/`}}` for literal braces)
+        optional_fields: Placeholders that may be left out of the form data
+    """
+
+    def __init__(self, name: str, source: str, optional_fields: Iterable[str] = ()):
+        self.name = name
+        self.source = source
+        self._segments: List[Tuple[str, Optional[str]]] = []
+        placeholders: List[str] = []
+        for literal, field, format_spec, conversion in Formatter().parse(source):
+            if field is not None:
+                if not field.isidentifier() or format_spec or conversion:
+                    raise ValueError(f"Unsupported placeholder {{{field}}} in template '{name}'")
+                if field not in placeholders:
+                    placeholders.append(field)
+            self._segments.append((literal, field))
+
+        unknown = set(optional_fields) - set(placeholders)
+        if unknown:
+            raise ValueError(f"Optional fields not used in template '{name}': {', '.join(sorted(unknown))}")
+        self.placeholders = frozenset(placeholders)
+        self.optional_fields = frozenset(optional_fields)
+        self.fields = placeholders
+        self.required_fields = [field for field in placeholders if field not in self.optional_fields]
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = []
+        for literal, field in self._segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(values.get(field, "")))
+        return "".join(parts)
+
+
+def parse_template_file(name: str, text: str) -> CompiledTemplate:
+    """
+    Compile the contents of a template file.
+
+    Leading lines starting with `#` are directives; `# optional: a, b` marks
+    placeholders that may be omitted from the form data.
+    """
+    optional_fields: List[str] = []
+    lines = text.splitlines(keepends=True)
+    while lines and lines[0].startswith("#"):
+        directive = lines.pop(0)[1:].strip()
+        key, _, value = directive.partition(":")
+        if key.strip() == "optional":
+            optional_fields.extend(field.strip() for field in value.split(",") if field.strip())
+    return CompiledTemplate(name, "".join(lines), optional_fields)
+
+
+class TemplateRegistry:
+    """
+    Contract templates loaded from a directory of `<contract_type>.txt` files.
+
+    The directory is read and every template compiled on first use; after that
+    lookups are dictionary reads, so one registry can be shared by any number
+    of generators.
+
+    Args:
+        directory: Directory to load templates from (defaults to the bundled `templates/`)
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or DEFAULT_TEMPLATE_DIR
+        self._templates: Optional[Dict[str, CompiledTemplate]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, CompiledTemplate]:
+        templates = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(TEMPLATE_SUFFIX):
+                continue
+            name = filename[:-len(TEMPLATE_SUFFIX)]
+            with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                templates[name] = parse_template_file(name, f.read())
+        return templates
+
+    @property
+    def templates(self) -> Dict[str, CompiledTemplate]:
+        if self._templates is None:
+            with self._lock:
+                if self._templates is None:
+                    self._templates = self._load()
+        return self._templates
+
+    def get(self, contract_type: str) -> Optional[CompiledTemplate]:
+        return self.templates.get(contract_type)
+
+    def register(self, name: str, source: str, optional_fields: Iterable[str] = ()) -> CompiledTemplate:
+        """Add or replace a template at runtime."""
+        template = CompiledTemplate(name, source, optional_fields)
+        self.templates[name] = template
+        return template
+
+    def contract_types(self) -> List[str]:
+        return list(self.templates)
+
+    def __contains__(self, contract_type: str) -> bool:
+        return contract_type in self.templates
+
+
+_default_registry: Optional[TemplateRegistry] = None
+
+
+def get_default_registry() -> TemplateRegistry:
+    """Process-wide registry for the bundled templates."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = TemplateRegistry()
+    return _default_registry
@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+from contract_generator import ContractGenerator
+from metrics import InProcessMetrics
+from transport import AsyncTransport, TransportResponse
+
+
+def tenancy(unit):
+    return {
+        "landlord_name": "Riverside Properties LLC",
+        "tenant_name": f"Tenant of Unit {unit}",
+        "property_address": f"Unit {unit}, 45 River Road, Springfield",
+        "rent_amount": "$1,800 per month",
+        "term": "12 months"
+    }
+
+
+class CountingTransport(AsyncTransport):
+    """Answers after a unit-dependent delay, records peak concurrency, and fails unit 103 with a 400."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def post(self, url, headers, json_body=None, content=None):
+        prompt = json_body["contents"][0]["parts"][0]["text"]
+        unit = next(unit for unit in range(100, 110) if f"Tenant of Unit {unit}" in prompt)
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            # Later units finish first, so completion order differs from input order
+            await asyncio.sleep(0.002 * (110 - unit))
+        finally:
+            self.in_flight -= 1
+        if unit == 103:
+            return TransportResponse(400, {}, b'{"error": {"message": "bad prompt"}}')
+        body = {
+            "candidates": [{"content": {"parts": [{"text": f"TENANCY AGREEMENT for Tenant of Unit {unit}"}]}}],
+            "usageMetadata": {"promptTokenCount": 50, "candidatesTokenCount": 10, "totalTokenCount": 60}
+        }
+        return TransportResponse(200, {}, json.dumps(body).encode("utf-8"))
+
+
+def run_batch(jobs, concurrency):
+    async def scenario():
+        transport = CountingTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics()) as generator:
+            batch = await generator.generate_many(jobs, concurrency=concurrency, use_cache=False)
+        return batch, transport
+
+    return asyncio.run(scenario())
+
+
+def test_results_keep_input_order_and_failures_stay_isolated():
+    jobs = [{"contract_type": "tenancy_agreement", "form_data": tenancy(unit)} for unit in range(101, 106)]
+    # Invalid form data and a tuple-style job alongside the dict jobs
+    jobs.append({"contract_type": "tenancy_agreement", "form_data": {"landlord_name": "Incomplete"}})
+    jobs.append(("tenancy_agreement", tenancy(106)))
+    batch, transport = run_batch(jobs, concurrency=3)
+
+    results = batch["results"]
+    assert [outcome["index"] for outcome in results] == list(range(7))
+    assert [outcome["success"] for outcome in results] == [True, True, False, True, True, False, True]
+    for outcome, unit in zip(results, (101, 102, None, 104, 105, None, 106)):
+        if unit is None:
+            assert outcome["result"] is None and outcome["error"]
+        else:
+            assert outcome["result"]["contract"] == f"TENANCY AGREEMENT for Tenant of Unit {unit}"
+            assert outcome["error"] is None
+    assert "bad prompt" in results[2]["error"]
+    # The invalid job never reached the model
+    assert transport.calls == 6
+
+    summary = batch["summary"]
+    assert (summary["total"], summary["succeeded"], summary["failed"], summary["concurrency"]) == (7, 5, 2, 3)
+    assert summary["contracts_per_second"] > 0
+    assert 0 < summary["mean_latency"] <= summary["max_latency"] <= summary["elapsed"]
+
+
+def test_concurrency_bounds_requests_in_flight():
+    jobs = [("tenancy_agreement", tenancy(unit)) for unit in range(100, 110) if unit != 103]
+    batch, transport = run_batch(jobs, concurrency=2)
+    assert batch["summary"]["succeeded"] == 9
+    assert transport.peak == 2
+
+
+def test_iter_generate_many_yields_in_completion_order():
+    async def scenario():
+        transport = CountingTransport()
+        jobs = [("tenancy_agreement", tenancy(unit)) for unit in (101, 109)]
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics()) as generator:
+            return [outcome["index"] async for outcome in generator.iter_generate_many(jobs, concurrency=2, use_cache=False)]
+
+    # Unit 109 answers sooner, so the second job is reported first
+    assert asyncio.run(scenario()) == [1, 0]
+
+
+def test_concurrency_must_be_positive():
+    async def scenario():
+        async with ContractGenerator(api_key="test", transport=CountingTransport(), metrics=InProcessMetrics()) as generator:
+            await generator.generate_many([], concurrency=0)
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
@@ -0,0 +1,99 @@
+import asyncio
+import gzip
+import json
+
+from contract_generator import ContractGenerator
+from metrics import InProcessMetrics
+from mock_server import MockServer, MockServerConfig
+from transport import AsyncTransport, TransportResponse
+
+
+def draft(number):
+    return {"contract": f"CONTRACT {number}", "metadata": {"contract_type": "nda", "number": number}}
+
+
+def submit(drafts, rounds=1, **config):
+    async def scenario():
+        async with MockServer(MockServerConfig(backend_latency_ms=1, **config)) as mock:
+            async with ContractGenerator(api_key="test", metrics=InProcessMetrics()) as generator:
+                outcomes = [
+                    await generator.send_contract_drafts(drafts, mock.base_url + "/contracts", chunk_size=2)
+                    for _ in range(rounds)
+                ]
+            return outcomes, dict(mock.stats)
+
+    return asyncio.run(scenario())
+
+
+def test_idempotency_key_is_stable_and_content_addressed():
+    payload = ContractGenerator._draft_payload(draft(1))
+    reordered = {"version": "1.0", "status": "draft", "metadata": payload["metadata"], "contract": payload["contract"]}
+    key = ContractGenerator.idempotency_key(payload)
+    assert key == ContractGenerator.idempotency_key(reordered)
+    assert key != ContractGenerator.idempotency_key(ContractGenerator._draft_payload(draft(2)))
+
+
+def test_bulk_endpoint_stores_each_draft_once():
+    drafts = [draft(number) for number in range(5)] + [draft(0)]
+    (first, second), stats = submit(drafts, rounds=2)
+    assert first["summary"] == {"total": 6, "succeeded": 6, "failed": 0, "mode": "bulk"}
+    assert [result["index"] for result in first["results"]] == list(range(6))
+    assert [result["duplicate"] for result in first["results"]] == [False] * 5 + [True]
+    assert first["results"][0]["data"]["id"].startswith("contract-")
+    # Resending is recognized by the idempotency keys instead of storing the drafts again
+    assert all(result["success"] and result["duplicate"] for result in second["results"])
+    assert stats["backend_bulk"] == 6
+    assert stats["backend_201"] == 5
+
+
+def test_backend_without_bulk_endpoint_falls_back_to_single_posts():
+    drafts = [draft(number) for number in range(3)]
+    (first, second), stats = submit(drafts, rounds=2, bulk_endpoint=False)
+    assert first["summary"] == {"total": 3, "succeeded": 3, "failed": 0, "mode": "single"}
+    assert [result["duplicate"] for result in second["results"]] == [True] * 3
+    # The missing bulk endpoint is remembered after the first 404
+    assert stats["not_found"] == 1
+    assert stats["backend_201"] == 3
+
+
+class GzipRefusingBackend(AsyncTransport):
+    """Bulk endpoint that refuses gzip bodies with 415 and rejects drafts containing "BAD"."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def post(self, url, headers, json_body=None, content=None):
+        self.requests.append((url, headers, content))
+        if headers.get("Content-Encoding") == "gzip":
+            gzip.decompress(content)
+            return TransportResponse(415, {}, b'{"error": {"message": "gzip not supported"}}')
+        items = json.loads(content)["contracts"]
+        results = [
+            {"index": index, "status": 422, "error": {"message": "bad draft"}} if "BAD" in item["contract"]
+            else {"index": index, "status": 201, "id": f"id-{index}"}
+            for index, item in enumerate(items)
+        ]
+        return TransportResponse(207, {}, json.dumps({"results": results}).encode("utf-8"))
+
+
+def test_uncompressed_resend_and_per_draft_errors():
+    async def scenario():
+        transport = GzipRefusingBackend()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics()) as generator:
+            drafts = [draft(1), {"contract": "BAD", "metadata": {}}]
+            first = await generator.send_contract_drafts(drafts, "https://backend.test/contracts")
+            second = await generator.send_contract_drafts(drafts, "https://backend.test/contracts")
+        return first, second, transport.requests
+
+    first, second, requests = asyncio.run(scenario())
+    for outcome in (first, second):
+        assert [result["success"] for result in outcome["results"]] == [True, False]
+        assert outcome["results"][1]["error"] == "Backend rejected contract (422): bad draft"
+        assert outcome["summary"]["mode"] == "bulk"
+    # gzip is tried once, then the bodies are sent uncompressed
+    assert [headers.get("Content-Encoding") for _, headers, _ in requests] == ["gzip", None, None]
+    assert all(url == "https://backend.test/contracts/bulk" for url, _, _ in requests)
+    keys = [item["idempotency_key"] for item in json.loads(requests[1][2])["contracts"]]
+    assert keys == [ContractGenerator.idempotency_key(ContractGenerator._draft_payload(draft(1))),
+                    ContractGenerator.idempotency_key(ContractGenerator._draft_payload({"contract": "BAD", "metadata": {}}))]
+    assert requests[1][1]["Idempotency-Key"] == requests[2][1]["Idempotency-Key"]
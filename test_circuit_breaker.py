@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+
+def make_breaker(**settings):
+    transitions = []
+    settings = dict(dict(window_size=4, min_calls=4, open_seconds=0.05, half_open_calls=2), **settings)
+    breaker = CircuitBreaker("test", on_state_change=lambda name, old, new: transitions.append((old, new)), **settings)
+    return breaker, transitions
+
+
+def call(breaker, failed, seconds=0.01):
+    breaker.acquire()
+    breaker.record(failed, seconds)
+
+
+def test_opens_once_the_window_fails_often_enough():
+    breaker, transitions = make_breaker()
+    for failed in (True, True, False):
+        call(breaker, failed)
+    # Fewer than min_calls outcomes never open the circuit
+    assert breaker.state == CLOSED
+    call(breaker, False)
+    assert breaker.state == OPEN
+    assert transitions == [(CLOSED, OPEN)]
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.acquire()
+    assert 0 < info.value.retry_after <= 0.05
+
+
+def test_slow_calls_open_the_circuit():
+    breaker, _ = make_breaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.5)
+    for seconds in (2.0, 2.0, 0.1, 0.1):
+        call(breaker, False, seconds)
+    assert breaker.state == OPEN
+
+
+def test_half_open_closes_after_enough_successful_trials():
+    breaker, transitions = make_breaker()
+    for _ in range(4):
+        call(breaker, True)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
+    breaker.acquire()
+    # Only half_open_calls trial calls at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    breaker.record(False, 0.01)
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+    assert transitions == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    assert breaker.stats()["calls"] == 0
+
+
+def test_failed_trial_opens_the_circuit_again():
+    breaker, transitions = make_breaker()
+    for _ in range(4):
+        call(breaker, True)
+    time.sleep(0.06)
+    call(breaker, True)
+    assert breaker.state == OPEN
+    assert transitions[-1] == (HALF_OPEN, OPEN)
+
+
+def test_released_trial_permit_can_be_taken_again():
+    breaker, _ = make_breaker(half_open_calls=1)
+    for _ in range(4):
+        call(breaker, True)
+    time.sleep(0.06)
+    breaker.acquire()
+    breaker.release()
+    call(breaker, False)
+    assert breaker.state == CLOSED
+
+
+def test_outcome_of_a_call_started_before_opening_is_ignored():
+    breaker, _ = make_breaker(open_seconds=30)
+    breaker.acquire()
+    for _ in range(4):
+        call(breaker, True)
+    breaker.record(False, 0.01)
+    assert breaker.state == OPEN
+
+
+def test_breakers_share_settings_and_report_state_changes():
+    changes = []
+    breakers = CircuitBreakers(on_state_change=lambda *change: changes.append(change), window_size=1, min_calls=1)
+    breaker = breakers.get("backend:example.com")
+    assert breakers.get("backend:example.com") is breaker
+    call(breaker, True)
+    assert changes == [("backend:example.com", CLOSED, OPEN)]
+    states = breakers.states()
+    assert states["backend:example.com"]["state"] == OPEN
+    assert states["backend:example.com"]["retry_after"] > 0
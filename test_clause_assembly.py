@@ -0,0 +1,160 @@
+import asyncio
+import json
+
+from clause_assembly import ClauseAssembler
+from contract_generator import ContractGenerator
+from metrics import InProcessMetrics
+from template_registry import get_default_registry
+from transport import AsyncTransport, TransportResponse
+
+NDA = get_default_registry().get("nda")
+
+FORM_DATA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+CLAUSES = [
+    "Definition of confidential information",
+    "Obligations of receiving party",
+    "Exclusions from confidentiality",
+    "Term and termination",
+    "Remedies for breach"
+]
+
+
+class ClauseTransport(AsyncTransport):
+    """Answers clause requests with the clause name and contract requests with a marked party-specific draft."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def post(self, url, headers, json_body=None, content=None):
+        prompt = json_body["contents"][0]["parts"][0]["text"]
+        self.prompts.append(prompt)
+        if prompt.startswith("Write the"):
+            text = prompt.split('"')[1].upper()
+        else:
+            text = (f"NON-DISCLOSURE AGREEMENT\n\nBetween {FORM_DATA['disclosing_party']} and "
+                    f"{FORM_DATA['receiving_party']}.\n\n{ClauseAssembler.MARKER}\n\nIN WITNESS WHEREOF")
+        body = {
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {"promptTokenCount": 20, "candidatesTokenCount": 10, "totalTokenCount": 30}
+        }
+        return TransportResponse(200, {}, json.dumps(body).encode("utf-8"))
+
+
+def clause_prompts(prompts):
+    return [prompt for prompt in prompts if prompt.startswith("Write the")]
+
+
+def test_standard_clauses_are_read_from_the_template():
+    assembler = ClauseAssembler()
+    assert assembler.standard_clauses(NDA) == CLAUSES
+    assert assembler.applies_to("nda", NDA)
+    assert not ClauseAssembler(contract_types=["tenancy_agreement"]).applies_to("nda", NDA)
+
+
+def test_variable_template_asks_for_the_marker_instead_of_the_clauses():
+    assembler = ClauseAssembler()
+    variable = assembler.variable_template(NDA)
+    assert assembler.variable_template(NDA) is variable
+    prompt = variable.render(FORM_DATA)
+    assert "Include standard legal clauses for:" not in prompt
+    assert f"Put a line containing only {ClauseAssembler.MARKER}" in prompt
+    assert "- Remedies for breach\n" in prompt
+    assert "Disclosing Party: Innovation Labs LLC" in prompt
+
+
+def test_clause_request_uses_defined_terms_only():
+    data, report = ClauseAssembler(max_clause_tokens=300).clause_request(NDA, "Term and termination")
+    prompt = data["contents"][0]["parts"][0]["text"]
+    assert prompt.startswith('Write the "Term and termination" clause of a professional non-disclosure agreement.')
+    assert '"Disclosing Party", "Receiving Party"' in prompt
+    assert data["generationConfig"]["maxOutputTokens"] == report["max_output_tokens"] == 300
+
+
+def test_assemble_inserts_clauses_at_the_marker_or_before_the_signatures():
+    assembler = ClauseAssembler()
+    clauses = ["1. ONE\nText.\n", "2. TWO\nText."]
+    block = "1. ONE\nText.\n\n2. TWO\nText."
+    assert assembler.assemble(f"TITLE\n{ClauseAssembler.MARKER}\nEND", clauses) == f"TITLE\n{block}\nEND"
+    assert assembler.assemble("TITLE\nIN WITNESS WHEREOF", clauses) == f"TITLE\n{block}\n\nIN WITNESS WHEREOF"
+    assert assembler.assemble("TITLE\n", clauses) == f"TITLE\n\n{block}"
+
+
+def test_clauses_are_generated_once_and_reused():
+    async def scenario():
+        transport = ClauseTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     assembler=ClauseAssembler(version="1")) as generator:
+            first = await generator.generate_contract("nda", FORM_DATA)
+            second = await generator.generate_contract("nda", dict(FORM_DATA, term="3 years"))
+        return first, second, transport.prompts
+
+    first, second, prompts = asyncio.run(scenario())
+    assert first["metadata"]["assembly"] == {"version": "1", "clauses": 5, "generated": 5}
+    assert second["metadata"]["assembly"] == {"version": "1", "clauses": 5, "generated": 0}
+    contract = first["contract"]
+    assert ClauseAssembler.MARKER not in contract
+    positions = [contract.index(clause.upper()) for clause in CLAUSES]
+    assert positions == sorted(positions)
+    assert positions[-1] < contract.index("IN WITNESS WHEREOF")
+    # Five clauses plus one party-specific call per contract
+    assert len(clause_prompts(prompts)) == 5
+    assert len(prompts) == 7
+
+
+def test_use_cache_false_regenerates_clauses_without_storing_them():
+    async def scenario():
+        transport = ClauseTransport()
+        assembler = ClauseAssembler()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     assembler=assembler) as generator:
+            fresh = await generator.generate_contract("nda", FORM_DATA, use_cache=False)
+            stored = len(generator.cache)
+            cached = await generator.generate_contract("nda", FORM_DATA)
+        return fresh, stored, cached, len(clause_prompts(transport.prompts))
+
+    fresh, stored, cached, clause_calls = asyncio.run(scenario())
+    assert fresh["metadata"]["assembly"]["generated"] == 5
+    assert stored == 0
+    # Nothing was kept from the uncached call, so the clauses are generated again
+    assert cached["metadata"]["assembly"]["generated"] == 5
+    assert clause_calls == 10
+
+
+def test_clause_memory_is_bounded_and_falls_back_to_the_response_cache():
+    assembler = ClauseAssembler(max_clauses=2)
+    for key in ("a", "b"):
+        assembler.put(key, key.upper())
+    assert assembler.get("a") == "A"
+    assembler.put("c", "C")
+    assert (assembler.get("a"), assembler.get("b"), assembler.get("c")) == ("A", None, "C")
+
+    async def scenario():
+        transport = ClauseTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     assembler=ClauseAssembler(max_clauses=2)) as generator:
+            await generator.generate_contract("nda", FORM_DATA)
+            second = await generator.generate_contract("nda", dict(FORM_DATA, term="3 years"))
+        return second, len(clause_prompts(transport.prompts))
+
+    second, clause_calls = asyncio.run(scenario())
+    assert second["metadata"]["assembly"]["generated"] == 0
+    assert clause_calls == 5
+
+
+def test_streaming_an_assembled_contract_yields_it_whole():
+    async def scenario():
+        async with ContractGenerator(api_key="test", transport=ClauseTransport(), metrics=InProcessMetrics(),
+                                     assembler=ClauseAssembler()) as generator:
+            return [event async for event in generator.stream_contract("nda", FORM_DATA)]
+
+    events = asyncio.run(scenario())
+    assert [event["type"] for event in events] == ["chunk", "done"]
+    assert events[0]["text"] == events[1]["contract"]
+    assert "REMEDIES FOR BREACH" in events[1]["contract"]
+    assert events[1]["metadata"]["assembly"]["clauses"] == 5
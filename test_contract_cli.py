@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+import config
+from contract_cli import load_checkpoint, parse_args, read_jobs, run_batch
+from mock_server import MockServer, MockServerConfig
+
+NDA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+def write_jobs(path, jobs):
+    path.write_text("".join(json.dumps(job) + "\n" for job in jobs), encoding="utf-8")
+
+
+def run_against_mock(argv):
+    async def scenario():
+        async with MockServer(MockServerConfig(latency_ms=5, latency_sigma=0, output_words=50)) as mock:
+            config.configure(api_key="test", api_base_url=mock.base_url + "/v1")
+            try:
+                return await run_batch(parse_args(argv))
+            finally:
+                config.reset_settings()
+
+    return asyncio.run(scenario())
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+@pytest.mark.parametrize("value", ["0", "-2", "many"])
+def test_concurrency_must_be_a_positive_int(value, capsys):
+    with pytest.raises(SystemExit):
+        parse_args(["batch", "jobs.jsonl", "-c", value])
+    assert "--concurrency" in capsys.readouterr().err
+    assert parse_args(["batch", "jobs.jsonl", "-c", "3"]).concurrency == 3
+
+
+def test_read_jobs_from_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "jobs.jsonl"
+    jsonl.write_text(json.dumps({"id": "a", "contract_type": "nda", "form_data": NDA}) + "\n\nnot json\n", encoding="utf-8")
+    jobs = read_jobs(str(jsonl))
+    assert jobs[0] == {"id": "a", "contract_type": "nda", "form_data": NDA}
+    assert jobs[1]["id"] == "3" and "Invalid job on line 3" in jobs[1]["error"]
+
+    csv_file = tmp_path / "jobs.csv"
+    csv_file.write_text("contract_type,disclosing_party,term\nnda,Acme,\n", encoding="utf-8")
+    assert read_jobs(str(csv_file)) == [{"id": "1", "contract_type": "nda", "form_data": {"disclosing_party": "Acme"}}]
+
+
+def test_batch_checkpoints_successes_and_resumes_failures(tmp_path):
+    jobs_path = tmp_path / "jobs.jsonl"
+    output = tmp_path / "out.jsonl"
+    write_jobs(jobs_path, [
+        {"id": "one", "contract_type": "nda", "form_data": NDA},
+        {"id": "two", "contract_type": "nda", "form_data": {"disclosing_party": "Missing fields"}},
+        {"id": "three", "contract_type": "nda", "form_data": dict(NDA, term="3 years")}
+    ])
+    argv = ["batch", str(jobs_path), "-o", str(output), "--no-progress", "-c", "2"]
+
+    assert run_against_mock(argv) == 1
+    records = {record["id"]: record for record in read_output(output)}
+    assert {job_id: record["success"] for job_id, record in records.items()} == {"one": True, "two": False, "three": True}
+    assert "Innovation Labs LLC" in records["one"]["contract"]
+    assert load_checkpoint(f"{output}.checkpoint") == {"one", "three"}
+
+    # The failed job is fixed and only it is generated again; earlier results are kept
+    write_jobs(jobs_path, [
+        {"id": "one", "contract_type": "nda", "form_data": NDA},
+        {"id": "two", "contract_type": "nda", "form_data": dict(NDA, disclosing_party="Fixed Ltd")},
+        {"id": "three", "contract_type": "nda", "form_data": dict(NDA, term="3 years")}
+    ])
+    assert run_against_mock(argv + ["--resume"]) == 0
+    records = read_output(output)
+    assert [record["id"] for record in records[3:]] == ["two"]
+    assert records[3]["success"] is True
+    assert load_checkpoint(f"{output}.checkpoint") == {"one", "two", "three"}
+
+
+def test_batch_writes_one_file_per_job(tmp_path):
+    jobs_path = tmp_path / "jobs.jsonl"
+    write_jobs(jobs_path, [{"id": "a/b", "contract_type": "nda", "form_data": NDA}])
+    output = tmp_path / "contracts"
+    assert run_against_mock(["batch", str(jobs_path), "-o", str(output), "--output-dir", "--no-progress"]) == 0
+    record = json.loads((output / "a_b.json").read_text(encoding="utf-8"))
+    assert record["success"] is True
+    assert load_checkpoint(str(output / ".checkpoint")) == {"a/b"}
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+
+from circuit_breaker import CircuitBreakers
+from contract_generator import ContractGenerator
+from contract_server import ContractService
+from job_store import JobQueue, JobStore
+from metrics import InProcessMetrics
+from model_router import ModelRouter
+from transport import AsyncTransport
+
+NDA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+class StalledTransport(AsyncTransport):
+    """Never answers, so submitted jobs stay running or queued."""
+
+    async def post(self, url, headers, json_body=None, content=None):
+        await asyncio.Event().wait()
+
+
+def open_circuit(breakers, name, open_seconds=None):
+    breaker = breakers.get(name)
+    if open_seconds is not None:
+        breaker.open_seconds = open_seconds
+    breaker.acquire()
+    breaker.record(True, 0.1)
+
+
+def test_healthz_is_degraded_while_generation_is_still_possible():
+    async def scenario():
+        breakers = CircuitBreakers(min_calls=1, window_size=1, open_seconds=30)
+        router = ModelRouter(default_model="primary", fallbacks=["fallback"])
+        generator = ContractGenerator(api_key="test", metrics=InProcessMetrics(), breakers=breakers, router=router)
+        responses = []
+        async with ContractService(generator=generator, port=0) as service:
+            async with httpx.AsyncClient(base_url=service.base_url) as client:
+                responses.append(await client.get("/healthz"))
+                open_circuit(breakers, "backend:contracts.example.com")
+                open_circuit(breakers, "gemini:primary")
+                responses.append(await client.get("/healthz"))
+                open_circuit(breakers, "gemini:fallback", open_seconds=10)
+                responses.append(await client.get("/healthz"))
+        await generator.aclose()
+        return responses
+
+    healthy, degraded, unavailable = asyncio.run(scenario())
+    assert healthy.status_code == 200
+    assert healthy.json()["status"] == "ok"
+    # The backend circuit and a primary model with a working fallback only degrade the service
+    assert degraded.status_code == 200
+    assert degraded.json()["status"] == "degraded"
+    assert "Retry-After" not in degraded.headers
+    assert unavailable.status_code == 503
+    assert unavailable.json()["status"] == "unavailable"
+    # Until the first model circuit lets a trial call through
+    assert 9 <= int(unavailable.headers["Retry-After"]) <= 10
+
+
+def test_jobs_are_refused_once_the_job_queue_is_full(tmp_path):
+    async def scenario():
+        generator = ContractGenerator(api_key="test", transport=StalledTransport(), metrics=InProcessMetrics())
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        jobs = JobQueue(generator, store, workers=1, max_queued=1)
+        statuses = []
+        async with ContractService(generator=generator, port=0, jobs=jobs, retry_after=2) as service:
+            async with httpx.AsyncClient(base_url=service.base_url) as client:
+                for _ in range(3):
+                    response = await client.post("/jobs", json={"contract_type": "nda", "form_data": NDA, "use_cache": False})
+                    statuses.append(response.status_code)
+                    # Let the worker pick up the first job
+                    await asyncio.sleep(0.05)
+        await store.aclose()
+        await generator.aclose()
+        return statuses, response
+
+    statuses, refused = asyncio.run(scenario())
+    assert statuses == [202, 202, 503]
+    assert refused.headers["Retry-After"] == "2"
@@ -0,0 +1,74 @@
+import pytest
+
+from contract_generator import ContractGenerator
+from form_validation import FormValidation, get_default_validation
+from metrics import InProcessMetrics
+from template_registry import CompiledTemplate
+
+TEMPLATE = CompiledTemplate("memo", "To {recipient} about {subject} ({amount}). {notes}", ["notes"])
+
+NDA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+def validate(form_data, **settings):
+    return FormValidation(**settings).validate(TEMPLATE, form_data)
+
+
+def test_values_are_normalized_and_optional_fields_filled_in():
+    result = validate({"recipient": "  Ann Lee ", "subject": "Rent", "amount": 1500})
+    assert result == {"recipient": "Ann Lee", "subject": "Rent", "amount": "1500", "notes": ""}
+
+
+def test_missing_required_fields_are_listed():
+    with pytest.raises(ValueError) as info:
+        validate({"subject": "Rent"})
+    assert str(info.value) == "Missing required fields: recipient, amount"
+
+
+def test_each_invalid_field_is_described():
+    with pytest.raises(ValueError) as info:
+        validate({"recipient": "   ", "subject": "x" * 11, "amount": ["1500"], "cc": "Bob"},
+                 max_field_length=10)
+    message = str(info.value)
+    assert message.startswith("Invalid form data: ")
+    assert "recipient: must not be empty" in message
+    assert "subject: longer than 10 characters" in message
+    assert "amount: " in message
+    assert "cc: unknown field" in message
+
+
+def test_booleans_are_not_numbers_and_form_data_must_be_a_dict():
+    with pytest.raises(ValueError, match="amount"):
+        validate({"recipient": "Ann", "subject": "Rent", "amount": True})
+    with pytest.raises(ValueError, match="Form data must be a dictionary"):
+        validate([("recipient", "Ann")])
+
+
+def test_field_limits_override_the_default_length():
+    validation = FormValidation(max_field_length=5, field_limits={"notes": 20})
+    assert validation.max_length("notes") == 20
+    assert validation.validate(TEMPLATE, {"recipient": "Ann", "subject": "Rent", "amount": "1", "notes": "x" * 20})
+    # Models are compiled once per template
+    assert validation.model_for(TEMPLATE) is validation.model_for(TEMPLATE)
+    assert get_default_validation() is get_default_validation()
+
+
+def test_generator_reports_each_invalid_job_without_calling_the_model():
+    generator = ContractGenerator(api_key="test", metrics=InProcessMetrics())
+    results = generator.validate_many([
+        {"contract_type": "nda", "form_data": dict(NDA, purpose=" Evaluation ")},
+        {"contract_type": "lease", "form_data": NDA},
+        {"form_data": NDA},
+        ("nda", {"disclosing_party": "Acme"})
+    ])
+    assert [result["valid"] for result in results] == [True, False, False, False]
+    assert results[0]["form_data"]["purpose"] == "Evaluation"
+    assert results[0]["form_data"]["additional_terms"] == ""
+    assert results[1]["error"] == "Invalid contract type: lease"
+    assert results[2]["error"] == "Job is missing 'contract_type'"
+    assert results[3]["error"].startswith("Missing required fields: receiving_party")
@@ -0,0 +1,63 @@
+import asyncio
+
+from http_server import HTTPServer
+
+
+class EchoServer(HTTPServer):
+    async def handle(self, request, response):
+        await response.send(200, request.body, {"X-Headers": str(len(request.headers))})
+
+
+def exchange(chunks, pause=0.0, **settings):
+    """Send `chunks` with `pause` seconds between them and return everything the server answers."""
+    async def scenario():
+        async with EchoServer(**settings) as server:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            try:
+                for chunk in chunks:
+                    writer.write(chunk)
+                    await writer.drain()
+                    await asyncio.sleep(pause)
+            except ConnectionError:
+                pass
+            answer = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return answer
+
+    return asyncio.run(scenario())
+
+
+def status_of(answer):
+    return int(answer.split(b" ", 2)[1]) if answer else None
+
+
+def test_request_within_limits_is_served():
+    answer = exchange([b"POST / HTTP/1.1\r\nContent-Length: 5\r\nConnection: close\r\n\r\nhello"])
+    assert status_of(answer) == 200
+    assert b"X-Headers: 2" in answer
+    assert answer.endswith(b"hello")
+
+
+def test_slow_headers_get_408():
+    # Each header alone arrives in time, the whole head does not
+    chunks = [b"GET / HTTP/1.1\r\n", b"Host: a\r\n", b"Accept: */*\r\n"]
+    assert status_of(exchange(chunks, pause=0.08, header_timeout=0.2)) == 408
+
+
+def test_slow_body_gets_408():
+    chunks = [b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\nhello"]
+    assert status_of(exchange(chunks, pause=0.2, body_timeout=0.1)) == 408
+
+
+def test_too_many_or_too_large_headers_get_431():
+    many = b"GET / HTTP/1.1\r\n" + b"".join(b"X-%d: 1\r\n" % index for index in range(11)) + b"\r\n"
+    assert status_of(exchange([many], max_headers=10)) == 431
+    large = b"GET / HTTP/1.1\r\nCookie: " + b"a" * 2000 + b"\r\n\r\n"
+    assert status_of(exchange([large], max_header_bytes=1024)) == 431
+    # Beyond the stream buffer limit as well
+    huge = b"GET / HTTP/1.1\r\nCookie: " + b"a" * 100000 + b"\r\n\r\n"
+    assert status_of(exchange([huge])) == 431
+
+
+def test_idle_connection_is_closed_without_a_response():
+    assert exchange([b""], keepalive_timeout=0.05) == b""
@@ -0,0 +1,169 @@
+import asyncio
+
+from job_store import DONE, FAILED, QUEUED, RUNNING, JobQueue, JobStore
+from metrics import InProcessMetrics
+
+
+class EchoGenerator:
+    def __init__(self):
+        self.metrics = InProcessMetrics()
+        self.calls = []
+
+    def validate_form_data(self, contract_type, form_data):
+        if contract_type != "nda":
+            raise ValueError(f"Unknown contract type: {contract_type}")
+        return form_data
+
+    async def generate_contract(self, contract_type, form_data, use_cache=True, timeout=None):
+        self.calls.append((contract_type, form_data, use_cache, timeout))
+        if form_data.get("fail"):
+            raise Exception("Error generating contract: boom")
+        return {"contract": f"NDA for {form_data['party']}", "metadata": {"contract_type": contract_type}}
+
+
+def test_jobs_left_running_by_a_crash_are_requeued(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def scenario():
+        store = JobStore(path)
+        running = await store.add("nda", {"party": "A"}, use_cache=False, timeout=5.0)
+        queued = await store.add("nda", {"party": "B"})
+        assert (await store.claim(running))["form_data"] == {"party": "A"}
+        # Claimed once only
+        assert await store.claim(running) is None
+        # The process dies without finishing the job
+        await store.aclose()
+
+        store = JobStore(path)
+        requeued = await store.requeue_interrupted(max_attempts=3)
+        status = await store.status(running)
+        order = await store.queued()
+        await store.aclose()
+        return requeued, status, order, [running, queued]
+
+    requeued, status, order, ids = asyncio.run(scenario())
+    assert requeued == 1
+    assert status["status"] == QUEUED
+    assert status["attempts"] == 1
+    assert status["started_at"] is None
+    assert (status["use_cache"], status["timeout"]) == (False, 5.0)
+    assert order == ids
+
+
+def test_job_interrupted_too_often_is_failed(tmp_path):
+    async def scenario():
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        job_id = await store.add("nda", {"party": "A"})
+        for _ in range(2):
+            await store.claim(job_id)
+            await store.requeue_interrupted(max_attempts=2)
+        status = await store.status(job_id)
+        counts = await store.counts()
+        await store.aclose()
+        return status, counts
+
+    status, counts = asyncio.run(scenario())
+    assert status["status"] == FAILED
+    assert status["attempts"] == 2
+    assert "restart" in status["error"]
+    assert counts == {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 1}
+
+
+def test_results_are_stored_and_purged(tmp_path):
+    async def scenario():
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        done = await store.add("nda", {"party": "A"})
+        failed = await store.add("nda", {"party": "B"})
+        for job_id in (done, failed):
+            await store.claim(job_id)
+        await store.finish(done, result={"contract": "text", "metadata": {}})
+        await store.finish(failed, error="boom")
+        before = (await store.result(done), await store.result(failed), (await store.status(failed))["error"])
+        kept = await store.purge(older_than=60)
+        purged = await store.purge(older_than=0)
+        after = await store.status(done)
+        await store.aclose()
+        return before, kept, purged, after
+
+    before, kept, purged, after = asyncio.run(scenario())
+    assert before == ({"contract": "text", "metadata": {}}, None, "boom")
+    assert (kept, purged) == (0, 2)
+    assert after is None
+
+
+def test_queue_resumes_jobs_from_an_earlier_run(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def scenario():
+        store = JobStore(path)
+        interrupted = await store.add("nda", {"party": "A"})
+        waiting = await store.add("nda", {"party": "B"})
+        await store.claim(interrupted)
+        await store.aclose()
+
+        generator = EchoGenerator()
+        store = JobStore(path)
+        async with JobQueue(generator, store=store, workers=2) as jobs:
+            failing = await jobs.submit("nda", {"party": "C", "fail": True})
+            await jobs.join()
+            results = [await jobs.result(job_id) for job_id in (interrupted, waiting, failing)]
+            statuses = [(await jobs.status(job_id))["status"] for job_id in (interrupted, waiting, failing)]
+            stats = await jobs.stats()
+        await store.aclose()
+        return results, statuses, stats, len(generator.calls)
+
+    results, statuses, stats, calls = asyncio.run(scenario())
+    assert [result and result["contract"] for result in results] == ["NDA for A", "NDA for B", None]
+    assert statuses == [DONE, DONE, FAILED]
+    assert (stats["done"], stats["failed"], stats["running"]) == (2, 1, 0)
+    assert calls == 3
+
+
+def test_submit_refuses_jobs_beyond_max_queued(tmp_path):
+    async def scenario():
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        generator = EchoGenerator()
+        # Not started, so nothing leaves the queue
+        jobs = JobQueue(generator, store=store, max_queued=2)
+        for party in ("A", "B"):
+            await jobs.submit("nda", {"party": party})
+        try:
+            await jobs.submit("nda", {"party": "C"})
+        except asyncio.QueueFull:
+            refused = True
+        else:
+            refused = False
+        counts = await store.counts()
+        await store.aclose()
+        return refused, counts, generator.metrics.snapshot()["counters"]
+
+    refused, counts, counters = asyncio.run(scenario())
+    assert refused
+    assert counts[QUEUED] == 2
+    assert {"counter": "jobs", "labels": {"contract_type": "nda", "outcome": "rejected"}, "value": 1} in counters
+
+
+def test_running_queue_purges_expired_jobs(tmp_path):
+    async def scenario():
+        store = JobStore(str(tmp_path / "jobs.sqlite3"))
+        generator = EchoGenerator()
+        old = await store.add("nda", {"party": "A"})
+        await store.claim(old)
+        await store.finish(old, result={"contract": "text", "metadata": {}})
+        await asyncio.sleep(0.25)
+        async with JobQueue(generator, store=store, retention=0.2, purge_interval=0.01) as jobs:
+            recent = await jobs.submit("nda", {"party": "B"})
+            await jobs.join()
+            await asyncio.sleep(0.02)
+            # The new job is not old enough yet; the earlier one is gone
+            kept = (await jobs.status(old), await jobs.status(recent))
+            await asyncio.sleep(0.3)
+            purged = await jobs.status(recent)
+        await store.aclose()
+        return kept, purged, generator.metrics.snapshot()["counters"]
+
+    (old, recent), purged, counters = asyncio.run(scenario())
+    assert old is None
+    assert recent["status"] == DONE
+    assert purged is None
+    assert sum(entry["value"] for entry in counters if entry["counter"] == "jobs_purged") == 2
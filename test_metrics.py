@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+from contract_generator import ContractGenerator
+from metrics import Histogram, InProcessMetrics, MetricsHook, PrometheusExporter
+from retry import RetryPolicy
+from transport import AsyncTransport, TransportResponse
+
+FORM_DATA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+class StatusTransport(AsyncTransport):
+    """Answers every request with the same status and body."""
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def post(self, url, headers, json_body=None, content=None):
+        return TransportResponse(self.status, {}, json.dumps(self.body).encode("utf-8"), {"ttfb": 0.002})
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram((0.1, 0.2, 0.4))
+    assert histogram.quantile(0.5) is None
+    for value in (0.05, 0.15, 0.15, 0.3):
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(0.65)
+    assert histogram.quantile(0.5) == pytest.approx(0.15)
+    assert histogram.quantile(1.0) == pytest.approx(0.4)
+
+
+def test_timer_reports_labels_added_inside_the_block():
+    metrics = InProcessMetrics()
+    with metrics.timer("backend_submit", endpoint="backend") as extra:
+        extra["status"] = 201
+    stage = metrics.snapshot()["stages"][0]
+    assert stage["stage"] == "backend_submit"
+    assert stage["labels"] == {"endpoint": "backend", "status": "201"}
+    assert stage["count"] == 1
+    # The base hook discards everything
+    with MetricsHook().timer("validate"):
+        pass
+
+
+def test_prometheus_output():
+    metrics = InProcessMetrics(buckets=(0.1, 1.0))
+    metrics.observe("generate", 0.05, contract_type="nda")
+    metrics.observe("generate", 0.5, contract_type="nda")
+    metrics.increment("errors", endpoint="gemini", error="http_5xx")
+    metrics.increment("tokens", 1.5, kind='say "hi"\n')
+    text = PrometheusExporter(metrics, prefix="app").render()
+    assert text.splitlines() == [
+        "# HELP app_stage_seconds Latency of ContractGenerator call stages.",
+        "# TYPE app_stage_seconds histogram",
+        'app_stage_seconds_bucket{stage="generate",contract_type="nda",le="0.1"} 1',
+        'app_stage_seconds_bucket{stage="generate",contract_type="nda",le="1.0"} 2',
+        'app_stage_seconds_bucket{stage="generate",contract_type="nda",le="+Inf"} 2',
+        'app_stage_seconds_sum{stage="generate",contract_type="nda"} 0.55',
+        'app_stage_seconds_count{stage="generate",contract_type="nda"} 2',
+        "# TYPE app_errors_total counter",
+        'app_errors_total{endpoint="gemini",error="http_5xx"} 1',
+        "# TYPE app_tokens_total counter",
+        'app_tokens_total{kind="say \\"hi\\"\\n"} 1.5',
+    ]
+    assert PrometheusExporter(InProcessMetrics()).render() == "\n"
+
+
+def error_counters(status, body, contract_type="nda"):
+    async def scenario():
+        metrics = InProcessMetrics()
+        generator = ContractGenerator(
+            api_key="test", transport=StatusTransport(status, body), metrics=metrics,
+            retry_policy=RetryPolicy(max_attempts=1)
+        )
+        with pytest.raises(Exception):
+            await generator.generate_contract(contract_type, FORM_DATA)
+        return [
+            counter["labels"]["error"] for counter in metrics.snapshot()["counters"] if counter["counter"] == "errors"
+        ]
+
+    return asyncio.run(scenario())
+
+
+def test_errors_are_labelled_by_failure_kind():
+    assert error_counters(400, {"error": {"message": "bad field"}}) == ["http_4xx"]
+    assert error_counters(500, {"error": {"message": "oops"}}) == ["http_5xx"]
+    assert error_counters(200, {"candidates": []}) == ["empty_response"]
+    assert error_counters(200, {"candidates": [{"content": {"parts": [{"text": "NDA"}]}}]}, "lease") == ["invalid_request"]
+
+
+def test_successful_generation_reports_stages_and_counters():
+    async def scenario():
+        metrics = InProcessMetrics()
+        body = {"candidates": [{"content": {"parts": [{"text": "NDA"}]}}],
+                "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 5, "totalTokenCount": 15}}
+        async with ContractGenerator(api_key="test", transport=StatusTransport(200, body), metrics=metrics) as generator:
+            await generator.generate_contract("nda", FORM_DATA)
+        return metrics.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    stages = {stage["stage"] for stage in snapshot["stages"]}
+    assert {"validate", "render", "ttfb", "parse", "generate"} <= stages
+    counters = {(counter["counter"], counter["labels"].get("kind")): counter["value"] for counter in snapshot["counters"]}
+    assert counters[("tokens", "output")] == 5
+    assert counters[("tokens", "prompt")] == 10
@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pytest
+
+from contract_generator import ContractGenerator
+from metrics import InProcessMetrics
+from model_router import ModelRouter
+from retry import RetryPolicy
+from transport import AsyncTransport, TransportResponse
+
+NDA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+class ModelTransport(AsyncTransport):
+    """Answers each model with its own (status, delay) and records the URLs called."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.urls = []
+
+    async def post(self, url, headers, json_body=None, content=None):
+        self.urls.append(url)
+        model = url.split("/models/", 1)[1].split(":", 1)[0]
+        status, delay = self.behaviour.get(model, (200, 0.0))
+        await asyncio.sleep(delay)
+        if status != 200:
+            return TransportResponse(status, {}, json.dumps({"error": {"message": f"{model} failed"}}).encode("utf-8"))
+        body = {
+            "candidates": [{"content": {"parts": [{"text": f"NDA by {model}"}]}}],
+            "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 5, "totalTokenCount": 15}
+        }
+        return TransportResponse(200, {}, json.dumps(body).encode("utf-8"))
+
+
+def generate(router, behaviour):
+    async def scenario():
+        transport = ModelTransport(behaviour)
+        metrics = InProcessMetrics()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=metrics, router=router,
+                                     retry_policy=RetryPolicy(max_attempts=1)) as generator:
+            try:
+                result = await generator.generate_contract("nda", NDA, use_cache=False)
+            except Exception as e:
+                result = e
+        return result, transport.urls, metrics.snapshot()["counters"]
+
+    return asyncio.run(scenario())
+
+
+def counter(counters, name, **labels):
+    return sum(entry["value"] for entry in counters
+               if entry["counter"] == name and all(entry["labels"].get(key) == value for key, value in labels.items()))
+
+
+def test_route_prefers_contract_model_then_size_tier_then_default():
+    router = ModelRouter(default_model="pro", contract_models={"nda": "nda-model"},
+                         size_tiers=[(2000, "flash"), (500, "lite")], fallbacks=["pro", "backup", "backup"])
+    assert router.route("nda", 100) == ["nda-model", "pro", "backup"]
+    assert router.route("lease", 100) == ["lite", "pro", "backup"]
+    assert router.route("lease", 1000) == ["flash", "pro", "backup"]
+    assert router.route("lease", 5000) == ["pro", "backup"]
+    assert router.models() == ["pro", "nda-model", "lite", "flash", "backup"]
+
+
+def test_hedge_delay_uses_observed_latency_once_there_are_enough_samples():
+    router = ModelRouter(hedge_percentile=0.5, hedge_after=2.0, hedge_min_samples=3)
+    assert router.hedge_delay("flash") == 2.0
+    for seconds in (0.1, 0.2, 0.3):
+        router.observe("flash", seconds)
+    assert router.hedge_delay("flash") < 2.0
+    assert ModelRouter().hedge_delay("flash") is None
+    with pytest.raises(ValueError):
+        ModelRouter(hedge_percentile=1.5)
+
+
+def test_failover_status_moves_the_request_to_the_next_model():
+    router = ModelRouter(default_model="primary", fallbacks=["secondary"],
+                         endpoints={"secondary": "https://other.test/v1/"})
+    result, urls, counters = generate(router, {"primary": (503, 0.0)})
+    assert result["contract"] == "NDA by secondary"
+    assert (result["metadata"]["model"], result["metadata"]["failover"]) == ("secondary", True)
+    assert urls[1].startswith("https://other.test/v1/models/secondary:generateContent")
+    assert counter(counters, "failovers", model="primary", reason="503") == 1
+
+
+def test_other_errors_do_not_fail_over():
+    router = ModelRouter(default_model="primary", fallbacks=["secondary"])
+    error, urls, _ = generate(router, {"primary": (400, 0.0)})
+    assert "primary failed" in str(error)
+    assert len(urls) == 1
+
+
+def test_slow_call_is_hedged_and_the_first_good_answer_wins():
+    router = ModelRouter(default_model="slow", hedge_after=0.02, hedge_model="fast")
+    result, urls, counters = generate(router, {"slow": (200, 0.5)})
+    assert result["contract"] == "NDA by fast"
+    assert (result["metadata"]["model"], result["metadata"]["hedged"]) == ("fast", True)
+    assert counter(counters, "hedges", model="slow") == 1
+    assert len(urls) == 2
+
+
+def test_fast_call_is_not_hedged():
+    router = ModelRouter(default_model="primary", hedge_after=0.5)
+    result, urls, _ = generate(router, {})
+    assert result["metadata"]["hedged"] is False
+    assert len(urls) == 1
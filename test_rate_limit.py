@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from config import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE, Settings
+from contract_generator import ContractGenerator
+from rate_limit import AdaptiveConcurrency, RateLimiter, TokenBucket
+
+
+def test_token_bucket_waits_for_refill():
+    async def scenario():
+        # 10 tokens per second, 2 in the bucket
+        bucket = TokenBucket(per_minute=600, capacity=2)
+        started = time.monotonic()
+        await bucket.acquire(2)
+        burst = time.monotonic() - started
+        await bucket.acquire(1)
+        return burst, time.monotonic() - started
+
+    burst, waited = asyncio.run(scenario())
+    assert burst < 0.05
+    assert 0.08 <= waited < 0.5
+
+
+def test_token_bucket_admits_requests_larger_than_its_capacity():
+    async def scenario():
+        bucket = TokenBucket(per_minute=60_000, capacity=10)
+        await asyncio.wait_for(bucket.acquire(1_000), 1)
+        return bucket.tokens
+
+    assert asyncio.run(scenario()) < 1
+
+
+def test_token_bucket_rejects_a_zero_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(per_minute=0)
+
+
+def test_rate_limiter_charges_both_budgets():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=100, tokens_per_minute=10_000)
+        await limiter.acquire(tokens=2_500)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert 98.9 < stats["requests_available"] <= 99.1
+    assert 7_499 < stats["tokens_available"] <= 7_510
+
+
+def test_generator_applies_the_tier_quota_by_default():
+    generator = ContractGenerator(settings=Settings(api_key="test"))
+    assert generator.rate_limiter.requests.capacity == DEFAULT_REQUESTS_PER_MINUTE
+    assert generator.rate_limiter.tokens.capacity == DEFAULT_TOKENS_PER_MINUTE
+    unlimited = ContractGenerator(settings=Settings(api_key="test", requests_per_minute=0, tokens_per_minute=None))
+    assert unlimited.rate_limiter.stats() == {"requests_available": None, "tokens_available": None}
+
+
+def test_quota_is_read_from_the_environment(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "15")
+    monkeypatch.setenv("GEMINI_TOKENS_PER_MINUTE", "0")
+    settings = Settings.from_env(load_env_file=False)
+    assert (settings.requests_per_minute, settings.tokens_per_minute) == (15, 0)
+    monkeypatch.setenv("GEMINI_REQUESTS_PER_MINUTE", "lots")
+    with pytest.raises(ValueError):
+        Settings.from_env(load_env_file=False)
+
+
+def test_concurrency_halves_on_overload_and_grows_on_success():
+    async def scenario():
+        concurrency = AdaptiveConcurrency(initial_limit=8, min_limit=2, max_limit=9, cooldown=60)
+        limits = []
+        await concurrency.acquire()
+        await concurrency.release(429)
+        limits.append(concurrency.limit)
+        # Within the cooldown, further overload signals do not back off again
+        await concurrency.acquire()
+        await concurrency.release(503)
+        limits.append(concurrency.limit)
+        for _ in range(4):
+            await concurrency.acquire()
+            await concurrency.release(200)
+        limits.append(concurrency.limit)
+        # Server errors and calls without a response leave the limit alone
+        await concurrency.acquire()
+        await concurrency.release(500)
+        await concurrency.acquire()
+        await concurrency.release(None)
+        limits.append(concurrency.limit)
+        return limits
+
+    halved, unchanged, grown, after_errors = asyncio.run(scenario())
+    assert halved == unchanged == 4.0
+    # Each success adds 1 / limit, about one slot per round of calls
+    expected = 4.0
+    for _ in range(4):
+        expected += 1 / expected
+    assert grown == pytest.approx(expected)
+    assert after_errors == grown
+
+
+def test_concurrency_stays_within_its_bounds():
+    async def scenario():
+        concurrency = AdaptiveConcurrency(initial_limit=2, min_limit=2, max_limit=3, cooldown=0)
+        for status in (429, 429, 200, 200, 200, 200, 200):
+            await concurrency.acquire()
+            await concurrency.release(status)
+        return concurrency.limit
+
+    assert asyncio.run(scenario()) == 3.0
+
+
+def test_concurrency_blocks_calls_beyond_the_limit():
+    async def scenario():
+        concurrency = AdaptiveConcurrency(initial_limit=2, min_limit=1, max_limit=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with concurrency.slot() as slot:
+                peak = max(peak, concurrency.in_flight)
+                await asyncio.sleep(0.01)
+                slot.status_code = 200
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        return peak, concurrency.stats()
+
+    peak, stats = asyncio.run(scenario())
+    assert peak == 2
+    assert stats == {"limit": 2, "in_flight": 0}
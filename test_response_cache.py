@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+from response_cache import MemoryCache, SQLiteCache, TieredCache, make_cache_key
+
+
+def test_cache_key_depends_on_endpoint_and_canonical_body():
+    body = {"contents": [{"parts": [{"text": "Draft an NDA"}]}], "generationConfig": {"temperature": 0.0}}
+    reordered = {"generationConfig": {"temperature": 0.0}, "contents": [{"parts": [{"text": "Draft an NDA"}]}]}
+    key = make_cache_key("https://api.test/models/flash:generateContent", body)
+    assert key == make_cache_key("https://api.test/models/flash:generateContent", reordered)
+    assert key != make_cache_key("https://api.test/models/pro:generateContent", body)
+    assert key != make_cache_key("https://api.test/models/flash:generateContent", dict(body, generationConfig={}))
+
+
+def test_memory_cache_evicts_least_recently_used():
+    async def scenario():
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", {"contract": "A"})
+        await cache.set("b", {"contract": "B"})
+        await cache.get("a")
+        await cache.set("c", {"contract": "C"})
+        return [await cache.get(key) for key in ("a", "b", "c")], cache.stats()
+
+    values, stats = asyncio.run(scenario())
+    assert values == [{"contract": "A"}, None, {"contract": "C"}]
+    assert stats["entries"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_memory_cache_keeps_to_its_byte_budget():
+    async def scenario():
+        cache = MemoryCache(max_bytes=100)
+        await cache.set("a", {"contract": "x" * 40})
+        await cache.set("b", {"contract": "y" * 40})
+        # Larger than the whole budget, so never stored
+        await cache.set("huge", {"contract": "z" * 200})
+        return await cache.get("a"), await cache.get("b"), await cache.get("huge"), cache.current_bytes
+
+    a, b, huge, current_bytes = asyncio.run(scenario())
+    assert a is None and huge is None
+    assert b == {"contract": "y" * 40}
+    assert 0 < current_bytes <= 100
+
+
+def test_memory_cache_entries_expire():
+    async def scenario():
+        cache = MemoryCache(ttl=0.05)
+        await cache.set("a", {"contract": "A"})
+        fresh = await cache.get("a")
+        await asyncio.sleep(0.06)
+        return fresh, await cache.get("a"), len(cache)
+
+    assert asyncio.run(scenario()) == ({"contract": "A"}, None, 0)
+
+
+def test_memory_cache_hits_are_independent_copies():
+    async def scenario():
+        cache = MemoryCache()
+        value = {"contract": "A", "metadata": {"model": "flash"}}
+        await cache.set("a", value)
+        value["contract"] = "changed after set"
+        first = await cache.get("a")
+        first["metadata"]["verification"] = {"ok": False}
+        return await cache.get("a")
+
+    assert asyncio.run(scenario()) == {"contract": "A", "metadata": {"model": "flash"}}
+
+
+def test_sqlite_cache_persists_and_expires(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+
+    async def scenario():
+        cache = SQLiteCache(path)
+        await cache.set("a", {"contract": "Ä"})
+        await cache.aclose()
+        reopened = SQLiteCache(path)
+        persisted = await reopened.get("a")
+        await reopened.aclose()
+
+        short = SQLiteCache(path, ttl=0.01)
+        await short.set("b", {"contract": "B"})
+        time.sleep(0.02)
+        expired = await short.get("b")
+        await short.aclose()
+        return persisted, expired
+
+    assert asyncio.run(scenario()) == ({"contract": "Ä"}, None)
+
+
+def test_tiered_cache_promotes_disk_hits_into_memory(tmp_path):
+    async def scenario():
+        disk = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+        await disk.set("a", {"contract": "A"})
+        cache = TieredCache(MemoryCache(), disk)
+        first = await cache.get("a")
+        second = await cache.get("a")
+        await cache.set("b", {"contract": "B"})
+        stats = cache.stats()
+        stored = await disk.get("b")
+        await cache.aclose()
+        return first, second, stats, stored
+
+    first, second, stats, stored = asyncio.run(scenario())
+    assert first == second == {"contract": "A"}
+    # The second read is served from memory without touching the disk
+    assert stats["memory"]["hits"] == 1
+    assert stats["disk"]["hits"] == 1
+    assert stored == {"contract": "B"}
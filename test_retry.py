@@ -0,0 +1,101 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from deadline import Deadline, deadline_scope
+from retry import RetryPolicy, RetryableResponse, parse_retry_after
+from transport import TransportError, TransportResponse
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(" 1.5 ") == 1.5
+    assert parse_retry_after("-4") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    in_ten = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 <= parse_retry_after(in_ten) <= 10
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def run_attempts(policy, responses):
+    """Run the policy over scripted outcomes; returns the attempt start times and the final error."""
+    starts = []
+
+    async def scenario():
+        async for attempt in policy.retrying():
+            with attempt:
+                starts.append(time.monotonic())
+                outcome = responses[len(starts) - 1]
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+
+    try:
+        return starts, asyncio.run(scenario())
+    except Exception as e:
+        return starts, e
+
+
+def retryable(status, headers=None):
+    return RetryableResponse(TransportResponse(status, headers or {}, b""))
+
+
+def test_retry_after_takes_precedence_over_backoff():
+    policy = RetryPolicy(max_attempts=2, backoff_base=0, backoff_cap=0)
+    starts, result = run_attempts(policy, [retryable(429, {"Retry-After": "0.2"}), "ok"])
+    assert result == "ok"
+    assert starts[1] - starts[0] >= 0.19
+
+
+def test_retry_after_is_ignored_when_not_respected():
+    policy = RetryPolicy(max_attempts=2, backoff_base=0, backoff_cap=0, respect_retry_after=False)
+    starts, result = run_attempts(policy, [retryable(503, {"Retry-After": "5"}), "ok"])
+    assert result == "ok"
+    assert starts[1] - starts[0] < 0.1
+
+
+def test_retry_after_wait_is_cut_at_the_call_deadline():
+    policy = RetryPolicy(max_attempts=2, backoff_base=0, backoff_cap=0)
+
+    async def scenario():
+        with deadline_scope(Deadline(0.2)):
+            started = time.monotonic()
+            try:
+                async for attempt in policy.retrying():
+                    with attempt:
+                        raise retryable(503, {"Retry-After": "30"})
+            except RetryableResponse:
+                return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1
+
+
+def test_last_retryable_response_is_reraised():
+    policy = RetryPolicy(max_attempts=3, backoff_base=0, backoff_cap=0)
+    last = retryable(503)
+    starts, result = run_attempts(policy, [retryable(503), retryable(503), last])
+    assert len(starts) == 3
+    assert result is last
+
+
+def test_connection_errors_are_retried_only_when_enabled():
+    starts, result = run_attempts(RetryPolicy(backoff_base=0), [TransportError("reset"), "ok"])
+    assert (len(starts), result) == (2, "ok")
+    starts, result = run_attempts(RetryPolicy(backoff_base=0, retry_connection_errors=False), [TransportError("reset")])
+    assert len(starts) == 1
+    assert isinstance(result, TransportError)
+
+
+def test_other_errors_are_not_retried():
+    starts, result = run_attempts(RetryPolicy(backoff_base=0), [ValueError("bad"), "ok"])
+    assert len(starts) == 1
+    assert isinstance(result, ValueError)
+
+
+def test_max_attempts_must_be_positive():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
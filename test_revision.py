@@ -0,0 +1,99 @@
+from revision import detail_fields, patch_value, plan_revision, section_diff, split_sections
+from template_registry import get_default_registry
+
+TEMPLATE = get_default_registry().get("tenancy_agreement")
+
+FORM_DATA = {
+    "landlord_name": "Alice Brown",
+    "tenant_name": "Bob Green",
+    "property_address": "12 High Street, London",
+    "rent_amount": "$1,500",
+    "term": "12 months"
+}
+
+CONTRACT = """RESIDENTIAL TENANCY AGREEMENT
+
+This agreement is made between Alice Brown ("Landlord") and Bob Green ("Tenant").
+
+1. PROPERTY
+The Landlord lets the property at 12 High Street, London to the Tenant.
+
+2. RENT
+The Tenant shall pay $1,500 per month.
+
+3. TERM
+The tenancy runs for 12 months.
+
+IN WITNESS WHEREOF, signed by ALICE BROWN and BOB GREEN.
+"""
+
+SECTIONS = split_sections(CONTRACT)
+
+
+def plan(**changes):
+    return plan_revision(TEMPLATE, SECTIONS, FORM_DATA, dict(FORM_DATA, **changes))
+
+
+def test_split_sections_keeps_the_text():
+    assert [section["heading"] for section in SECTIONS] == [
+        "RESIDENTIAL TENANCY AGREEMENT", "1. PROPERTY", "2. RENT", "3. TERM"
+    ]
+    assert "".join(section["text"] for section in SECTIONS) == CONTRACT
+
+
+def test_detail_fields_reads_labels_and_kinds():
+    fields = detail_fields(TEMPLATE)
+    assert fields["landlord_name"] == ("Landlord", "name")
+    assert fields["rent_amount"] == ("Rent Amount", "amount")
+    assert fields["property_address"] == ("Property Address", "address")
+
+
+def test_unchanged_form_data_needs_no_work():
+    result = plan(tenant_name="  Bob Green ")
+    assert result["mode"] == "unchanged"
+    assert result["changed_fields"] == []
+
+
+def test_names_are_patched_in_place():
+    result = plan(tenant_name="Carol White")
+    assert result["mode"] == "sections"
+    assert result["fields"] == {"tenant_name": "patched"}
+    assert result["patch"] == ["tenant_name"]
+    assert result["regenerate"] == {}
+
+
+def test_amounts_regenerate_only_the_sections_that_mention_them():
+    result = plan(rent_amount="$1,750", tenant_name="Carol White")
+    assert result["mode"] == "sections"
+    assert result["fields"] == {"tenant_name": "patched", "rent_amount": "regenerated"}
+    rent = next(index for index, section in enumerate(SECTIONS) if section["heading"] == "2. RENT")
+    assert result["regenerate"] == {rent: ["rent_amount"]}
+
+
+def test_added_cleared_or_unlocatable_fields_regenerate_everything():
+    added = plan(additional_terms="No pets")
+    assert added["mode"] == "full"
+    assert added["fields"] == {"additional_terms": "full"}
+    assert plan(term="")["mode"] == "full"
+    # The model wrote the previous term differently, so it cannot be found
+    reworded = plan_revision(TEMPLATE, split_sections(CONTRACT.replace("12 months", "twelve months")),
+                             FORM_DATA, dict(FORM_DATA, term="24 months"))
+    assert reworded["mode"] == "full"
+    assert reworded["patch"] == [] and reworded["regenerate"] == {}
+
+
+def test_patch_value_keeps_upper_case_renderings():
+    patched = patch_value(CONTRACT, "Bob Green", "Carol White")
+    assert "and Carol White (" in patched
+    assert "BOB GREEN" not in patched and "CAROL WHITE" in patched
+
+
+def test_patch_value_matches_whole_words_across_line_breaks():
+    assert patch_value("Ann and Annual\nAnn\n  Smith", "Ann Smith", "Jo Lee") == "Ann and Annual\nJo Lee"
+
+
+def test_section_diff_reports_modified_added_and_removed_sections():
+    before = split_sections("1. RENT\n$1,500\n\n2. TERM\n12 months\n\n3. DEPOSIT\nNone\n")
+    after = split_sections("1. RENT\n$1,750\n\n3. DEPOSIT\nNone\n\n4. PETS\nNo pets\n")
+    changes = [(change["change"], change["heading"], change["index"]) for change in section_diff(before, after)]
+    assert changes == [("modified", "1. RENT", 0), ("removed", "2. TERM", None), ("added", "4. PETS", 2)]
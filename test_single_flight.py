@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from contract_generator import ContractGenerator
+from deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+from metrics import InProcessMetrics
+from mock_server import MockServer, MockServerConfig
+from single_flight import SingleFlight
+
+FORM_DATA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+def test_shared_call_does_not_inherit_first_callers_deadline():
+    async def scenario():
+        flight = SingleFlight()
+        seen = []
+
+        async def work():
+            seen.append(current_deadline())
+            await asyncio.sleep(0.3)
+            return "done"
+
+        async def call(timeout):
+            with deadline_scope(Deadline(timeout)):
+                return await flight.do("key", work)
+
+        short, long = await asyncio.gather(call(0.05), call(5), return_exceptions=True)
+        return seen, short, long
+
+    seen, short, long = asyncio.run(scenario())
+    assert seen == [None]
+    assert isinstance(short, DeadlineExceeded)
+    assert long == ("done", True)
+
+
+def test_coalesced_generation_keeps_each_callers_timeout():
+    async def scenario():
+        async with MockServer(MockServerConfig(latency_ms=300, latency_sigma=0)) as mock:
+            async with ContractGenerator(api_key="test", metrics=InProcessMetrics()) as generator:
+                generator.api_base_url = mock.base_url + "/v1"
+                return await asyncio.gather(
+                    generator.generate_contract("nda", FORM_DATA, use_cache=False, timeout=0.1),
+                    generator.generate_contract("nda", FORM_DATA, use_cache=False, timeout=10),
+                    return_exceptions=True
+                )
+
+    short, long = asyncio.run(scenario())
+    assert isinstance(short, DeadlineExceeded)
+    assert not isinstance(long, BaseException)
+    assert long["metadata"]["coalesced"] is True
+    assert "Innovation Labs LLC" in long["contract"]
+
+
+def test_cancelling_one_caller_leaves_the_shared_call_running():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        return first.cancelled(), result, len(calls), flight.in_flight()
+
+    assert asyncio.run(scenario()) == (True, ("done", True), 1, 0)
+
+
+def test_shared_call_is_cancelled_when_every_caller_is():
+    async def scenario():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.ensure_future(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        return flight.in_flight()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_error_is_shared_and_the_key_is_forgotten():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do("key", failing), flight.do("key", failing), return_exceptions=True)
+        shared_calls = len(calls)
+        # Nothing is remembered, so the next caller runs the work again
+        with pytest.raises(ValueError):
+            await flight.do("key", failing)
+        return results, shared_calls, len(calls), flight.in_flight()
+
+    results, shared_calls, calls, in_flight = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert (shared_calls, calls, in_flight) == (1, 2, 0)
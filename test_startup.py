@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY = ("httpx", "pydantic", "tenacity")
+
+_PROBE = """
+import json, sys
+from config import configure
+configure(api_key="startup-test")
+import contract_generator
+from template_registry import get_default_registry
+generator = contract_generator.ContractGenerator()
+constructed = {"modules": [name for name in %(heavy)r if name in sys.modules],
+               "templates_loaded": get_default_registry()._templates is not None}
+generator.validate_form_data("nda", {"disclosing_party": "A", "receiving_party": "B", "purpose": "P", "term": "1 year"})
+validated = {"modules": [name for name in %(heavy)r if name in sys.modules],
+             "templates_loaded": get_default_registry()._templates is not None}
+print(json.dumps([constructed, validated]))
+"""
+
+
+def test_heavy_dependencies_load_on_first_use():
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE % {"heavy": HEAVY}],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout
+    constructed, validated = json.loads(output.strip().splitlines()[-1])
+    # Importing and constructing the generator pulls in neither the HTTP client nor the validators
+    assert constructed == {"modules": [], "templates_loaded": False}
+    # The first validation compiles the templates and the pydantic model; still no HTTP client
+    assert validated == {"modules": ["pydantic"], "templates_loaded": True}
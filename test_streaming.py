@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from contract_generator import ContractGenerator
+from contract_server import ContractService
+from metrics import InProcessMetrics
+from mock_server import MockServer, MockServerConfig
+from retry import RetryPolicy
+
+NDA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+def mock_config(**settings):
+    return MockServerConfig(**dict(dict(latency_ms=20, latency_sigma=0, output_words=120, stream_chunks=5), **settings))
+
+
+def test_chunks_arrive_in_order_before_one_done_event():
+    async def scenario():
+        async with MockServer(mock_config()) as mock:
+            async with ContractGenerator(api_key="test", api_base_url=mock.base_url + "/v1",
+                                         metrics=InProcessMetrics()) as generator:
+                streamed = [event async for event in generator.stream_contract("nda", NDA)]
+                replayed = [event async for event in generator.stream_contract("nda", NDA)]
+                generated = await generator.generate_contract("nda", NDA)
+            return streamed, replayed, generated, dict(mock.stats)
+
+    streamed, replayed, generated, counts = asyncio.run(scenario())
+    assert [event["type"] for event in streamed] == ["chunk"] * 5 + ["done"]
+    done = streamed[-1]
+    assert "".join(event["text"] for event in streamed[:-1]) == done["contract"]
+    assert "Disclosing Party: Innovation Labs LLC" in done["contract"]
+    assert done["metadata"]["cache_hit"] is False
+    assert done["metadata"]["token_usage"]["output_tokens"] > 0
+    # A cached contract comes back as one chunk, and non-streaming calls share the entry
+    assert [event["type"] for event in replayed] == ["chunk", "done"]
+    assert replayed[0]["text"] == done["contract"]
+    assert replayed[-1]["metadata"]["cache_hit"] is True
+    assert generated["contract"] == done["contract"]
+    assert counts.get("model_stream_200") == 1
+    assert counts.get("model_200") is None
+
+
+def test_error_status_ends_the_stream_with_an_exception():
+    async def scenario():
+        async with MockServer(mock_config(error_rate=1.0)) as mock:
+            async with ContractGenerator(api_key="test", api_base_url=mock.base_url + "/v1", metrics=InProcessMetrics(),
+                                         retry_policy=RetryPolicy(max_attempts=2, backoff_base=0.01)) as generator:
+                events = []
+                with pytest.raises(Exception, match="API request failed"):
+                    async for event in generator.stream_contract("nda", NDA):
+                        events.append(event)
+            return events, dict(mock.stats)
+
+    events, counts = asyncio.run(scenario())
+    assert events == []
+    assert counts["model_500"] == 2
+
+
+def test_service_relays_chunk_events_then_done():
+    async def scenario():
+        async with MockServer(mock_config(stream_chunks=3)) as mock:
+            generator = ContractGenerator(api_key="test", api_base_url=mock.base_url + "/v1", metrics=InProcessMetrics())
+            async with ContractService(generator=generator, port=0) as service:
+                async with httpx.AsyncClient(base_url=service.base_url) as client:
+                    async with client.stream("POST", "/generate/stream", json={"contract_type": "nda", "form_data": NDA}) as response:
+                        lines = [line async for line in response.aiter_lines()]
+            await generator.aclose()
+            return response, lines
+
+    response, lines = asyncio.run(scenario())
+    assert response.headers["content-type"] == "text/event-stream"
+    events = [line[len("event: "):] for line in lines if line.startswith("event: ")]
+    payloads = [json.loads(line[len("data: "):]) for line in lines if line.startswith("data: ")]
+    assert events == ["chunk", "chunk", "chunk", "done"]
+    assert "".join(payload["text"] for payload in payloads[:-1]) == payloads[-1]["contract"]
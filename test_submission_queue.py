@@ -0,0 +1,161 @@
+import asyncio
+import sqlite3
+
+from metrics import InProcessMetrics
+from submission_queue import SubmissionQueue, SubmissionSpool
+
+BACKEND_URL = "http://backend.test/contracts"
+
+
+class RecordingGenerator:
+    def __init__(self, release: asyncio.Event = None, failing: bool = False):
+        self.metrics = InProcessMetrics()
+        self.sent = []
+        self.release = release
+        self.failing = failing
+
+    async def send_contract_draft(self, contract_data, backend_url):
+        if self.release is not None:
+            await self.release.wait()
+        if self.failing:
+            raise Exception("Failed to send contract to backend: connection refused")
+        self.sent.append(contract_data["contract"])
+        return {"success": True}
+
+
+class SlowSpool(SubmissionSpool):
+    async def add(self, backend_url, contract_data):
+        row_id = await super().add(backend_url, contract_data)
+        # Leaves room for the replay loop to scan the spool before submit claims the row
+        await asyncio.sleep(0.05)
+        return row_id
+
+
+class FlakySpool(SubmissionSpool):
+    def __init__(self, path):
+        super().__init__(path)
+        self.remove_failures = 1
+
+    async def remove(self, row_ids):
+        if self.remove_failures:
+            self.remove_failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        await super().remove(row_ids)
+
+
+async def _drained(queue: SubmissionQueue) -> None:
+    while (await queue.spool.counts())["pending"]:
+        await asyncio.sleep(0.01)
+
+
+def test_replay_loop_does_not_resend_a_draft_being_submitted(tmp_path):
+    async def scenario():
+        generator = RecordingGenerator()
+        spool = SlowSpool(str(tmp_path / "spool.sqlite3"))
+        async with SubmissionQueue(generator, BACKEND_URL, spool=spool, retry_interval=0.01, bulk=False) as queue:
+            for number in range(3):
+                await queue.submit({"contract": f"draft {number}"})
+            await asyncio.wait_for(_drained(queue), 5)
+            await queue.join()
+        await spool.aclose()
+        return generator.sent
+
+    assert sorted(asyncio.run(scenario())) == ["draft 0", "draft 1", "draft 2"]
+
+
+def test_submit_does_not_wait_for_a_full_queue(tmp_path):
+    async def scenario():
+        release = asyncio.Event()
+        generator = RecordingGenerator(release)
+        spool = SubmissionSpool(str(tmp_path / "spool.sqlite3"))
+        queue = SubmissionQueue(generator, BACKEND_URL, spool=spool, max_size=1, workers=1, retry_interval=0.01, bulk=False)
+        async with queue:
+            try:
+                for number in range(4):
+                    await asyncio.wait_for(queue.submit({"contract": f"draft {number}"}), 1)
+            finally:
+                release.set()
+            await asyncio.wait_for(_drained(queue), 5)
+            await queue.join()
+        await spool.aclose()
+        return generator.sent
+
+    assert sorted(asyncio.run(scenario())) == ["draft 0", "draft 1", "draft 2", "draft 3"]
+
+
+def test_unsent_drafts_are_replayed_after_a_restart(tmp_path):
+    path = str(tmp_path / "spool.sqlite3")
+
+    async def scenario():
+        # The process stops before the workers send anything
+        spool = SubmissionSpool(path)
+        queue = SubmissionQueue(RecordingGenerator(), BACKEND_URL, spool=spool)
+        for number in range(2):
+            await queue.submit({"contract": f"draft {number}"})
+        await spool.aclose()
+
+        generator = RecordingGenerator()
+        spool = SubmissionSpool(path)
+        async with SubmissionQueue(generator, BACKEND_URL, spool=spool, bulk=False) as queue:
+            await asyncio.wait_for(_drained(queue), 5)
+            await queue.join()
+            stats = await queue.stats()
+        await spool.aclose()
+        return generator.sent, stats
+
+    sent, stats = asyncio.run(scenario())
+    assert sent == ["draft 0", "draft 1"]
+    assert (stats["spooled"], stats["sent"]) == (0, 2)
+
+
+def test_draft_is_parked_after_max_attempts_and_can_be_retried(tmp_path):
+    async def scenario():
+        spool = SubmissionSpool(str(tmp_path / "spool.sqlite3"))
+        generator = RecordingGenerator(failing=True)
+        async with SubmissionQueue(generator, BACKEND_URL, spool=spool, retry_interval=0.01, max_attempts=2,
+                                   bulk=False) as queue:
+            await queue.submit({"contract": "draft"})
+            while not (await spool.counts())["failed"]:
+                await asyncio.sleep(0.01)
+            await queue.join()
+            failed = await spool.failed()
+            generator.failing = False
+            reset = await spool.retry_failed()
+            await asyncio.wait_for(_drained(queue), 5)
+            await queue.join()
+            stats = await queue.stats()
+        await spool.aclose()
+        return failed, reset, generator.sent, stats
+
+    failed, reset, sent, stats = asyncio.run(scenario())
+    assert len(failed) == 1
+    assert failed[0]["attempts"] == 2
+    assert "connection refused" in failed[0]["last_error"]
+    assert failed[0]["contract_data"] == {"contract": "draft"}
+    assert reset == 1
+    assert sent == ["draft"]
+    assert (stats["failed"], stats["send_failures"]) == (0, 2)
+
+
+def test_worker_survives_a_spool_failure(tmp_path):
+    async def scenario():
+        generator = RecordingGenerator()
+        spool = FlakySpool(str(tmp_path / "spool.sqlite3"))
+        async with SubmissionQueue(generator, BACKEND_URL, spool=spool, workers=1, batch_size=1,
+                                   retry_interval=0.01, bulk=False) as queue:
+            for number in range(2):
+                await queue.submit({"contract": f"draft {number}"})
+            await asyncio.wait_for(_drained(queue), 5)
+            await queue.join()
+            stats = await queue.stats()
+            alive = not any(task.done() for task in queue._tasks)
+        counters = generator.metrics.snapshot()["counters"]
+        await spool.aclose()
+        return generator.sent, stats, alive, counters
+
+    sent, stats, alive, counters = asyncio.run(scenario())
+    assert alive
+    # The draft whose removal failed stayed spooled and was sent again (the backend deduplicates it)
+    assert sorted(sent) == ["draft 0", "draft 0", "draft 1"]
+    assert (stats["spool_errors"], stats["spooled"]) == (1, 0)
+    assert {"counter": "submissions", "labels": {"outcome": "spool_error"}, "value": 1} in counters
@@ -0,0 +1,57 @@
+import pytest
+
+from template_registry import CompiledTemplate, TemplateRegistry, get_default_registry, parse_template_file
+
+
+def test_optional_directives_are_read_and_stripped():
+    template = parse_template_file("lease", "# optional: pets, notes\n# optional: parking\n# reviewed: 2024\n"
+                                   "Lease for {tenant}.\nPets: {pets}\nNotes: {notes}\nParking: {parking}\n")
+    assert template.source.startswith("Lease for {tenant}.")
+    assert template.optional_fields == {"pets", "notes", "parking"}
+    assert template.required_fields == ["tenant"]
+    assert template.fields == ["tenant", "pets", "notes", "parking"]
+
+
+def test_only_leading_lines_are_directives():
+    template = parse_template_file("memo", "To {recipient}\n# optional: recipient\n")
+    assert template.optional_fields == frozenset()
+    assert template.required_fields == ["recipient"]
+    assert "# optional: recipient" in template.render({"recipient": "Ann"})
+
+
+def test_optional_field_missing_from_the_template_is_rejected():
+    with pytest.raises(ValueError, match="Optional fields not used in template 'memo': notes"):
+        parse_template_file("memo", "# optional: notes\nTo {recipient}\n")
+
+
+def test_render_fills_placeholders_and_keeps_literal_braces():
+    template = CompiledTemplate("memo", "{{Draft}} for {name}; {name} owes {amount}.", ["amount"])
+    assert template.render({"name": "Ann", "amount": 5}) == "{Draft} for Ann; Ann owes 5."
+    assert template.render({"name": "Ann"}) == "{Draft} for Ann; Ann owes ."
+    with pytest.raises(ValueError, match="Unsupported placeholder"):
+        CompiledTemplate("memo", "{name!r}")
+    with pytest.raises(ValueError, match="Unsupported placeholder"):
+        CompiledTemplate("memo", "{amount:.2f}")
+
+
+def test_registry_loads_a_directory_once_and_accepts_new_templates(tmp_path):
+    (tmp_path / "memo.txt").write_text("# optional: cc\nTo {recipient}, cc {cc}\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("not a template", encoding="utf-8")
+    registry = TemplateRegistry(str(tmp_path))
+    assert registry.contract_types() == ["memo"]
+    memo = registry.get("memo")
+    assert memo.required_fields == ["recipient"]
+    # Files are read on first use only
+    (tmp_path / "late.txt").write_text("Late {x}\n", encoding="utf-8")
+    assert "late" not in registry
+    registry.register("late", "Late {x}\n")
+    assert registry.get("late").required_fields == ["x"]
+    assert registry.get("missing") is None
+
+
+def test_bundled_templates_mark_additional_terms_optional():
+    registry = get_default_registry()
+    assert get_default_registry() is registry
+    assert len(registry.contract_types()) == 8
+    for contract_type in registry.contract_types():
+        assert "additional_terms" in registry.get(contract_type).optional_fields
@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pytest
+
+from contract_generator import ContractGenerator
+from metrics import InProcessMetrics
+from template_registry import get_default_registry
+from token_budget import TokenBudget, build_request, estimate_tokens, truncate_to_tokens, usage_from_response
+from transport import AsyncTransport, TransportResponse
+
+FORM_DATA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+LONG_TERMS = "No copies, no notes; no exceptions. " * 60
+
+
+class PromptTransport(AsyncTransport):
+    def __init__(self):
+        self.bodies = []
+
+    async def post(self, url, headers, json_body=None, content=None):
+        self.bodies.append(json_body)
+        body = {"candidates": [{"content": {"parts": [{"text": "NON-DISCLOSURE AGREEMENT"}]}}]}
+        return TransportResponse(200, {}, json.dumps(body).encode("utf-8"))
+
+
+def test_estimate_tokens_splits_long_words_and_counts_punctuation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("the cat sat.") == 4
+    # "confidentiality" is 15 characters, about 4 sub-word pieces
+    assert estimate_tokens("confidentiality") == 4
+    assert estimate_tokens("$1,500") == 4
+
+
+def test_truncate_to_tokens_cuts_at_a_piece_boundary():
+    text = "one two six, ten"
+    assert truncate_to_tokens(text, 4) == "one two six,"
+    assert truncate_to_tokens(text, 3) == "one two six"
+    assert truncate_to_tokens(text, 10) == text
+    assert estimate_tokens(truncate_to_tokens(LONG_TERMS, 50)) <= 50
+
+
+def test_oversized_fields_are_rejected_by_default():
+    budget = TokenBudget()
+    with pytest.raises(ValueError, match="additional_terms"):
+        budget.fit_fields(dict(FORM_DATA, additional_terms=LONG_TERMS))
+    assert budget.fit_fields(dict(FORM_DATA, additional_terms="No exceptions")) == (
+        dict(FORM_DATA, additional_terms="No exceptions"), []
+    )
+
+
+def test_prompt_and_output_budgets():
+    template = get_default_registry().get("nda")
+    budget = TokenBudget(output_tokens={"nda": 1500}, max_prompt_tokens=50)
+    with pytest.raises(ValueError, match="Prompt is too large"):
+        budget.prepare("nda", template, dict(FORM_DATA, additional_terms=""))
+    prompt, report = TokenBudget(output_tokens={"nda": 1500}).prepare("nda", template, dict(FORM_DATA, additional_terms=""))
+    assert "Innovation Labs LLC" in prompt
+    assert report == {"estimated_prompt_tokens": estimate_tokens(prompt), "max_output_tokens": 1500, "truncated_fields": []}
+    assert TokenBudget().output_budget("loan_agreement") == 2000
+
+
+def test_generator_rejects_oversized_terms_before_any_request():
+    async def scenario():
+        transport = PromptTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics()) as generator:
+            with pytest.raises(ValueError):
+                generator.validate_form_data("nda", dict(FORM_DATA, additional_terms=LONG_TERMS))
+            with pytest.raises(Exception, match="longer than 600 tokens"):
+                await generator.generate_contract("nda", dict(FORM_DATA, additional_terms=LONG_TERMS))
+        return transport.bodies
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_truncation_is_reported_when_asked_for():
+    async def scenario():
+        transport = PromptTransport()
+        metrics = InProcessMetrics()
+        budget = TokenBudget(oversize_policy="truncate", field_token_limits={"additional_terms": 20})
+        async with ContractGenerator(api_key="test", transport=transport, metrics=metrics, token_budget=budget) as generator:
+            result = await generator.generate_contract("nda", dict(FORM_DATA, additional_terms=LONG_TERMS))
+        return result, transport.bodies, metrics.snapshot()["counters"]
+
+    result, bodies, counters = asyncio.run(scenario())
+    assert result["metadata"]["token_usage"]["truncated_fields"] == ["additional_terms"]
+    prompt = bodies[0]["contents"][0]["parts"][0]["text"]
+    assert "No copies, no notes; no exceptions." in prompt
+    assert LONG_TERMS.strip() not in prompt
+    assert {"counter": "truncated_fields", "labels": {"contract_type": "nda", "field": "additional_terms"}, "value": 1} in counters
+
+
+def test_usage_from_response_reads_usage_metadata():
+    result = {"usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 20, "totalTokenCount": 30}}
+    assert usage_from_response(result) == {"prompt_tokens": 10, "output_tokens": 20, "total_tokens": 30}
+    assert usage_from_response({}) == {"prompt_tokens": None, "output_tokens": None, "total_tokens": None}
+
+
+def test_build_request_estimates_the_prompt_unless_given():
+    data, report = build_request("Draft an NDA.", 512)
+    assert data == {
+        "contents": [{"parts": [{"text": "Draft an NDA."}]}],
+        "generationConfig": {"temperature": 0.0, "maxOutputTokens": 512}
+    }
+    assert report == {"estimated_prompt_tokens": 5, "max_output_tokens": 512, "truncated_fields": []}
+    assert build_request("Draft an NDA.", 512, ["additional_terms"], prompt_tokens=9)[1] == {
+        "estimated_prompt_tokens": 9, "max_output_tokens": 512, "truncated_fields": ["additional_terms"]
+    }
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from contract_generator import ContractGenerator
+from deadline import Deadline, DeadlineExceeded, deadline_scope
+from http_server import HTTPServer
+from metrics import InProcessMetrics
+from retry import RetryPolicy
+from transport import AsyncTransport, HttpxTransport, PoolConfig, TimeoutConfig, TransportError, TransportTimeout
+
+NDA = {
+    "disclosing_party": "Innovation Labs LLC",
+    "receiving_party": "Consulting Services Inc",
+    "purpose": "Evaluation of proprietary technology",
+    "term": "5 years"
+}
+
+
+class CountingServer(HTTPServer):
+    """Answers every request after `delay` seconds, counting connections and requests in flight."""
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.connections = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        await super()._handle_connection(reader, writer)
+
+    async def handle(self, request, response):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        await response.send_json(200, {"path": request.path})
+
+
+def test_connections_are_reused_and_pooled_per_host():
+    async def scenario():
+        async with CountingServer() as first, CountingServer() as second:
+            transport = HttpxTransport(pool_config=PoolConfig(http2=False))
+            for _ in range(5):
+                await transport.post(first.base_url + "/a", {}, json_body={})
+            response = await transport.post(second.base_url + "/b", {}, json_body={})
+            clients = dict(transport._clients)
+            await transport.aclose()
+            return first.connections, second.connections, response, clients
+
+    first, second, response, clients = asyncio.run(scenario())
+    # Keep-alive: one connection per host for sequential calls
+    assert (first, second) == (1, 1)
+    assert response.status_code == 200 and response.json() == {"path": "/b"}
+    assert len(clients) == 2
+    assert set(response.timings) == {"connect", "ttfb", "download"}
+
+
+def test_connections_per_host_are_bounded():
+    async def scenario():
+        async with CountingServer(delay=0.05) as server:
+            transport = HttpxTransport(pool_config=PoolConfig(max_connections_per_host=2, http2=False))
+            await asyncio.gather(*(transport.post(server.base_url, {}, json_body={}) for _ in range(6)))
+            await transport.aclose()
+            return server.connections, server.peak
+
+    connections, peak = asyncio.run(scenario())
+    assert connections == 2
+    assert peak == 2
+
+
+def test_phase_timeouts_are_capped_by_the_deadline():
+    timeouts = TimeoutConfig(connect=10.0, read=120.0, write=None, pool=0.5)
+    assert timeouts.phases() == {"connect": 10.0, "read": 120.0, "write": None, "pool": 0.5}
+    with deadline_scope(Deadline(1.0)):
+        phases = timeouts.phases()
+    assert all(0 < seconds <= 1.0 for seconds in phases.values())
+    assert phases["pool"] == 0.5
+
+
+def test_read_timeout_and_connection_errors_are_transport_errors():
+    async def scenario():
+        async with CountingServer(delay=0.5) as server:
+            transport = HttpxTransport(pool_config=PoolConfig(http2=False), timeouts=TimeoutConfig(read=0.05))
+            with pytest.raises(TransportTimeout):
+                await transport.post(server.base_url, {}, json_body={})
+            url = server.base_url
+        # Nothing listens there any more
+        with pytest.raises(TransportError):
+            await transport.post(url, {}, json_body={})
+        await transport.aclose()
+
+    asyncio.run(scenario())
+
+
+class FailingTransport(AsyncTransport):
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def post(self, url, headers, json_body=None, content=None):
+        self.calls += 1
+        raise self.error
+
+
+def test_generator_maps_transport_failures_to_public_errors():
+    transport = FailingTransport(TransportError("connection refused"))
+
+    async def generate():
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     retry_policy=RetryPolicy(max_attempts=2, backoff_base=0.01)) as generator:
+            await generator.generate_contract("nda", NDA, use_cache=False)
+
+    with pytest.raises(Exception, match="API request failed: connection refused"):
+        asyncio.run(generate())
+    # Connection errors are retried first
+    assert transport.calls == 2
+    transport.error = TransportTimeout("ReadTimeout from api.test")
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(generate())
@@ -0,0 +1,210 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from contract_generator import ContractGenerator
+from metrics import InProcessMetrics
+from transport import AsyncTransport, StreamingResponse, TransportResponse
+from verification import ALTERED, MISSING, PRESENT, PatternMatcher, fix_altered, repair_section, verify_fields
+
+FORM_DATA = {
+    "landlord_name": "Alice Brown",
+    "tenant_name": "Bob Green",
+    "property_address": "12 High Street, London",
+    "rent_amount": "$1,500",
+    "term": "12 months"
+}
+
+# The term is missing and the rent is written without its comma
+CONTRACT = """RESIDENTIAL TENANCY AGREEMENT
+
+This agreement is made between Alice Brown ("Landlord") and Bob Green ("Tenant").
+
+1. PROPERTY
+The Landlord lets the property at 12 High Street, London to the Tenant.
+
+2. RENT
+The Tenant shall pay $1500 per month.
+
+3. TERM
+The tenancy runs for a fixed period.
+
+IN WITNESS WHEREOF
+"""
+
+
+class ScriptedTransport(AsyncTransport):
+    """Answers generation requests with CONTRACT and repair requests with a fixed section."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def post(self, url, headers, json_body=None, content=None):
+        prompt = json_body["contents"][0]["parts"][0]["text"]
+        self.prompts.append(prompt)
+        if "character for character" in prompt:
+            text, output_tokens = "3. TERM\nThe tenancy runs for 12 months.", 7
+        else:
+            text, output_tokens = CONTRACT, 900
+        body = {
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {"promptTokenCount": 50, "candidatesTokenCount": output_tokens,
+                              "totalTokenCount": 50 + output_tokens}
+        }
+        return TransportResponse(200, {}, json.dumps(body).encode("utf-8"))
+
+    @asynccontextmanager
+    async def stream_post(self, url, headers, json_body):
+        self.prompts.append(json_body["contents"][0]["parts"][0]["text"])
+        yield SSEResponse([CONTRACT[:60], CONTRACT[60:]])
+
+
+class SSEResponse(StreamingResponse):
+    def __init__(self, texts):
+        super().__init__(200, {"content-type": "text/event-stream"})
+        self.texts = texts
+
+    async def aiter_lines(self):
+        for text in self.texts:
+            yield "data: " + json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+            yield ""
+
+
+def stream(verify):
+    async def scenario():
+        transport = ScriptedTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     verify=verify) as generator:
+            events = [event async for event in generator.stream_contract("tenancy_agreement", FORM_DATA)]
+            cached = [event async for event in generator.stream_contract("tenancy_agreement", FORM_DATA)]
+        return events, cached, transport.prompts
+
+    return asyncio.run(scenario())
+
+
+def test_streamed_contract_is_verified_before_done():
+    events, cached, prompts = stream("report")
+    assert [event["type"] for event in events] == ["chunk", "chunk", "done"]
+    for done in (events[-1], cached[-1]):
+        assert done["contract"] == CONTRACT
+        verification = done["metadata"]["verification"]
+        assert verification["ok"] is False
+        assert (verification["missing"], verification["altered"]) == (["term"], ["rent_amount"])
+    assert cached[-1]["metadata"]["cache_hit"] is True
+    assert len(prompts) == 1
+
+
+def test_streaming_in_repair_mode_yields_the_repaired_contract_once():
+    events, _, prompts = stream("repair")
+    assert [event["type"] for event in events] == ["chunk", "done"]
+    assert events[0]["text"] == events[1]["contract"]
+    assert "$1,500" in events[1]["contract"] and "12 months" in events[1]["contract"]
+    assert events[1]["metadata"]["verification"]["ok"]
+    # Generated through generateContent, then one repair call
+    assert len(prompts) == 2
+
+
+def test_repair_mode_keeps_generation_metadata():
+    async def scenario():
+        transport = ScriptedTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     verify="repair") as generator:
+            first = await generator.generate_contract("tenancy_agreement", FORM_DATA)
+            second = await generator.generate_contract("tenancy_agreement", FORM_DATA)
+            return first, second, transport.prompts
+
+    first, second, prompts = asyncio.run(scenario())
+    for result in (first, second):
+        assert "$1,500" in result["contract"]
+        assert "12 months" in result["contract"]
+        verification = result["metadata"]["verification"]
+        assert verification["ok"]
+        assert sorted(verification["repaired"]) == ["rent_amount", "term"]
+        # Usage and retries still describe the generation, not the repair call
+        assert result["metadata"]["token_usage"]["output_tokens"] == (900 if result is first else None)
+        assert result["metadata"]["token_usage"]["estimated_prompt_tokens"] > 0
+    assert first["metadata"]["cache_hit"] is False
+    assert second["metadata"]["cache_hit"] is True
+    assert first["metadata"]["verification"]["repair"]["token_usage"]["output_tokens"] == 7
+    assert second["metadata"]["verification"]["repair"]["cache_hits"] == 1
+    # One generation and one repair call; the second contract and its repair come from the cache
+    assert len(prompts) == 2
+
+
+def test_full_revision_is_repaired_like_a_new_contract():
+    async def scenario():
+        transport = ScriptedTransport()
+        async with ContractGenerator(api_key="test", transport=transport, metrics=InProcessMetrics(),
+                                     verify="repair") as generator:
+            # The previous term does not appear in the text, so the whole contract is regenerated
+            previous = {"contract": CONTRACT, "metadata": {"contract_type": "tenancy_agreement"}}
+            revised = await generator.revise_contract(previous, FORM_DATA, dict(FORM_DATA, term="24 months"))
+        return revised, transport.prompts
+
+    revised, prompts = asyncio.run(scenario())
+    metadata = revised["metadata"]
+    assert metadata["revision"]["mode"] == "full"
+    assert metadata["verification"]["ok"]
+    assert sorted(metadata["verification"]["repaired"]) == ["rent_amount", "term"]
+    assert "12 months" in revised["contract"]
+    assert len(prompts) == 2
+
+
+def test_pattern_matcher_finds_overlapping_occurrences():
+    matcher = PatternMatcher(["he", "she", "his", "hers", "", "he"])
+    assert matcher.patterns == ["he", "she", "his", "hers"]
+    found = sorted((start, end, matcher.patterns[index]) for start, end, index in matcher.finditer("ushers"))
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+    assert list(PatternMatcher([]).finditer("anything")) == []
+
+
+def test_verify_fields_reports_present_altered_and_missing():
+    report = verify_fields(FORM_DATA, CONTRACT)
+    assert report["ok"] is False
+    assert report["missing"] == ["term"]
+    assert report["altered"] == ["rent_amount"]
+    fields = report["fields"]
+    assert fields["landlord_name"] == {"status": PRESENT, "count": 1, "found": [], "spans": []}
+    assert fields["property_address"]["status"] == PRESENT
+    assert fields["term"]["status"] == MISSING
+    assert fields["rent_amount"]["status"] == ALTERED
+    assert fields["rent_amount"]["found"] == ["$1500"]
+    start, end = fields["rent_amount"]["spans"][0]
+    assert CONTRACT[start:end] == "$1500"
+
+
+def test_verify_fields_ignores_whitespace_but_not_case():
+    text = "Signed by ALICE BROWN and Bob\n   Green."
+    report = verify_fields({"landlord_name": "Alice Brown", "tenant_name": "Bob Green"}, text)
+    assert report["fields"]["tenant_name"]["status"] == PRESENT
+    assert report["fields"]["landlord_name"]["status"] == ALTERED
+    assert report["fields"]["landlord_name"]["found"] == ["ALICE BROWN"]
+
+
+def test_verify_fields_matches_whole_words_and_skips_empty_values():
+    report = verify_fields({"name": "Ann", "note": "", "other": None}, "The Annual report.")
+    assert list(report["fields"]) == ["name"]
+    assert report["missing"] == ["name"]
+
+
+def test_verbatim_occurrence_wins_over_altered_ones():
+    report = verify_fields({"rent": "$1,500"}, "Rent is $1500, that is $1,500 per month.")
+    assert report["ok"] is True
+    assert report["fields"]["rent"]["count"] == 2
+    assert report["fields"]["rent"]["spans"] == []
+
+
+def test_fix_altered_restores_exact_values():
+    values = {"rent_amount": "$1,500", "tenant_name": "Bob Green"}
+    text = "Bob green pays $1500 now and $1500 later."
+    report = verify_fields(values, text)
+    fixed = fix_altered(text, values, report)
+    assert fixed == "Bob Green pays $1,500 now and $1,500 later."
+    assert verify_fields(values, fixed)["ok"] is True
+
+
+def test_repair_section_picks_the_heading_sharing_most_words():
+    sections = [{"heading": ""}, {"heading": "1. PROPERTY"}, {"heading": "2. RENT"}, {"heading": "3. TERM"}]
+    assert repair_section(sections, "Rent Amount") == 2
+    assert repair_section(sections, "Lease Term") == 3
+    assert repair_section(sections, "Tenant Name") == 0
@@ -0,0 +1,163 @@
+import math
+import re
+from typing import Dict, Any, Optional, List, Tuple
+
+from template_registry import CompiledTemplate
+
+DEFAULT_OUTPUT_TOKENS = 2000
+
+# Words, numbers and single punctuation marks, roughly how SentencePiece splits text
+_TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the Gemini token count of a text without a network call.
+
+    Long words and numbers are split into ~4 character sub-word pieces and
+    every punctuation mark counts as one token. This tends to overestimate
+    slightly, which is the safe side for quota accounting.
+    """
+    count = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        count += math.ceil(len(piece) / 4) if len(piece) > 4 else 1
+    return count
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text at a piece boundary so its estimated size fits within max_tokens."""
+    count = 0
+    for match in _TOKEN_PIECE.finditer(text):
+        piece = match.group()
+        count += math.ceil(len(piece) / 4) if len(piece) > 4 else 1
+        if count > max_tokens:
+            return text[:match.start()].rstrip()
+    return text
+
+
+def build_request(
+    prompt: str,
+    max_output_tokens: int,
+    truncated_fields: Optional[List[str]] = None,
+    prompt_tokens: Optional[int] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Gemini generateContent request body for a prompt, with its token report.
+
+    Args:
+        prompt: Prompt text
+        max_output_tokens: Output token budget (maxOutputTokens)
+        truncated_fields: Form fields shortened to fit the budget
+        prompt_tokens: Estimated prompt size if already known (default: estimated here)
+
+    Returns:
+        Tuple of the request body and the pre-flight token report
+    """
+    data = {
+        "contents": [{
+            "parts": [{
+                "text": prompt
+            }]
+        }],
+        "generationConfig": {
+            "temperature": 0.0,
+            "maxOutputTokens": max_output_tokens
+        }
+    }
+    return data, {
+        "estimated_prompt_tokens": estimate_tokens(prompt) if prompt_tokens is None else prompt_tokens,
+        "max_output_tokens": max_output_tokens,
+        "truncated_fields": list(truncated_fields or [])
+    }
+
+
+class TokenBudget:
+    """
+    Pre-flight token accounting for model requests.
+
+    Args:
+        output_tokens: maxOutputTokens per contract type
+        default_output_tokens: maxOutputTokens for contract types not listed
+        max_prompt_tokens: Largest estimated prompt accepted, or None for no limit
+        field_token_limits: Per-field token caps checked before the prompt is built
+        oversize_policy: "reject" raises ValueError for fields over their cap, "truncate" shortens them
+            (user-supplied terms are never cut unless asked for)
+    """
+
+    def __init__(
+        self,
+        output_tokens: Optional[Dict[str, int]] = None,
+        default_output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+        max_prompt_tokens: Optional[int] = 4000,
+        field_token_limits: Optional[Dict[str, int]] = None,
+        oversize_policy: str = "reject"
+    ):
+        if oversize_policy not in ("truncate", "reject"):
+            raise ValueError("oversize_policy must be 'truncate' or 'reject'")
+        self.output_tokens = dict(output_tokens or {})
+        self.default_output_tokens = default_output_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.field_token_limits = dict({"additional_terms": 600} if field_token_limits is None else field_token_limits)
+        self.oversize_policy = oversize_policy
+
+    def output_budget(self, contract_type: str) -> int:
+        return self.output_tokens.get(contract_type, self.default_output_tokens)
+
+    def fit_fields(self, form_data: Dict[str, str]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Apply the per-field token caps.
+
+        Returns:
+            Tuple of the (possibly truncated) form data and the names of truncated fields
+        """
+        truncated = []
+        fitted = dict(form_data)
+        for field, limit in self.field_token_limits.items():
+            value = fitted.get(field)
+            if not value or estimate_tokens(value) <= limit:
+                continue
+            if self.oversize_policy == "reject":
+                raise ValueError(f"Field '{field}' is longer than {limit} tokens")
+            fitted[field] = truncate_to_tokens(value, limit)
+            truncated.append(field)
+        return fitted, truncated
+
+    def prepare(
+        self,
+        contract_type: str,
+        template: CompiledTemplate,
+        form_data: Dict[str, str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render the prompt within budget.
+
+        Returns:
+            Tuple of the prompt and a token report with the estimated prompt size,
+            output budget and any truncated fields
+
+        Raises:
+            ValueError: If a field or the whole prompt is over budget and cannot be truncated
+        """
+        form_data, truncated = self.fit_fields(form_data)
+        prompt = template.render(form_data)
+        prompt_tokens = estimate_tokens(prompt)
+        if self.max_prompt_tokens is not None and prompt_tokens > self.max_prompt_tokens:
+            raise ValueError(
+                f"Prompt is too large: about {prompt_tokens} tokens (limit {self.max_prompt_tokens})"
+            )
+        return prompt, {
+            "estimated_prompt_tokens": prompt_tokens,
+            "max_output_tokens": self.output_budget(contract_type),
+            "truncated_fields": truncated
+        }
+
+
+def usage_from_response(result: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    """Read actual token counts from a response's usageMetadata (missing counts are None)."""
+    usage = result.get("usageMetadata") or {}
+    return {
+        "prompt_tokens": usage.get("promptTokenCount"),
+        "output_tokens": usage.get("candidatesTokenCount"),
+        "total_tokens": usage.get("totalTokenCount")
+    }
+
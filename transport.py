@@ -0,0 +1,321 @@
+import importlib.util
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator, TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from deadline import current_deadline
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class TransportError(Exception):
+    """Raised when a request could not be completed (connection reset, DNS failure, etc.)."""
+
+
+class TransportTimeout(TransportError):
+    """Raised when connecting, sending, reading or waiting for a pooled connection timed out."""
+
+
+class ResponseError(Exception):
+    """
+    Raised for a response that cannot be used: an error status, or no generated text.
+
+    Args:
+        message: Description of the failure
+        status_code: HTTP status of the response, or None when it succeeded but was empty
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TransportResponse:
+    """Minimal response object returned by every transport implementation."""
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Dict[str, str],
+        content: bytes,
+        timings: Optional[Dict[str, float]] = None
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        # Seconds spent connecting (0 on a reused connection), waiting for the
+        # first byte and downloading the body, when the transport measures them
+        self.timings = timings or {}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def header(self, name: str) -> Optional[str]:
+        """Case-insensitive header lookup."""
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+    def error_message(self) -> str:
+        """Extract the error message from a Google/backend style error body."""
+        try:
+            return self.json().get("error", {}).get("message", "Unknown error")
+        except (ValueError, AttributeError):
+            return "Unknown error"
+
+
+class StreamingResponse:
+    """
+    Response whose body is consumed incrementally.
+
+    Transports return this from `stream_post`; `aiter_lines` yields decoded
+    lines as they arrive and `aread` buffers the rest of the body into a
+    TransportResponse (used for error bodies).
+    """
+
+    def __init__(self, status_code: int, headers: Dict[str, str]):
+        self.status_code = status_code
+        self.headers = headers
+
+    def aiter_lines(self) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def aread(self) -> TransportResponse:
+        raise NotImplementedError
+
+
+class PoolConfig:
+    """
+    Connection pool settings for HttpxTransport.
+
+    Args:
+        max_connections_per_host: Upper bound on open connections to a single host
+        max_keepalive_connections: Idle connections kept open per host for reuse
+        keepalive_expiry: Seconds an idle connection is kept before being closed
+        http2: Negotiate HTTP/2 when the server and the `h2` package support it
+    """
+
+    def __init__(
+        self,
+        max_connections_per_host: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+
+
+class TimeoutConfig:
+    """
+    Timeouts for outbound calls, in seconds (None waits indefinitely).
+
+    The per-phase timeouts apply to each HTTP request and are shortened to
+    the time left before the call's deadline. `total` is the default deadline
+    of a whole call (generation or submission) including retries.
+
+    Args:
+        connect: Establishing a connection, including TLS
+        read: Waiting for response data (the first byte or the next chunk)
+        write: Sending request data
+        pool: Waiting for a free pooled connection
+        total: Default deadline of a whole call, used when the caller passes no timeout
+    """
+
+    def __init__(
+        self,
+        connect: Optional[float] = 10.0,
+        read: Optional[float] = 120.0,
+        write: Optional[float] = 30.0,
+        pool: Optional[float] = 30.0,
+        total: Optional[float] = 300.0
+    ):
+        self.connect = connect
+        self.read = read
+        self.write = write
+        self.pool = pool
+        self.total = total
+
+    def phases(self) -> Dict[str, Optional[float]]:
+        """Per-phase timeouts capped by the current deadline."""
+        phases = {"connect": self.connect, "read": self.read, "write": self.write, "pool": self.pool}
+        deadline = current_deadline()
+        if deadline is not None:
+            phases = {phase: deadline.cap(seconds) for phase, seconds in phases.items()}
+        return phases
+
+
+class AsyncTransport:
+    """
+    Interface for the HTTP client used by ContractGenerator.
+
+    Implementations must not block the event loop, should keep each request
+    within the current deadline (see deadline.current_deadline) and raise
+    TransportTimeout when a request times out. Subclass this to plug in a
+    different client library (aiohttp, a test double, etc.).
+    """
+
+    async def post(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        json_body: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None
+    ) -> TransportResponse:
+        """POST either a JSON body or pre-encoded `content` (e.g. a gzip-compressed body)."""
+        raise NotImplementedError
+
+    def stream_post(self, url: str, headers: Dict[str, str], json_body: Dict[str, Any]):
+        """Return an async context manager yielding a StreamingResponse."""
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class HttpxTransport(AsyncTransport):
+    """
+    AsyncTransport backed by pooled httpx.AsyncClient instances.
+
+    One long-lived client is kept per host (Gemini, the contract backend, ...)
+    so each host gets its own connection limit and connections are reused
+    across calls instead of paying a TCP + TLS handshake per contract.
+
+    httpx is imported on first use rather than at import time, which keeps it
+    out of the cold-start path of processes that never make a request.
+    """
+
+    def __init__(
+        self,
+        client: Optional["httpx.AsyncClient"] = None,
+        pool_config: Optional[PoolConfig] = None,
+        timeouts: Optional[TimeoutConfig] = None
+    ):
+        self.pool_config = pool_config or PoolConfig()
+        self.timeouts = timeouts or TimeoutConfig()
+        # An injected client is used for every host and is left open on aclose()
+        self._client = client
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+
+    def _build_client(self) -> "httpx.AsyncClient":
+        import httpx
+        
+        config = self.pool_config
+        limits = httpx.Limits(
+            max_connections=config.max_connections_per_host,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry
+        )
+        # HTTP/2 needs the optional `h2` package
+        http2 = config.http2 and importlib.util.find_spec("h2") is not None
+        return httpx.AsyncClient(limits=limits, http2=http2)
+
+    def _timeout(self) -> "httpx.Timeout":
+        import httpx
+        
+        return httpx.Timeout(**self.timeouts.phases())
+
+    def _get_client(self, url: str) -> "httpx.AsyncClient":
+        if self._client is not None:
+            return self._client
+        host = urlsplit(url).netloc
+        client = self._clients.get(host)
+        if client is None:
+            client = self._build_client()
+            self._clients[host] = client
+        return client
+
+    async def post(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        json_body: Optional[Dict[str, Any]] = None,
+        content: Optional[bytes] = None
+    ) -> TransportResponse:
+        import httpx
+        
+        client = self._get_client(url)
+        marks: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            # httpcore reports connection setup and response header events
+            if event_name.endswith((".connect_tcp.complete", ".start_tls.complete")):
+                marks["connected"] = time.perf_counter()
+            elif event_name.endswith(".receive_response_headers.complete"):
+                marks["first_byte"] = time.perf_counter()
+
+        started = time.perf_counter()
+        try:
+            request = client.build_request(
+                "POST", url, headers=headers, json=json_body, content=content,
+                timeout=self._timeout(), extensions={"trace": trace}
+            )
+            # Closing the response also runs on cancellation, so the connection is released
+            response = await client.send(request, stream=True)
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        except httpx.TimeoutException as e:
+            raise TransportTimeout(f"{type(e).__name__} from {urlsplit(url).netloc}") from e
+        except httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        finished = time.perf_counter()
+
+        connected = marks.get("connected", started)
+        first_byte = marks.get("first_byte", finished)
+        timings = {
+            "connect": connected - started,
+            "ttfb": first_byte - connected,
+            "download": finished - first_byte
+        }
+        return TransportResponse(response.status_code, dict(response.headers), response.content, timings)
+
+    @asynccontextmanager
+    async def stream_post(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        json_body: Dict[str, Any]
+    ) -> AsyncIterator[StreamingResponse]:
+        import httpx
+        
+        try:
+            async with self._get_client(url).stream(
+                "POST", url, headers=headers, json=json_body, timeout=self._timeout()
+            ) as response:
+                yield _HttpxStreamingResponse(response)
+        except httpx.TimeoutException as e:
+            raise TransportTimeout(f"{type(e).__name__} from {urlsplit(url).netloc}") from e
+        except httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+class _HttpxStreamingResponse(StreamingResponse):
+    def __init__(self, response: "httpx.Response"):
+        super().__init__(response.status_code, dict(response.headers))
+        self._response = response
+
+    async def aiter_lines(self) -> AsyncIterator[str]:
+        async for line in self._response.aiter_lines():
+            yield line
+
+    async def aread(self) -> TransportResponse:
+        content = await self._response.aread()
+        return TransportResponse(self.status_code, self.headers, content)
@@ -0,0 +1,232 @@
+import re
+from collections import deque
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+from template_registry import CompiledTemplate
+from token_budget import build_request
+
+PRESENT = "present"
+ALTERED = "altered"
+MISSING = "missing"
+
+_WHITESPACE = re.compile(r"\s+")
+_LEADING = re.compile(r"^[^\w\s]*")
+_TRAILING = re.compile(r"[^\w\s]*$")
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton finding every occurrence of many patterns in one pass.
+
+    Building takes time linear in the total pattern length and a scan takes
+    time linear in the text length plus the number of matches, however many
+    patterns there are.
+
+    Args:
+        patterns: Strings to look for (empty strings and duplicates are ignored)
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(dict.fromkeys(pattern for pattern in patterns if pattern))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Indices of the patterns ending at each node, including through fail links
+        self._output: List[List[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._output[child].extend(self._output[self._fail[child]])
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start, end, pattern index) for every occurrence, overlapping ones included."""
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self.patterns
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in output[node]:
+                yield position + 1 - len(patterns[index]), position + 1, index
+
+
+def _loose(text: str) -> Tuple[str, List[int]]:
+    """
+    Lower-case words separated by single spaces, for matching.
+
+    Punctuation inside a number is dropped and any other punctuation separates
+    words, so "$1500" matches "$1,500" and "Smith Jones" matches "Smith-Jones".
+    Returns the folded text and, per character, its position in `text`.
+    """
+    chars: List[str] = []
+    positions: List[int] = []
+    last = len(text) - 1
+    for position, char in enumerate(text):
+        if char.isalnum():
+            lower = char.lower()
+            chars.append(lower if len(lower) == 1 else char)
+            positions.append(position)
+        elif 0 < position < last and text[position - 1].isdigit() and text[position + 1].isdigit() and not char.isspace():
+            continue
+        elif chars and chars[-1] != " ":
+            chars.append(" ")
+            positions.append(position)
+    return "".join(chars), positions
+
+
+def normalize_whitespace(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def verify_fields(values: Dict[str, str], text: str) -> Dict[str, Any]:
+    """
+    Check that every form value appears in the text exactly as provided.
+
+    All values are found in a single scan. Whitespace differences (line breaks,
+    repeated spaces) are ignored. A value that only appears with different
+    case, punctuation or spacing between words is reported as altered.
+
+    Args:
+        values: Field values to look for, keyed by field name (empty values are skipped)
+        text: Generated contract
+
+    Returns:
+        Dictionary with an ok flag, the missing and altered field names and,
+        per field, its status ("present", "altered" or "missing"), the number
+        of occurrences and, when altered, the variants found and their spans
+    """
+    wanted: Dict[str, str] = {}
+    for field, value in values.items():
+        value = normalize_whitespace(str(value or ""))
+        if _loose(value)[0].strip():
+            wanted[field] = value
+    keys = {field: _loose(value)[0].strip() for field, value in wanted.items()}
+    matcher = PatternMatcher(keys.values())
+    pattern_index = {pattern: index for index, pattern in enumerate(matcher.patterns)}
+    fields_by_pattern: Dict[int, List[str]] = {}
+    # Punctuation the value starts and ends with ("$", "."), which the folded match leaves out
+    edges: Dict[str, Tuple[int, int]] = {}
+    for field, key in keys.items():
+        fields_by_pattern.setdefault(pattern_index[key], []).append(field)
+        value = wanted[field]
+        edges[field] = (len(_LEADING.match(value).group()), len(_TRAILING.search(value).group()))
+
+    folded, positions = _loose(text)
+    fields = {field: {"status": MISSING, "count": 0, "found": [], "spans": []} for field in wanted}
+    for start, end, index in matcher.finditer(folded):
+        # Whole words only, so "Ann" does not match inside "Annual"
+        if (start > 0 and folded[start - 1] != " ") or (end < len(folded) and folded[end] != " "):
+            continue
+        first, last = positions[start], positions[end - 1]
+        for field in fields_by_pattern[index]:
+            report = fields[field]
+            report["count"] += 1
+            if report["status"] == PRESENT:
+                continue
+            prefix, suffix = edges[field]
+            span = [first, last + 1]
+            while prefix and span[0] > 0 and _LEADING.match(text[span[0] - 1]).group():
+                span[0] -= 1
+                prefix -= 1
+            while suffix and span[1] < len(text) and _LEADING.match(text[span[1]]).group():
+                span[1] += 1
+                suffix -= 1
+            found = text[span[0]:span[1]]
+            if normalize_whitespace(found) == wanted[field]:
+                report["status"] = PRESENT
+            else:
+                report["status"] = ALTERED
+                if found not in report["found"]:
+                    report["found"].append(found)
+                report["spans"].append(span)
+
+    for report in fields.values():
+        if report["status"] != ALTERED:
+            report["found"], report["spans"] = [], []
+    missing = [field for field, report in fields.items() if report["status"] == MISSING]
+    altered = [field for field, report in fields.items() if report["status"] == ALTERED]
+    return {"ok": not missing and not altered, "missing": missing, "altered": altered, "fields": fields}
+
+
+def fix_altered(text: str, values: Dict[str, str], report: Dict[str, Any]) -> str:
+    """Replace the altered occurrences found by verify_fields with the exact values."""
+    replacements = []
+    for field in report["altered"]:
+        value = normalize_whitespace(str(values[field]))
+        replacements.extend((start, end, value) for start, end in report["fields"][field]["spans"])
+    fixed = []
+    position = 0
+    for start, end, value in sorted(replacements):
+        if start < position:
+            # Overlaps an earlier replacement
+            continue
+        fixed.append(text[position:start])
+        fixed.append(value)
+        position = end
+    fixed.append(text[position:])
+    return "".join(fixed)
+
+
+def repair_section(sections: List[Dict[str, str]], label: str) -> int:
+    """
+    Index of the section where a missing detail most likely belongs.
+
+    That is the section whose heading shares the most words with the field's
+    label (e.g. "2. RENT" for "Rent Amount"), or else the opening section.
+    """
+    label_words = set(re.findall(r"\w+", label.lower()))
+    best, best_overlap = 0, 0
+    for index, section in enumerate(sections):
+        overlap = len(label_words & set(re.findall(r"\w+", section["heading"].lower())))
+        if overlap > best_overlap:
+            best, best_overlap = index, overlap
+    return best
+
+
+def repair_request(
+    template: CompiledTemplate,
+    section: str,
+    details: List[Tuple[str, str]],
+    max_output_tokens: int
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Gemini request body that rewrites one section so it states details verbatim.
+
+    Args:
+        template: Template the contract was generated from
+        section: Current text of the section
+        details: (label, value) per detail the section must contain
+        max_output_tokens: Output token budget for the section
+
+    Returns:
+        Tuple of the request body and its token report
+    """
+    document = template.name.replace("_", " ")
+    lines = "".join(f"- {label}: {value}\n" for label, value in details)
+    prompt = (
+        f"Below is one section of a professional {document}. It must state these details "
+        "exactly as provided, character for character:\n"
+        f"{lines}"
+        "Rewrite the section so it includes them. Keep its heading, numbering, defined terms and "
+        "formatting, and leave everything else word for word.\n"
+        "Output only the revised section.\n\n"
+        f"{section.strip()}\n"
+    )
+    return build_request(prompt, max_output_tokens)